@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Tipos de índice FAISS para o vector store (flat, IVF, HNSW, IVF-PQ)
+
+A especificação é um texto "tipo:parâmetro=valor,...", por exemplo:
+    flat
+    ivf:nlist=256,nprobe=16
+    hnsw:M=32,efSearch=64,efConstruction=80
+    ivfpq:nlist=256,m=16,nbits=8,nprobe=16
+
+Os índices que precisam de treino (IVF, IVF-PQ) são treinados numa
+amostra dos vetores. A especificação fica gravada junto do vector store
+(index_spec.json) para que a carga reaplique nprobe/efSearch, que o
+FAISS não guarda no arquivo do índice. O faiss só é importado pelas
+funções que montam ou medem índices.
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+
+SPEC_FILE = "index_spec.json"
+
+# Tipo -> parâmetros padrão
+INDEX_TYPES = {
+    'flat': {},
+    'ivf': {'nlist': 256, 'nprobe': 16, 'train': 0},
+    'hnsw': {'M': 32, 'efSearch': 64, 'efConstruction': 80},
+    'ivfpq': {'nlist': 256, 'm': 16, 'nbits': 8, 'nprobe': 16, 'train': 0}
+}
+
+MIN_POINTS_PER_CENTROID = 39  # Abaixo disso o k-means do FAISS avisa que o treino é fraco
+
+
+def parse_index_spec(spec):
+    """'ivf:nlist=64,nprobe=8' -> {'type': 'ivf', 'nlist': 64, 'nprobe': 8, 'train': 0}"""
+    if isinstance(spec, dict):
+        return dict(spec)
+
+    kind, _, params = spec.strip().partition(':')
+    kind = kind.lower()
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Índice desconhecido: {kind} (use {', '.join(INDEX_TYPES)})")
+
+    parsed = {'type': kind, **INDEX_TYPES[kind]}
+    for item in filter(None, (part.strip() for part in params.split(','))):
+        name, _, value = item.partition('=')
+        if name not in INDEX_TYPES[kind]:
+            raise ValueError(f"Parâmetro desconhecido para {kind}: {name}")
+        parsed[name] = int(value)
+    return parsed
+
+
+def format_index_spec(spec):
+    params = ",".join(f"{name}={value}" for name, value in spec.items() if name != 'type')
+    return f"{spec['type']}:{params}" if params else spec['type']
+
+
+def fit_to_corpus(spec, n_vectors):
+    """Reduz nlist/nbits quando o corpus é pequeno demais para treinar o índice pedido"""
+    spec = dict(spec)
+    if 'nlist' in spec:
+        nlist = max(1, min(spec['nlist'], n_vectors // MIN_POINTS_PER_CENTROID))
+        if nlist != spec['nlist']:
+            print(f"⚠️ nlist {spec['nlist']} -> {nlist} ({n_vectors} vetores)")
+            spec['nlist'] = nlist
+        spec['nprobe'] = min(spec['nprobe'], nlist)
+    if 'nbits' in spec:
+        nbits = max(1, min(spec['nbits'], int(np.log2(max(n_vectors, 2)))))
+        if nbits != spec['nbits']:
+            print(f"⚠️ nbits {spec['nbits']} -> {nbits} ({n_vectors} vetores)")
+            spec['nbits'] = nbits
+    return spec
+
+
+def new_index(spec, dimension, metric=None):
+    """Índice vazio (ainda não treinado) para a especificação (métrica L2 por padrão)"""
+    import faiss
+
+    if metric is None:
+        metric = faiss.METRIC_L2
+    kind = spec['type']
+    if kind == 'flat':
+        return faiss.IndexFlatL2(dimension) if metric == faiss.METRIC_L2 else faiss.IndexFlatIP(dimension)
+    if kind == 'hnsw':
+        index = faiss.IndexHNSWFlat(dimension, spec['M'], metric)
+        index.hnsw.efConstruction = spec['efConstruction']
+        return index
+
+    quantizer = faiss.IndexFlatL2(dimension) if metric == faiss.METRIC_L2 else faiss.IndexFlatIP(dimension)
+    if kind == 'ivf':
+        return faiss.IndexIVFFlat(quantizer, dimension, spec['nlist'], metric)
+    if dimension % spec['m']:
+        raise ValueError(f"m={spec['m']} precisa dividir a dimensão {dimension}")
+    return faiss.IndexIVFPQ(quantizer, dimension, spec['nlist'], spec['m'], spec['nbits'], metric)
+
+
+def train_index(index, vectors, spec, seed=42):
+    """Treina o índice (se precisar) numa amostra dos vetores"""
+    if index.is_trained:
+        return 0.0
+
+    # Amostra padrão: pontos suficientes por centróide do IVF e do PQ
+    centroids = max(spec['nlist'], 2 ** spec.get('nbits', 0))
+    sample_size = spec.get('train') or MIN_POINTS_PER_CENTROID * 4 * centroids
+    if sample_size < len(vectors):
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    else:
+        sample = vectors
+
+    start = time.perf_counter()
+    index.train(np.ascontiguousarray(sample, dtype=np.float32))
+    return time.perf_counter() - start
+
+
+def apply_search_params(index, spec):
+    """Parâmetros de busca que o FAISS não persiste no arquivo do índice"""
+    import faiss
+
+    if 'nprobe' in spec:
+        faiss.extract_index_ivf(index).nprobe = spec['nprobe']
+    if 'efSearch' in spec:
+        index.hnsw.efSearch = spec['efSearch']
+    return index
+
+
+def build_index(vectors, spec, metric=None, add=True, seed=42):
+    """Cria, treina e (opcionalmente) preenche o índice: retorna (índice, spec ajustada, segundos de treino)"""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    spec = fit_to_corpus(parse_index_spec(spec), len(vectors))
+    index = new_index(spec, vectors.shape[1], metric)
+    train_seconds = train_index(index, vectors, spec, seed)
+    apply_search_params(index, spec)
+    if add:
+        index.add(vectors)
+    return index, spec, train_seconds
+
+
+def index_nbytes(index):
+    """Tamanho do índice serializado"""
+    import faiss
+
+    return int(faiss.serialize_index(index).nbytes)
+
+
+def excluding_search_params(index, excluded):
+    """
+    Parâmetros de busca que pulam as linhas `excluded` dentro do próprio
+    FAISS (IDSelectorNot + IDSelectorBatch), com o nprobe/efSearch atual do
+    índice. Retorna (params, objetos que precisam continuar vivos durante
+    as buscas) ou None se esta versão do FAISS não filtra na busca.
+    """
+    import faiss
+
+    excluded = np.ascontiguousarray(excluded, dtype=np.int64)
+    try:
+        batch = faiss.IDSelectorBatch(len(excluded), faiss.swig_ptr(excluded))
+        selector = faiss.IDSelectorNot(batch)
+        if isinstance(index, faiss.IndexHNSW):
+            params = faiss.SearchParametersHNSW(sel=selector, efSearch=index.hnsw.efSearch)
+        elif isinstance(index, faiss.IndexIVF):
+            params = faiss.SearchParametersIVF(sel=selector, nprobe=index.nprobe)
+        else:
+            params = faiss.SearchParameters(sel=selector)
+    except (AttributeError, TypeError):
+        return None
+    return params, (excluded, batch, selector)
+
+
+def recall_at_k(index, vectors, k=10, n_queries=200, seed=42):
+    """
+    recall@k do índice contra a busca exata (flat) sobre os mesmos vetores,
+    com consultas amostradas do corpus. Retorna (recall, ms por consulta).
+    """
+    import faiss
+
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    queries = vectors[rng.choice(len(vectors), min(n_queries, len(vectors)), replace=False)]
+    k = min(k, len(vectors))
+
+    exact = faiss.IndexFlatL2(vectors.shape[1]) if index.metric_type == faiss.METRIC_L2 \
+        else faiss.IndexFlatIP(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+
+    start = time.perf_counter()
+    _, found = index.search(queries, k)
+    search_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+    hits = sum(len(set(row_truth) & set(row_found[row_found >= 0])) for row_truth, row_found in zip(truth, found))
+    return hits / (len(queries) * k), search_ms
+
+
+def save_spec(path, spec, stats=None):
+    with open(os.path.join(path, SPEC_FILE), 'w', encoding='utf-8') as file:
+        json.dump({'spec': spec, 'text': format_index_spec(spec), 'stats': stats or {}}, file, indent=2)
+
+
+def load_spec(path):
+    """Especificação gravada com o vector store (flat se não houver)"""
+    spec_path = os.path.join(path, SPEC_FILE)
+    if not os.path.exists(spec_path):
+        return parse_index_spec('flat')
+    with open(spec_path, 'r', encoding='utf-8') as file:
+        return json.load(file)['spec']
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ask() pergunta a pergunta vs ask_many() em lote
+"""
+
+import argparse
+import contextlib
+import io
+import random
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(__file__))
+
+from robust_chatbot import RobustCulinariaRAGBot
+
+BASE_QUESTIONS = [
+    "como fazer brigadeiro",
+    "receita de feijoada",
+    "o que é dendê",
+    "açaí",
+    "como preparar moqueca",
+    "como fazer farofa",
+    "o que é pequi",
+    "coxinha",
+    "mandioca",
+    "técnicas de cozimento"
+]
+
+def build_questions(bot, n, seed=42):
+    """Gera n perguntas misturando exemplos e termos do vocabulário"""
+    rng = random.Random(seed)
+    terms = sorted(bot.vectorizer.vocabulary_)
+    
+    questions = []
+    for i in range(n):
+        if i % 2 == 0:
+            questions.append(rng.choice(BASE_QUESTIONS))
+        else:
+            questions.append(" ".join(rng.sample(terms, 3)))
+    return questions
+
+def timed(func, *args):
+    """Executa func silenciando prints e retorna (resultado, segundos)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+    return result, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de busca em lote")
+    parser.add_argument('--queries', type=int, default=2000, help="número de perguntas")
+    args = parser.parse_args()
+    
+    bot = RobustCulinariaRAGBot(cache_size=0)  # Mede a busca, não o cache
+    with contextlib.redirect_stdout(io.StringIO()):
+        if not bot.setup():
+            print("❌ Falha no setup")
+            return
+    
+    questions = build_questions(bot, args.queries)
+    
+    loop_answers, loop_time = timed(lambda qs: [bot.ask(q) for q in qs], questions)
+    batch_answers, batch_time = timed(bot.ask_many, questions)
+    
+    same = sum(a == b for a, b in zip(loop_answers, batch_answers))
+    
+    print(f"📊 {len(questions)} perguntas, matriz {bot.tfidf_matrix.shape}")
+    print(f"🐢 ask() em loop: {len(questions) / loop_time:10.1f} perguntas/s ({loop_time:.3f}s)")
+    print(f"🚀 ask_many():    {len(questions) / batch_time:10.1f} perguntas/s ({batch_time:.3f}s)")
+    print(f"⚡ Speedup: {loop_time / batch_time:.1f}x")
+    print(f"✅ Respostas idênticas: {same}/{len(questions)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Benchmark: construção do índice TF-IDF com 1..N processos
+
+Compara o fit sequencial do TfidfVectorizer com o hashing paralelo
+(parallel_build) num corpus sintético e imprime a curva de speedup.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(__file__))
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from parallel_build import parallel_fit_transform
+from robust_chatbot import TFIDF_PARAMS
+from synthetic_corpus import generate_texts
+
+def main():
+    parser = argparse.ArgumentParser(description="Curva de speedup da construção paralela")
+    parser.add_argument('--sections', type=int, default=50000, help="chunks no corpus sintético")
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    
+    print(f"📚 Gerando {args.sections} chunks sintéticos...")
+    texts = generate_texts(args.sections)
+    
+    start = time.perf_counter()
+    TfidfVectorizer(**TFIDF_PARAMS).fit_transform(texts)
+    fit_time = time.perf_counter() - start
+    print(f"🐢 TfidfVectorizer.fit_transform: {fit_time:.2f}s")
+    
+    workers = 1
+    baseline = None
+    print(f"\n{'processos':>9} | {'tempo (s)':>9} | {'speedup':>7} | {'vs fit':>7}")
+    while workers <= args.max_workers:
+        start = time.perf_counter()
+        parallel_fit_transform(texts, workers)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>9} | {elapsed:>9.2f} | {baseline / elapsed:>6.2f}x | {fit_time / elapsed:>6.2f}x")
+        workers *= 2
+
+if __name__ == "__main__":
+    main()
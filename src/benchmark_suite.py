@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Suíte de benchmarks em corpus sintético (1K a 1M chunks)
+
+Para cada tamanho gera um corpus no formato de data/texts
+(synthetic_corpus) e mede, cada alvo num processo novo:
+- tempo de setup() (ou de montagem do FAISS)
+- pico de RSS
+- latência de ask() (p50/p95/p99) e vazão
+
+O resultado vai para um JSON estável (chaves ordenadas) que pode ser
+comparado entre versões com --compare.
+
+Uso:
+    python src/benchmark_suite.py --sizes 1000,10000,100000
+    python src/benchmark_suite.py --compare antes.json depois.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(__file__))
+
+from memory_usage import peak_rss_mb
+from synthetic_corpus import INGREDIENTES, PRATOS, TECNICAS, VARIANTES, write_corpus
+
+RESULTS_FILE = "benchmark_results.json"
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_TIMEOUT = 3600  # Segundos por alvo antes de dar o processo por travado
+POLL_SECONDS = 1.0  # Intervalo de verificação do processo filho
+
+# Alvo -> configuração; "snapshot" reaproveita o índice salvo por outro alvo
+TARGETS = {
+    'tfidf': {'kind': 'robust', 'bot': {'engine': 'tfidf'}, 'snapshot': 'tfidf'},
+    'tfidf-warm': {'kind': 'robust', 'bot': {'engine': 'tfidf'}, 'snapshot': 'tfidf'},
+    'bm25': {'kind': 'robust', 'bot': {'engine': 'bm25'}, 'snapshot': None},
+    'parallel': {'kind': 'robust', 'bot': {'build_mode': 'parallel'}, 'snapshot': None},
+    'faiss': {'kind': 'faiss'},
+    'faiss-ivf': {'kind': 'faiss', 'index': 'ivf:nlist=256,nprobe=16'},
+    'faiss-hnsw': {'kind': 'faiss', 'index': 'hnsw:M=32,efSearch=64'},
+    'faiss-ivfpq': {'kind': 'faiss', 'index': 'ivfpq:nlist=256,m=16,nbits=8,nprobe=16'}
+}
+
+
+def build_questions(n, seed=42):
+    """Perguntas no estilo dos exemplos do app, com os termos do corpus sintético"""
+    rng = random.Random(seed)
+    templates = [
+        lambda: f"como fazer {rng.choice(PRATOS)}",
+        lambda: f"receita de {rng.choice(PRATOS)} {rng.choice(VARIANTES)}",
+        lambda: f"o que é {rng.choice(INGREDIENTES)}",
+        lambda: f"como usar {rng.choice(INGREDIENTES)} no {rng.choice(PRATOS)}",
+        lambda: f"técnica de {rng.choice(TECNICAS)}"
+    ]
+    return [rng.choice(templates)() for _ in range(n)]
+
+
+def latency_stats(latencies):
+    """Percentis (ms) e vazão de uma lista de latências em segundos"""
+    ordered = sorted(latencies)
+    total = sum(ordered)
+
+    def pct(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return {
+        'queries': len(ordered),
+        'mean_ms': round(total / len(ordered) * 1000, 4),
+        'p50_ms': round(pct(0.50), 4),
+        'p95_ms': round(pct(0.95), 4),
+        'p99_ms': round(pct(0.99), 4),
+        'throughput_qps': round(len(ordered) / total, 2) if total else None
+    }
+
+
+def run_robust(config, corpus_dir, snapshot_dir, questions):
+    from robust_chatbot import RobustCulinariaRAGBot
+
+    bot = RobustCulinariaRAGBot(snapshot_dir=snapshot_dir, texts_dir=corpus_dir, cache_size=0,
+                                coalesce=False, **config['bot'])
+
+    start = time.perf_counter()
+    ok = bot.setup()
+    setup_time = time.perf_counter() - start
+    if not ok:
+        raise RuntimeError("setup() falhou")
+    setup_rss = peak_rss_mb()
+
+    latencies = []
+    for question in questions:
+        start = time.perf_counter()
+        bot.ask(question)
+        latencies.append(time.perf_counter() - start)
+
+    return {
+        'documents': len(bot.documents),
+        'setup_seconds': round(setup_time, 4),
+        'setup_peak_rss_mb': round(setup_rss, 1),
+        'ask': latency_stats(latencies)
+    }
+
+
+def run_faiss(config, corpus_dir, snapshot_dir, questions):
+    from ann_index import format_index_spec
+    from corpus_loader import iter_text_files
+    from create_vectorstore import build_faiss, create_embeddings, load_documents, split_documents
+
+    start = time.perf_counter()
+    chunks = split_documents(load_documents(list(iter_text_files(corpus_dir))))
+    # Sem cache persistente: cada rodada mede o embedding, não acertos do cache
+    embeddings = create_embeddings(cache_dir=None)
+    vectorstore, spec, index_stats = build_faiss(chunks, embeddings, config.get('index', 'flat'))
+    setup_time = time.perf_counter() - start
+    setup_rss = peak_rss_mb()
+
+    latencies = []
+    for question in questions:
+        start = time.perf_counter()
+        vectorstore.similarity_search(question, k=3)
+        latencies.append(time.perf_counter() - start)
+
+    return {
+        'documents': len(chunks),
+        'embeddings': type(embeddings).__name__,
+        'index': format_index_spec(spec),
+        'index_bytes': index_stats['index_bytes'],
+        'recall@10': index_stats['recall@10'],
+        'setup_seconds': round(setup_time, 4),
+        'setup_peak_rss_mb': round(setup_rss, 1),
+        'ask': latency_stats(latencies)
+    }
+
+
+RUNNERS = {'robust': run_robust, 'faiss': run_faiss}
+
+
+def measure(target, corpus_dir, snapshot_dir, questions, queue):
+    """Processo filho: mede um alvo e devolve o resultado pela fila"""
+    config = TARGETS[target]
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = RUNNERS[config['kind']](config, corpus_dir, snapshot_dir, questions)
+        result['peak_rss_mb'] = round(peak_rss_mb(), 1)
+    except Exception as e:
+        result = {'error': f"{type(e).__name__}: {e}"}
+    queue.put(result)
+
+
+def run_target(target, corpus_dir, snapshot_dir, questions, timeout=DEFAULT_TIMEOUT):
+    """
+    Roda o alvo num processo novo (spawn), para o pico de RSS ser só dele.
+    Se o processo morrer sem resultado (ex.: OOM killer) ou passar de
+    `timeout` segundos, o alvo volta como erro em vez de travar a suíte.
+    """
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=measure, args=(target, corpus_dir, snapshot_dir, questions, results))
+    process.start()
+    deadline = time.monotonic() + timeout if timeout else None
+
+    result = None
+    while result is None:
+        try:
+            result = results.get(timeout=POLL_SECONDS)
+        except queue.Empty:
+            if not process.is_alive():
+                # O resultado pode ter chegado logo antes da saída
+                try:
+                    result = results.get(timeout=POLL_SECONDS)
+                except queue.Empty:
+                    result = {'error': f"processo terminou sem resultado (exit code {process.exitcode})"}
+            elif deadline is not None and time.monotonic() > deadline:
+                process.terminate()
+                result = {'error': f"tempo limite de {timeout:.0f}s excedido"}
+
+    process.join(timeout=30)
+    if process.is_alive():
+        process.kill()
+        process.join()
+    return result
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def run_suite(sizes, targets, n_queries, work_dir=None, keep_corpus=False, sections_per_file=1000,
+              timeout=DEFAULT_TIMEOUT):
+    questions = build_questions(n_queries)
+    work_dir = work_dir or tempfile.mkdtemp(prefix="rag_benchmark_")
+    results = []
+
+    try:
+        for size in sizes:
+            corpus_dir = os.path.join(work_dir, f"corpus_{size}")
+            if not os.path.isdir(corpus_dir):
+                print(f"📚 Gerando corpus sintético: {size} chunks...")
+                write_corpus(corpus_dir, size, sections_per_file)
+
+            for target in targets:
+                snapshot = TARGETS[target].get('snapshot')
+                snapshot_dir = os.path.join(work_dir, f"index_{size}_{snapshot}") if snapshot else None
+
+                print(f"⏱️ {target} @ {size} chunks...")
+                result = run_target(target, corpus_dir, snapshot_dir, questions, timeout)
+                result.update({'target': target, 'chunks': size})
+                results.append(result)
+
+                if 'error' in result:
+                    print(f"   ❌ {result['error']}")
+                else:
+                    print(f"   ✅ setup {result['setup_seconds']:.2f}s | "
+                          f"RSS {result['peak_rss_mb']:.0f} MB | "
+                          f"p50 {result['ask']['p50_ms']:.2f} ms | "
+                          f"p99 {result['ask']['p99_ms']:.2f} ms | "
+                          f"{result['ask']['throughput_qps']:.0f} q/s")
+    finally:
+        if not keep_corpus:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        'environment': environment(),
+        'queries': n_queries,
+        'results': results
+    }
+
+
+# Métricas comparadas por --compare: (caminho, maior é melhor)
+COMPARED = [
+    (('setup_seconds',), False),
+    (('peak_rss_mb',), False),
+    (('ask', 'p50_ms'), False),
+    (('ask', 'p99_ms'), False),
+    (('ask', 'throughput_qps'), True)
+]
+
+
+def compare(old, new):
+    """Imprime a variação de cada métrica entre dois arquivos de resultado"""
+    def key(result):
+        return result['target'], result['chunks']
+
+    before = {key(result): result for result in old['results'] if 'error' not in result}
+
+    print(f"{'alvo':>12} {'chunks':>8} {'métrica':>16} {'antes':>10} {'depois':>10} {'variação':>9}")
+    for result in new['results']:
+        previous = before.get(key(result))
+        if previous is None or 'error' in result:
+            continue
+        for path, higher_is_better in COMPARED:
+            a, b = previous, result
+            for field in path:
+                a, b = a.get(field), b.get(field)
+            if not a or b is None:
+                continue
+            change = (b - a) / a
+            better = change > 0 if higher_is_better else change < 0
+            mark = "✅" if better else ("⚠️" if abs(change) > 0.05 else "")
+            print(f"{result['target']:>12} {result['chunks']:>8} {'.'.join(path):>16} "
+                  f"{a:>10.2f} {b:>10.2f} {change:>+8.1%} {mark}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de setup, memória e latência")
+    parser.add_argument('--sizes', default=",".join(map(str, DEFAULT_SIZES)),
+                        help="tamanhos do corpus em chunks, separados por vírgula (até 1000000)")
+    parser.add_argument('--targets', default="tfidf,tfidf-warm,bm25,parallel,faiss",
+                        help=f"alvos medidos ({', '.join(TARGETS)})")
+    parser.add_argument('--queries', type=int, default=500, help="perguntas por alvo")
+    parser.add_argument('--output', default=RESULTS_FILE, help="arquivo JSON de saída")
+    parser.add_argument('--work-dir', default=None, help="onde gerar os corpora (padrão: temporário)")
+    parser.add_argument('--keep-corpus', action='store_true', help="não apaga os corpora gerados")
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help="segundos por alvo antes de marcá-lo como falho (0 desativa)")
+    parser.add_argument('--compare', nargs=2, metavar=('ANTES', 'DEPOIS'),
+                        help="compara dois arquivos de resultado em vez de medir")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], encoding='utf-8') as old, open(args.compare[1], encoding='utf-8') as new:
+            compare(json.load(old), json.load(new))
+        return
+
+    targets = [target.strip() for target in args.targets.split(",") if target.strip()]
+    unknown = [target for target in targets if target not in TARGETS]
+    if unknown:
+        parser.error(f"alvos desconhecidos: {', '.join(unknown)}")
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    report = run_suite(sizes, targets, args.queries, args.work_dir, args.keep_corpus, timeout=args.timeout)
+
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2, sort_keys=True)
+    print(f"💾 Resultados em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Motor de busca BM25 com índice invertido (term-at-a-time)
+
+Cada termo aponta para uma fatia contígua de arrays NumPy compactos
+(doc ids int32 + frequências float32), então o custo de uma consulta
+depende apenas das postings tocadas, não do total de documentos. O peso
+BM25 é calculado na consulta, só para essas postings, a partir do IDF do
+termo e do tamanho de cada documento: assim extend() anexa documentos
+novos sem refazer o índice.
+"""
+
+import heapq
+import json
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+DEFAULT_TOKEN_PATTERN = r'[a-záàâãéêíóôõúçA-Z]+'
+
+
+class BM25Index:
+    def __init__(self, k1=1.5, b=0.75, token_pattern=DEFAULT_TOKEN_PATTERN):
+        self.k1 = k1
+        self.b = b
+        self.token_pattern = token_pattern
+        self._token_re = re.compile(token_pattern)
+        self.vocabulary = {}  # termo -> id
+        self.term_offsets = np.zeros(1, dtype=np.int64)  # id -> início da posting list
+        self.doc_ids = np.zeros(0, dtype=np.int32)
+        self.tfs = np.zeros(0, dtype=np.float32)  # Frequência do termo em cada posting
+        self.doc_lengths = np.zeros(0, dtype=np.float32)  # Tokens por documento
+        self.avgdl = 1.0
+        self.n_docs = 0
+
+    def tokenize(self, text):
+        """Quebra o texto nos mesmos tokens usados pelo TF-IDF"""
+        return self._token_re.findall(text.lower())
+
+    def _count(self, texts, first_doc=0):
+        """Termo -> [(doc_id, tf)] e tamanho de cada documento"""
+        term_docs = {}
+        doc_lengths = []
+        for doc_id, text in enumerate(texts, first_doc):
+            counts = Counter(self.tokenize(text))
+            doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                term_docs.setdefault(term, []).append((doc_id, tf))
+        return term_docs, np.asarray(doc_lengths, dtype=np.float32)
+
+    def fit(self, texts):
+        """Constrói as posting lists a partir dos textos"""
+        term_docs, lengths = self._count(texts)
+
+        self.n_docs = len(lengths)
+        self.doc_lengths = lengths
+        self.avgdl = float(lengths.mean()) if self.n_docs and lengths.mean() > 0 else 1.0
+
+        self.vocabulary = {}
+        offsets = [0]
+        all_docs = []
+        all_tfs = []
+
+        for term_id, term in enumerate(sorted(term_docs)):
+            postings = term_docs[term]
+            self.vocabulary[term] = term_id
+            all_docs.append(np.fromiter((doc for doc, _ in postings), dtype=np.int32, count=len(postings)))
+            all_tfs.append(np.fromiter((tf for _, tf in postings), dtype=np.float32, count=len(postings)))
+            offsets.append(offsets[-1] + len(postings))
+
+        self.term_offsets = np.asarray(offsets, dtype=np.int64)
+        self.doc_ids = np.concatenate(all_docs) if all_docs else np.zeros(0, dtype=np.int32)
+        self.tfs = np.concatenate(all_tfs) if all_tfs else np.zeros(0, dtype=np.float32)
+        return self
+
+    def extend(self, texts):
+        """
+        Nova versão com os textos anexados como documentos n_docs, n_docs + 1...
+
+        Só os textos novos são tokenizados: as postings deles entram no fim
+        da lista de cada termo (np.insert) e n_docs, df e o tamanho médio
+        dos documentos mudam junto, então o IDF já sai atualizado. Linhas
+        removidas continuam nas estatísticas até o próximo fit (a busca as
+        ignora pela máscara exclude).
+        """
+        term_docs, lengths = self._count(texts, first_doc=self.n_docs)
+        extended = BM25Index(self.k1, self.b, self.token_pattern)
+        extended.vocabulary = dict(self.vocabulary)
+        for term in sorted(term_docs):
+            extended.vocabulary.setdefault(term, len(extended.vocabulary))
+
+        # Postings novas ordenadas por termo (e por documento dentro do termo)
+        term_ids = []
+        docs = []
+        tfs = []
+        for term, postings in term_docs.items():
+            term_ids.extend([extended.vocabulary[term]] * len(postings))
+            docs.extend(doc for doc, _ in postings)
+            tfs.extend(tf for _, tf in postings)
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(term_ids, kind='stable')
+        term_ids = term_ids[order]
+
+        # Termo antigo: insere no fim da lista dele; termo novo: no fim dos arrays
+        n_terms = len(self.term_offsets) - 1
+        positions = np.where(term_ids < n_terms, self.term_offsets[np.minimum(term_ids, n_terms) + 1],
+                             len(self.doc_ids))
+        extended.doc_ids = np.insert(self.doc_ids, positions, np.asarray(docs, dtype=np.int32)[order])
+        extended.tfs = np.insert(self.tfs, positions, np.asarray(tfs, dtype=np.float32)[order])
+
+        counts = np.diff(self.term_offsets)
+        counts = np.concatenate([counts, np.zeros(len(extended.vocabulary) - n_terms, dtype=counts.dtype)])
+        counts += np.bincount(term_ids, minlength=len(counts))
+        extended.term_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+        extended.n_docs = self.n_docs + len(lengths)
+        extended.doc_lengths = np.concatenate([self.doc_lengths, lengths])
+        total = self.avgdl * self.n_docs + float(lengths.sum())
+        extended.avgdl = total / extended.n_docs if extended.n_docs and total > 0 else 1.0
+        return extended
+
+    def _weights(self, term_id):
+        """(doc ids, pesos BM25) da posting list de um termo"""
+        start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+        docs = self.doc_ids[start:end]
+        tfs = self.tfs[start:end]
+
+        df = end - start
+        idf = np.log(1.0 + (self.n_docs - df + 0.5) / (df + 0.5))
+        length_norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[docs] / self.avgdl)
+        return docs, (idf * tfs * (self.k1 + 1) / (tfs + length_norm)).astype(np.float32)
+
+    def search(self, query, k=3, exclude=None):
+        """
+        Retorna lista de (doc_id, score) com os k melhores documentos.
+
+        exclude é uma máscara booleana opcional de documentos ignorados
+        (ex.: linhas removidas na indexação incremental).
+        """
+        term_ids = {self.vocabulary[t] for t in self.tokenize(query) if t in self.vocabulary}
+        if not term_ids:
+            return []
+
+        # Term-at-a-time: junta as postings dos termos da consulta
+        docs = []
+        weights = []
+        for term_id in term_ids:
+            term_docs, term_weights = self._weights(term_id)
+            docs.append(term_docs)
+            weights.append(term_weights)
+
+        docs = np.concatenate(docs)
+        weights = np.concatenate(weights)
+
+        # Acumula scores somente nos documentos tocados
+        touched, inverse = np.unique(docs, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights)
+
+        if exclude is not None:
+            keep = ~exclude[touched]
+            touched, scores = touched[keep], scores[keep]
+
+        top = heapq.nlargest(k, range(len(touched)), key=scores.__getitem__)
+        return [(int(touched[i]), float(scores[i])) for i in top]
+
+    def save(self, path):
+        """Grava os arrays das posting lists em .npy"""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "term_offsets.npy"), self.term_offsets)
+        np.save(os.path.join(path, "doc_ids.npy"), self.doc_ids)
+        np.save(os.path.join(path, "tfs.npy"), self.tfs)
+        np.save(os.path.join(path, "doc_lengths.npy"), self.doc_lengths)
+
+        terms = [None] * len(self.vocabulary)
+        for term, term_id in self.vocabulary.items():
+            terms[term_id] = term
+
+        with open(os.path.join(path, "bm25.json"), "w", encoding="utf-8") as file:
+            json.dump({
+                "k1": self.k1,
+                "b": self.b,
+                "token_pattern": self.token_pattern,
+                "n_docs": self.n_docs,
+                "avgdl": self.avgdl,
+                "terms": terms
+            }, file, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """Carrega o índice salvo por save() (arrays via mmap)"""
+        with open(os.path.join(path, "bm25.json"), "r", encoding="utf-8") as file:
+            meta = json.load(file)
+
+        index = cls(k1=meta["k1"], b=meta["b"], token_pattern=meta["token_pattern"])
+        index.n_docs = meta["n_docs"]
+        index.avgdl = meta["avgdl"]
+        index.vocabulary = {term: term_id for term_id, term in enumerate(meta["terms"])}
+
+        mmap_mode = "r" if mmap else None
+        index.term_offsets = np.load(os.path.join(path, "term_offsets.npy"), mmap_mode=mmap_mode)
+        index.doc_ids = np.load(os.path.join(path, "doc_ids.npy"), mmap_mode=mmap_mode)
+        index.tfs = np.load(os.path.join(path, "tfs.npy"), mmap_mode=mmap_mode)
+        index.doc_lengths = np.load(os.path.join(path, "doc_lengths.npy"), mmap_mode=mmap_mode)
+        return index
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Ingestão em streaming do corpus de textos
+
+Percorre a árvore de diretórios, lê cada arquivo em blocos de tamanho
+fixo e produz os chunks (parágrafos dentro das seções ===) à medida que
+os separadores aparecem, então o pico de memória depende do tamanho do
+buffer e não do tamanho dos arquivos.
+"""
+
+import hashlib
+import os
+
+TEXTS_DIR = "data/texts"
+DEFAULT_BUFFER_SIZE = 1 << 20  # Caracteres lidos por bloco
+MIN_CHUNK_CHARS = 100  # Chunks menores são descartados
+
+
+def iter_text_files(root=TEXTS_DIR, extensions=(".txt",)):
+    """Percorre o diretório (recursivamente, em ordem estável) e gera os arquivos de texto"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.endswith(extensions):
+                yield os.path.join(dirpath, name)
+
+
+def file_hash(file_path):
+    """Hash SHA-256 do conteúdo de um arquivo (lido em blocos)"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def iter_blocks(file_path, buffer_size=DEFAULT_BUFFER_SIZE):
+    """Lê o arquivo em blocos de até buffer_size caracteres"""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        while True:
+            block = file.read(buffer_size)
+            if not block:
+                break
+            yield block
+
+
+def iter_split(blocks, separator, max_chars=DEFAULT_BUFFER_SIZE):
+    """
+    Equivalente em streaming a ''.join(blocks).split(separator).
+
+    Um trecho sem separador maior que max_chars é cortado, para que o
+    buffer pendente nunca cresça além desse limite.
+    """
+    pending = ''
+    for block in blocks:
+        pending += block
+        parts = pending.split(separator)
+        pending = parts.pop()
+        yield from parts
+
+        # Guarda o fim do buffer: pode ser o começo de um separador
+        while len(pending) > max_chars + len(separator):
+            yield pending[:max_chars]
+            pending = pending[max_chars:]
+    yield pending
+
+
+def iter_leaf_spans(text, min_chars=MIN_CHUNK_CHARS, separator='\n\n'):
+    """
+    Divide o texto de uma seção em folhas (start, end) nos parágrafos.
+
+    Parágrafos curtos são juntados ao seguinte (e a sobra final à última
+    folha), então as folhas cobrem a seção inteira e nenhuma tem menos
+    de min_chars caracteres, a não ser a seção toda.
+    """
+    spans = []
+    start = None
+    position = 0
+
+    while position <= len(text):
+        end = text.find(separator, position)
+        end = len(text) if end < 0 else end
+        if start is None:
+            start = position
+        if len(text[start:end].strip()) > min_chars:
+            spans.append((start, end))
+            start = None
+        position = end + len(separator)
+
+    if start is not None and text[start:].strip():
+        if spans:
+            spans[-1] = (spans[-1][0], len(text))
+        else:
+            spans.append((start, len(text)))
+    return spans
+
+
+def iter_file_chunks(file_path, buffer_size=DEFAULT_BUFFER_SIZE, max_chunk_chars=DEFAULT_BUFFER_SIZE,
+                     min_chars=MIN_CHUNK_CHARS):
+    """
+    Gera os documentos de um arquivo em dois níveis, numa só passada:
+    cada seção === é dividida em folhas (parágrafos) e só as folhas
+    viram documentos. Cada folha leva a seção-mãe (id e texto), sua
+    posição dentro dela e onde começa no texto da seção.
+    """
+    blocks = iter_blocks(file_path, buffer_size)
+    leaf = 0
+
+    for i, section in enumerate(iter_split(blocks, '===', max_chunk_chars)):
+        section = section.strip()
+        if len(section) <= min_chars:
+            continue
+        section_id = f"{file_path}_section_{i}"
+
+        for position, (start, end) in enumerate(iter_leaf_spans(section, min_chars)):
+            chunk = section[start:end]
+            content = chunk.strip()
+            yield {
+                'content': content,
+                'source': file_path,
+                'type': 'paragraph',
+                'id': f"{file_path}_para_{leaf}",
+                'parent': section_id,
+                'parent_content': section,
+                'position': position,
+                'start': start + len(chunk) - len(chunk.lstrip())
+            }
+            leaf += 1
+
+
+def iter_windows(file_path, buffer_size=DEFAULT_BUFFER_SIZE):
+    """Agrupa parágrafos consecutivos em janelas de até buffer_size caracteres"""
+    window = []
+    size = 0
+
+    for para in iter_split(iter_blocks(file_path, buffer_size), '\n\n', buffer_size):
+        if window and size + len(para) > buffer_size:
+            yield '\n\n'.join(window)
+            window, size = [], 0
+        window.append(para)
+        size += len(para) + 2
+
+    if window:
+        text = '\n\n'.join(window)
+        if text.strip():
+            yield text
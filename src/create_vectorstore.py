@@ -4,50 +4,79 @@ Script para criar o vector store com embeddings dos textos sobre culinária bras
 """
 
 import os
-import glob
-import sys
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import TextLoader
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain_core.documents import Document
+import json
+import time
+import argparse
+import importlib.util
+import numpy as np
 
-def load_documents():
-    """Carrega todos os documentos de texto da pasta data/texts/"""
-    
-    print("📚 Carregando documentos...")
-    
-    documents = []
-    text_files = glob.glob("data/texts/*.txt")
+# LangChain, faiss, sentence-transformers e onnxruntime são importados só nas
+# funções que os usam: --help e a verificação incremental sem mudanças não pagam
+# o custo de importação (veja startup_profile.py)
+from ann_index import (apply_search_params, build_index, format_index_spec, index_nbytes, load_spec,
+                       parse_index_spec, recall_at_k, save_spec)
+from corpus_loader import DEFAULT_BUFFER_SIZE, file_hash, iter_text_files, iter_windows
+from dense_store import DenseStore
+from embedding_cache import EMBEDDING_CACHE_PATH, EmbeddingCache
+from embedding_pipeline import (DEFAULT_BATCH_SIZE, DEFAULT_WORKERS, EmbeddingPipeline, compare_configs,
+                                parse_embedding_config)
+from hashing_embeddings import DEFAULT_DIMENSION as HASHING_DIMENSION
+from hashing_embeddings import HashingEmbedder
+from memory_usage import peak_rss_mb
+from onnx_embeddings import BACKENDS as ONNX_BACKENDS
+
+VECTORSTORE_PATH = "data/vectorstore"
+EMBEDDING_MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+FALLBACK_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+MANIFEST_FILE = "files.json"  # Arquivo -> hash e ids dos chunks no FAISS
+
+# torch/onnx/onnx-int8: modelo sentence-transformers; hashing: sem modelo (hashing_embeddings.py)
+EMBEDDING_BACKENDS = ONNX_BACKENDS + ('hashing',)
+
+def list_text_files():
+    """Lista os arquivos .txt de data/texts/ (incluindo subpastas)"""
+    text_files = list(iter_text_files())
     
     if not text_files:
         print("❌ Nenhum arquivo .txt encontrado em data/texts/")
         print("💡 Adicione alguns arquivos .txt nesta pasta primeiro")
-        return []
     
+    return text_files
+
+def load_documents(text_files=None, buffer_size=DEFAULT_BUFFER_SIZE):
+    """
+    Carrega os documentos de texto em streaming: cada arquivo vira
+    janelas de parágrafos de até buffer_size caracteres, nunca o
+    arquivo inteiro na memória.
+    """
+    from langchain_core.documents import Document
+    
+    print("📚 Carregando documentos...")
+    
+    if text_files is None:
+        text_files = list_text_files()
+    
+    count = 0
     for file_path in text_files:
         try:
             print(f"📄 Carregando: {file_path}")
             
-            # Lê o arquivo com encoding UTF-8
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-                
-            # Cria documento com metadata
-            doc = Document(
-                page_content=content,
-                metadata={"source": file_path, "filename": os.path.basename(file_path)}
-            )
-            documents.append(doc)
+            for window in iter_windows(file_path, buffer_size):
+                count += 1
+                # Cria documento com metadata
+                yield Document(
+                    page_content=window,
+                    metadata={"source": file_path, "filename": os.path.basename(file_path)}
+                )
             
         except Exception as e:
             print(f"❌ Erro ao carregar {file_path}: {e}")
     
-    print(f"✅ {len(documents)} documentos carregados")
-    return documents
+    print(f"✅ {count} documentos carregados")
 
 def split_documents(documents):
     """Divide os documentos em chunks menores"""
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
     
     print("\n✂️ Dividindo documentos em chunks...")
     
@@ -59,8 +88,10 @@ def split_documents(documents):
         separators=["\n\n", "\n", "===", "INGREDIENTES:", "MODO DE PREPARO:", ". ", ", "]
     )
     
-    # Divide todos os documentos
-    chunks = text_splitter.split_documents(documents)
+    # Divide documento a documento, à medida que chegam do loader
+    chunks = []
+    for document in documents:
+        chunks.extend(text_splitter.split_documents([document]))
     
     print(f"✅ {len(chunks)} chunks criados")
     
@@ -72,42 +103,96 @@ def split_documents(documents):
     
     return chunks
 
-def create_embeddings():
-    """Cria modelo de embeddings"""
+def create_hashing_embeddings(dimension=HASHING_DIMENSION):
+    """
+    Embeddings por feature hashing: sem modelo nem treino, rápidos e iguais
+    em qualquer processo (um índice salvo pode ser consultado depois)
+    """
+    from langchain.embeddings.base import Embeddings
+    
+    class HashingEmbeddings(Embeddings):
+        def __init__(self):
+            self.model = HashingEmbedder(dimension)
+        
+        def embed_documents(self, texts):
+            """Embeds a list of documents: array float32 (n, dimensão)"""
+            return self.model.encode(texts)
+        
+        def embed_query(self, text):
+            """Embeds a query"""
+            return self.model.encode([text])[0].tolist()
+    
+    embeddings = HashingEmbeddings()
+    print(f"✅ Hashing Embeddings configurado ({dimension} dimensões)")
+    return embeddings
+
+def create_embeddings(cache_dir=EMBEDDING_CACHE_PATH, batch_size=DEFAULT_BATCH_SIZE, workers=DEFAULT_WORKERS,
+                      backend='torch', threads=None):
+    """
+    Cria modelo de embeddings (com cache em disco dos vetores, salvo
+    cache_dir=None, e codificação em lotes de batch_size em `workers` processos).
+    backend: 'torch' (SentenceTransformer), 'onnx'/'onnx-int8' (ONNX Runtime
+    com `threads` threads intra-op, veja onnx_embeddings.py) ou 'hashing'
+    (sem modelo, também o último recurso se nenhum modelo carregar)
+    """
     
     print("\n🔍 Configurando modelo de embeddings...")
     
+    if backend == 'hashing':
+        return create_hashing_embeddings()
+    
     try:
-        # Primeiro tenta instalar e usar sentence-transformers
-        print("📦 Tentando instalar sentence-transformers...")
-        import subprocess
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "sentence-transformers", "--quiet"])
+        # Primeiro tenta sentence-transformers, se já estiver instalado (sem pip em tempo de execução)
+        required = "sentence_transformers" if backend == 'torch' else "onnxruntime"
+        if importlib.util.find_spec(required) is None:
+            raise ImportError(f"{required} não instalado (pip install {required.replace('_', '-')})")
         
-        from sentence_transformers import SentenceTransformer
         from langchain.embeddings.base import Embeddings
         
-        print("📦 Usando SentenceTransformer com wrapper LangChain...")
+        print(f"📦 Usando SentenceTransformer ({backend}) com wrapper LangChain...")
+        
+        def load_model(model_name):
+            if backend == 'torch':
+                from sentence_transformers import SentenceTransformer
+                return SentenceTransformer(model_name)
+            from onnx_embeddings import OnnxEncoder
+            return OnnxEncoder(model_name, quantize=backend == 'onnx-int8', threads=threads)
         
         class CustomSentenceTransformerEmbeddings(Embeddings):
-            def __init__(self, model_name):
+            def __init__(self, model_name, cache_dir=None, batch_size=DEFAULT_BATCH_SIZE, workers=DEFAULT_WORKERS):
                 try:
-                    self.model = SentenceTransformer(model_name)
+                    self.model = load_model(model_name)
                     print(f"✅ Modelo carregado: {model_name}")
                 except Exception as e:
                     print(f"❌ Erro ao carregar {model_name}: {e}")
                     print("📦 Tentando modelo mais simples...")
-                    self.model = SentenceTransformer('all-MiniLM-L6-v2')
-                    print("✅ Modelo alternativo carregado: all-MiniLM-L6-v2")
+                    model_name = FALLBACK_EMBEDDING_MODEL
+                    self.model = load_model(model_name)
+                    print(f"✅ Modelo alternativo carregado: {FALLBACK_EMBEDDING_MODEL}")
+                
+                if backend != 'torch' and workers > 1:
+                    # O ONNX Runtime paraleliza dentro da sessão (threads intra-op)
+                    print(f"⚠️ Backend {backend}: ignorando {workers} processos, use --onnx-threads")
+                    workers = 1
+                self.pipeline = EmbeddingPipeline(self.model, batch_size, workers)
+                
+                # Chave do cache: modelo efetivamente carregado (e backend, o int8 muda os vetores) + hash do texto
+                cache_name = model_name if backend == 'torch' else f"{model_name}@{backend}"
+                self.cache = EmbeddingCache(cache_name, cache_dir) if cache_dir else None
+                if self.cache is not None:
+                    print(f"💾 Cache de embeddings: {len(self.cache)} vetores em {self.cache.path}")
             
             def embed_documents(self, texts):
-                """Embeds a list of documents"""
-                return self.model.encode(texts).tolist()
+                """Embeds a list of documents: array float32 (n, dimensão), sem passar por listas"""
+                if self.cache is not None:
+                    return self.cache.embed(texts, self.pipeline)
+                return self.pipeline(texts)
             
             def embed_query(self, text):
                 """Embeds a query"""
                 return self.model.encode([text])[0].tolist()
         
-        embeddings = CustomSentenceTransformerEmbeddings("paraphrase-multilingual-MiniLM-L12-v2")
+        embeddings = CustomSentenceTransformerEmbeddings(EMBEDDING_MODEL, cache_dir, batch_size, workers)
         return embeddings
         
     except Exception as e:
@@ -118,7 +203,7 @@ def create_embeddings():
             from langchain_huggingface import HuggingFaceEmbeddings
             
             embeddings = HuggingFaceEmbeddings(
-                model_name="all-MiniLM-L6-v2",
+                model_name=FALLBACK_EMBEDDING_MODEL,
                 model_kwargs={'device': 'cpu'}
             )
             print("✅ HuggingFace Embeddings carregado")
@@ -126,100 +211,150 @@ def create_embeddings():
             
         except Exception as e2:
             print(f"❌ Erro com HuggingFace: {e2}")
-            print("💡 Usando solução TF-IDF customizada...")
-            
-            # TF-IDF Embeddings compatível com LangChain
-            try:
-                from sklearn.feature_extraction.text import TfidfVectorizer
-                from langchain.embeddings.base import Embeddings
-                import numpy as np
-                import sys
-                
-                class TfidfEmbeddings(Embeddings):
-                    def __init__(self):
-                        self.vectorizer = TfidfVectorizer(
-                            max_features=500, 
-                            stop_words='english',
-                            lowercase=True,
-                            ngram_range=(1, 2)
-                        )
-                        self.fitted = False
-                        self.all_texts = []
-                    
-                    def embed_documents(self, texts):
-                        """Embeds a list of documents"""
-                        if not self.fitted:
-                            # Primeira vez: treina o vectorizer
-                            self.all_texts = texts[:]
-                            vectors = self.vectorizer.fit_transform(texts)
-                            self.fitted = True
-                        else:
-                            # Adiciona novos textos ao conjunto
-                            self.all_texts.extend(texts)
-                            vectors = self.vectorizer.transform(texts)
-                        
-                        # Converte para lista de listas
-                        return vectors.toarray().tolist()
-                    
-                    def embed_query(self, text):
-                        """Embeds a single query"""
-                        if not self.fitted:
-                            # Se não foi treinado ainda, treina apenas com este texto
-                            self.vectorizer.fit([text])
-                            self.fitted = True
-                        
-                        vector = self.vectorizer.transform([text])
-                        return vector.toarray()[0].tolist()
-                
-                embeddings = TfidfEmbeddings()
-                print("✅ TF-IDF Embeddings configurado como fallback")
-                return embeddings
-                
-            except Exception as e3:
-                print(f"❌ Erro fatal com TF-IDF: {e3}")
-                
-                # Último recurso: embeddings dummy
-                from langchain.embeddings.base import Embeddings
-                import random
-                
-                class DummyEmbeddings(Embeddings):
-                    def __init__(self, dimension=384):
-                        self.dimension = dimension
-                    
-                    def embed_documents(self, texts):
-                        # Gera embeddings aleatórios mas consistentes
-                        embeddings = []
-                        for text in texts:
-                            # Usa hash do texto para embeddings consistentes
-                            random.seed(hash(text) % (2**32))
-                            embedding = [random.random() for _ in range(self.dimension)]
-                            embeddings.append(embedding)
-                        return embeddings
-                    
-                    def embed_query(self, text):
-                        random.seed(hash(text) % (2**32))
-                        return [random.random() for _ in range(self.dimension)]
-                
-                print("⚠️ Usando embeddings dummy (apenas para demonstração)")
-                return DummyEmbeddings()
+            print("💡 Usando embeddings por feature hashing (sem modelo)...")
+            return create_hashing_embeddings()
+
+def chunk_ids(chunks, hashes):
+    """Gera ids estáveis (arquivo + hash + posição) para os chunks"""
+    ids = []
+    positions = {}
+    for chunk in chunks:
+        source = chunk.metadata["source"]
+        position = positions.get(source, 0)
+        positions[source] = position + 1
+        ids.append(f"{source}:{hashes[source][:12]}:{position}")
+    return ids
+
+def write_manifest(chunks, ids, hashes, vectorstore_path=VECTORSTORE_PATH):
+    """Grava arquivo -> {hash, ids} para a atualização incremental"""
+    manifest = {path: {"hash": digest, "ids": []} for path, digest in hashes.items()}
+    for chunk, chunk_id in zip(chunks, ids):
+        manifest[chunk.metadata["source"]]["ids"].append(chunk_id)
+    
+    with open(os.path.join(vectorstore_path, MANIFEST_FILE), 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=2)
+    return manifest
+
+def embed_chunks(chunks, embeddings):
+    """Vetores (float32) dos chunks, na ordem dos chunks"""
+    vectors = embeddings.embed_documents([chunk.page_content for chunk in chunks])
+    return np.asarray(vectors, dtype=np.float32)
+
+def report_embeddings(embeddings, n_chunks, seconds):
+    """Vazão da etapa de embeddings e aproveitamento do cache"""
+    print(f"⚡ Embeddings: {n_chunks} chunks em {seconds:.2f}s ({n_chunks / max(seconds, 1e-9):.1f} chunks/s)")
+    pipeline = getattr(embeddings, 'pipeline', None)
+    if pipeline is not None and pipeline.texts:
+        stats = pipeline.stats()
+        print(f"⚡ Modelo ({stats['config']}): {stats['texts']} chunks calculados a {stats['chunks_per_second']:.1f} chunks/s")
+    cache = getattr(embeddings, 'cache', None)
+    if cache is not None:
+        stats = cache.stats()
+        print(f"💾 Cache: {stats['hits']} reaproveitados, {stats['misses']} calculados "
+              f"({stats['vectors']} vetores, {stats['bytes'] / 1e6:.1f} MB)")
+
+def build_faiss(chunks, embeddings, index_spec="flat", ids=None, recall_k=10):
+    """
+    Monta o DenseStore (índice FAISS da especificação: flat, ivf, hnsw,
+    ivfpq): retorna (vectorstore, spec ajustada ao corpus, estatísticas)
+    """
+    start = time.perf_counter()
+    vectors = embed_chunks(chunks, embeddings)
+    embed_seconds = time.perf_counter() - start
+    report_embeddings(embeddings, len(chunks), embed_seconds)
+    
+    start = time.perf_counter()
+    index, spec, train_seconds = build_index(vectors, index_spec)
+    vectorstore = DenseStore.build(
+        index, vectors,
+        [chunk.page_content for chunk in chunks],
+        [chunk.metadata["source"] for chunk in chunks],
+        ids or [str(i) for i in range(len(chunks))],
+        embeddings
+    )
+    build_seconds = time.perf_counter() - start
+    
+    recall, search_ms = recall_at_k(index, vectors, recall_k)
+    stats = {
+        'vectors': len(vectors),
+        'dimension': int(vectors.shape[1]),
+        'embed_seconds': round(embed_seconds, 3),
+        'train_seconds': round(train_seconds, 3),
+        'build_seconds': round(build_seconds, 3),
+        'index_bytes': index_nbytes(index),
+        'store_bytes': vectorstore.nbytes,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        f'recall@{recall_k}': round(recall, 4),
+        'search_ms': round(search_ms, 4)
+    }
+    return vectorstore, spec, stats
+
+def print_index_stats(spec, stats):
+    recall_key = next(key for key in stats if key.startswith('recall@'))
+    print(f"📊 {format_index_spec(spec)}: build {stats['build_seconds']:.2f}s "
+          f"(treino {stats['train_seconds']:.2f}s) | índice {stats['index_bytes'] / 1e6:.1f} MB | "
+          f"RSS {stats['peak_rss_mb']:.0f} MB | {recall_key} {stats[recall_key]:.3f} vs flat | "
+          f"{stats['search_ms']:.3f} ms/consulta")
+
+def load_vectorstore(embeddings, vectorstore_path=VECTORSTORE_PATH, mmap=True):
+    """
+    Abre o vector store salvo (com mmap: só os resultados das buscas viram
+    Document) e reaplica os parâmetros de busca da especificação gravada.
+    Um vector store no formato antigo (save_local do LangChain) ainda é
+    carregado, mas só é atualizado recriando.
+    """
+    if DenseStore.exists(vectorstore_path):
+        vectorstore = DenseStore.load(vectorstore_path, embeddings, mmap)
+    else:
+        from langchain_community.vectorstores import FAISS
+        
+        print("⚠️ Vector store no formato antigo (pickle): rode create_vectorstore.py para converter")
+        vectorstore = FAISS.load_local(vectorstore_path, embeddings)
+    apply_search_params(vectorstore.index, load_spec(vectorstore_path))
+    return vectorstore
+
+def compare_indexes(chunks, embeddings, specs, k=10):
+    """Embeda uma vez e mede cada especificação: build, memória, latência e recall@k contra flat"""
+    vectors = embed_chunks(chunks, embeddings)
+    print(f"\n⚖️ Comparando {len(specs)} índices em {len(vectors)} vetores (recall@{k} contra flat)")
+    
+    report = []
+    for index_spec in specs:
+        start = time.perf_counter()
+        index, spec, train_seconds = build_index(vectors, index_spec)
+        build_seconds = time.perf_counter() - start
+        recall, search_ms = recall_at_k(index, vectors, k)
+        stats = {
+            'build_seconds': round(build_seconds, 3),
+            'train_seconds': round(train_seconds, 3),
+            'index_bytes': index_nbytes(index),
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            f'recall@{k}': round(recall, 4),
+            'search_ms': round(search_ms, 4)
+        }
+        print_index_stats(spec, stats)
+        report.append({'spec': format_index_spec(spec), **stats})
+    return report
 
-def create_vectorstore(chunks, embeddings):
-    """Cria o vector store FAISS"""
+def create_vectorstore(chunks, embeddings, hashes=None, index_spec="flat", recall_k=10):
+    """Cria o vector store FAISS com o tipo de índice pedido"""
     
-    print("\n🗃️ Criando vector store...")
+    print(f"\n🗃️ Criando vector store ({format_index_spec(parse_index_spec(index_spec))})...")
     
     try:
-        # Cria o vector store com parâmetro correto
-        vectorstore = FAISS.from_documents(
-            documents=chunks,
-            embedding=embeddings  # Mudança: usar 'embedding' ao invés de 'embedding_function'
-        )
+        ids = chunk_ids(chunks, hashes) if hashes else None
+        
+        vectorstore, spec, stats = build_faiss(chunks, embeddings, index_spec, ids, recall_k)
+        print_index_stats(spec, stats)
         
-        # Salva localmente
-        vectorstore_path = "data/vectorstore"
+        # Salva localmente, com a especificação do índice ao lado
+        vectorstore_path = VECTORSTORE_PATH
         os.makedirs(vectorstore_path, exist_ok=True)
         
-        vectorstore.save_local(vectorstore_path)
+        vectorstore.save(vectorstore_path)
+        save_spec(vectorstore_path, spec, stats)
+        if hashes:
+            write_manifest(chunks, ids, hashes, vectorstore_path)
         
         print(f"✅ Vector store salvo em: {vectorstore_path}")
         
@@ -245,14 +380,160 @@ def create_vectorstore(chunks, embeddings):
         traceback.print_exc()
         return None
 
+def corpus_delta(vectorstore_path=VECTORSTORE_PATH):
+    """
+    Compara data/texts com o manifesto: (hashes atuais, manifesto, novos,
+    alterados, removidos), com manifesto None se o vector store não existir
+    """
+    current = {path: file_hash(path) for path in iter_text_files()}
+    manifest_path = os.path.join(vectorstore_path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return current, None, list(current), [], []
+    
+    with open(manifest_path, 'r', encoding='utf-8') as file:
+        manifest = json.load(file)
+    
+    added = [f for f in current if f not in manifest]
+    changed = [f for f in current if f in manifest and manifest[f]["hash"] != current[f]]
+    removed = [f for f in manifest if f not in current]
+    return current, manifest, added, changed, removed
+
+def update_vectorstore(embeddings, vectorstore_path=VECTORSTORE_PATH, index_spec="flat"):
+    """
+    Atualiza o FAISS salvo só com o delta de data/texts: remove os chunks
+    de arquivos alterados/removidos e embeda apenas os arquivos novos ou
+    alterados. Sem manifesto, faz a criação completa.
+    """
+    
+    print("\n🔄 Atualização incremental do vector store...")
+    
+    current, manifest, added, changed, removed = corpus_delta(vectorstore_path)
+    
+    if manifest is None:
+        print("📦 Sem manifesto: criando vector store completo")
+        chunks = split_documents(load_documents(list(current)))
+        return create_vectorstore(chunks, embeddings, current, index_spec) if chunks else None
+    
+    print(f"📊 +{len(added)} ~{len(changed)} -{len(removed)} arquivos")
+    
+    spec = load_spec(vectorstore_path)
+    if not DenseStore.exists(vectorstore_path):
+        print("📦 Formato antigo: recriando vector store completo")
+        chunks = split_documents(load_documents(list(current)))
+        return create_vectorstore(chunks, embeddings, current, spec) if chunks else None
+    
+    # Sem mmap: os vetores novos entram no próprio índice
+    vectorstore = load_vectorstore(embeddings, vectorstore_path, mmap=False)
+    if not (added or changed or removed):
+        print("✅ Vector store já está atualizado")
+        return vectorstore
+    
+    # Marca os chunks antigos como removidos (tombstones)
+    stale_ids = [chunk_id for f in changed + removed for chunk_id in manifest[f]["ids"]]
+    if stale_ids:
+        vectorstore = vectorstore.mark_deleted(stale_ids)
+    
+    # Embeda somente os arquivos novos ou alterados
+    fresh = added + changed
+    chunks = split_documents(load_documents(fresh)) if fresh else []
+    ids = chunk_ids(chunks, current)
+    if chunks:
+        vectorstore = vectorstore.extend(
+            embed_chunks(chunks, embeddings),
+            [chunk.page_content for chunk in chunks],
+            [chunk.metadata["source"] for chunk in chunks],
+            ids
+        )
+    
+    # Muitos tombstones: índice refeito com os vetores guardados (HNSW nem remove vetores)
+    if vectorstore.needs_compaction:
+        print(f"🧹 {vectorstore.deleted_fraction:.0%} removidos: compactando {format_index_spec(spec)}")
+        vectorstore, spec = vectorstore.compact(spec)
+        save_spec(vectorstore_path, spec, {'vectors': len(vectorstore), 'compacted': True})
+    
+    vectorstore.save(vectorstore_path)
+    
+    for f in removed:
+        del manifest[f]
+    for f in fresh:
+        manifest[f] = {"hash": current[f], "ids": []}
+    for chunk, chunk_id in zip(chunks, ids):
+        manifest[chunk.metadata["source"]]["ids"].append(chunk_id)
+    
+    with open(os.path.join(vectorstore_path, MANIFEST_FILE), 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=2)
+    
+    print(f"✅ {len(stale_ids)} chunks removidos, {len(chunks)} chunks embedados")
+    return vectorstore
+
 def main():
+    parser = argparse.ArgumentParser(description="Cria o vector store FAISS")
+    parser.add_argument('--incremental', action='store_true',
+                        help="embeda só os arquivos novos ou alterados")
+    parser.add_argument('--no-embedding-cache', action='store_true',
+                        help=f"recalcula todos os embeddings sem usar {EMBEDDING_CACHE_PATH}")
+    parser.add_argument('--embed-batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help="textos por lote do modelo de embeddings")
+    parser.add_argument('--embed-workers', type=int, default=DEFAULT_WORKERS,
+                        help="processos de CPU para os embeddings")
+    parser.add_argument('--compare-embeddings', default=None, metavar='CONFIGS',
+                        help="mede chunks/s de configurações \"lote x processos\" (ex.: \"16x1,64x1,64x4\") sem gravar")
+    parser.add_argument('--embedding-backend', choices=EMBEDDING_BACKENDS, default='torch',
+                        help="PyTorch, ONNX Runtime (onnx-int8: pesos quantizados em int8) "
+                             "ou hashing (sem modelo, modo de poucos recursos)")
+    parser.add_argument('--onnx-threads', type=int, default=None,
+                        help="threads intra-op do ONNX Runtime (padrão: núcleos físicos)")
+    parser.add_argument('--compare-backends', default=None, metavar='BACKENDS',
+                        help="valida backends ONNX contra o PyTorch (ex.: \"onnx,onnx-int8\") sem gravar")
+    parser.add_argument('--index', default="flat",
+                        help="tipo do índice: flat, ivf:nlist=256,nprobe=16, hnsw:M=32,efSearch=64, "
+                             "ivfpq:nlist=256,m=16,nbits=8,nprobe=16")
+    parser.add_argument('--compare-indexes', default=None, metavar='SPECS',
+                        help="mede vários índices separados por ';' (ex.: \"flat;ivf:nlist=64;hnsw\") sem gravar")
+    parser.add_argument('--recall-k', type=int, default=10, help="k do recall contra a busca flat")
+    args = parser.parse_args()
+    
+    try:
+        parse_index_spec(args.index)
+        for config in filter(None, (args.compare_embeddings or "").split(',')):
+            parse_embedding_config(config)
+        for backend in filter(None, (args.compare_backends or "").split(',')):
+            if backend not in ONNX_BACKENDS[1:]:
+                raise ValueError(f"Backend desconhecido: {backend} (use {', '.join(ONNX_BACKENDS[1:])})")
+    except ValueError as e:
+        parser.error(str(e))
+    
+    embedding_options = {
+        'cache_dir': None if args.no_embedding_cache else EMBEDDING_CACHE_PATH,
+        'batch_size': args.embed_batch_size,
+        'workers': args.embed_workers,
+        'backend': args.embedding_backend,
+        'threads': args.onnx_threads
+    }
+    
     print("🚀 Criando Vector Store para RAG Culinária Brasileira")
     print("=" * 55)
     
-    # 1. Carrega documentos
-    documents = load_documents()
-    if not documents:
+    if args.incremental:
+        # Sem mudanças no corpus: nem o modelo nem o FAISS precisam ser carregados
+        _, manifest, added, changed, removed = corpus_delta()
+        if manifest is not None and not (added or changed or removed):
+            print("✅ Vector store já está atualizado")
+            return
+        
+        embeddings = create_embeddings(**embedding_options)
+        if not embeddings or not update_vectorstore(embeddings, index_spec=args.index):
+            print("❌ Não foi possível atualizar vector store")
+            return
+        print("\n🎉 Vector store atualizado com sucesso!")
+        return
+    
+    # 1. Carrega documentos (em streaming)
+    text_files = list_text_files()
+    if not text_files:
         return
+    hashes = {path: file_hash(path) for path in text_files}
+    documents = load_documents(text_files)
     
     # 2. Divide em chunks
     chunks = split_documents(documents)
@@ -260,14 +541,39 @@ def main():
         print("❌ Nenhum chunk criado")
         return
     
+    # Validação dos backends ONNX contra o PyTorch, sem gravar
+    if args.compare_backends:
+        from evaluate_retrieval import GOLDEN_FILE, load_golden
+        from onnx_embeddings import compare_backends
+        
+        queries = [item['query'] for item in load_golden()] if os.path.exists(GOLDEN_FILE) else []
+        compare_backends(EMBEDDING_MODEL, [chunk.page_content for chunk in chunks],
+                         queries or [chunk.page_content[:200] for chunk in chunks[:50]],
+                         [backend for backend in args.compare_backends.split(',') if backend],
+                         args.recall_k, args.onnx_threads)
+        return
+    
     # 3. Cria embeddings
-    embeddings = create_embeddings()
+    embeddings = create_embeddings(**embedding_options)
     if not embeddings:
         print("❌ Não foi possível carregar modelo de embeddings")
         return
     
+    # Só compara configurações, sem gravar
+    if args.compare_embeddings:
+        if not hasattr(embeddings, 'pipeline'):
+            print("❌ Comparação de embeddings só com sentence-transformers")
+            return
+        compare_configs(embeddings.model, [chunk.page_content for chunk in chunks],
+                        [config for config in args.compare_embeddings.split(',') if config])
+        return
+    
+    if args.compare_indexes:
+        compare_indexes(chunks, embeddings, [spec for spec in args.compare_indexes.split(';') if spec], args.recall_k)
+        return
+    
     # 4. Cria vector store
-    vectorstore = create_vectorstore(chunks, embeddings)
+    vectorstore = create_vectorstore(chunks, embeddings, hashes, args.index, args.recall_k)
     if not vectorstore:
         print("❌ Não foi possível criar vector store")
         return
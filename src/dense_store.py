@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Formato em disco do vector store denso, sem pickle
+
+Em data/vectorstore/<geração>/:
+- index.faiss: índice FAISS (faiss.write_index)
+- vectors.npy: vetores float32 (n, dimensão), contíguos
+- text.npy + text_offsets.npy: texto UTF-8 dos chunks num blob (n + 1 offsets)
+- ids.npy + id_offsets.npy: ids dos chunks, no mesmo formato
+- source_ids.npy + sources.json: arquivo de cada chunk
+- deleted.npy: tombstones da atualização incremental
+e em data/vectorstore/dense_store.json a versão do formato, as dimensões e
+a geração atual. Cada save() escreve uma geração nova inteira e só então
+troca o dense_store.json (os.replace): uma carga concorrente ou um crash no
+meio nunca junta o índice de uma geração com os arrays de outra.
+
+A carga só abre os arrays (np.load com mmap): nenhum Document é criado
+antes da primeira busca, e depois só para os resultados. O index.faiss é
+lido inteiro para a memória: o IO_FLAG_MMAP do FAISS 1.7 só mapeia listas
+invertidas gravadas em disco (OnDiskInvertedLists), não os índices flat,
+HNSW ou IVF comuns que ann_index monta. O tempo de carga e o RSS não
+crescem com o número de chunks, fora o próprio índice.
+
+A atualização incremental marca chunks removidos em `deleted` (como o
+KnowledgeIndex) e anexa os novos. A busca filtra os tombstones dentro do
+FAISS (IDSelector), então o custo de uma consulta não cresce com eles;
+acima de MAX_DELETED_FRACTION removidos, compact() reconstrói o índice a
+partir de vectors.npy, sem embedar de novo.
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+
+META_FILE = "dense_store.json"
+INDEX_FILE = "index.faiss"
+SOURCES_FILE = "sources.json"
+LEGACY_FILES = ("index.faiss", "index.pkl")  # FAISS.save_local do LangChain (docstore em pickle)
+GENERATION_PREFIX = "generation-"
+FORMAT_VERSION = 1
+MAX_DELETED_FRACTION = 0.3  # Acima disso a atualização incremental compacta o índice
+MAX_OVERFETCH = 10  # Sem filtro no FAISS: busca no máximo k * MAX_OVERFETCH vizinhos
+ARRAYS = ('vectors', 'text', 'text_offsets', 'ids', 'id_offsets', 'source_ids', 'deleted')
+
+
+def encode_strings(strings):
+    """(blob uint8, offsets int64 com n + 1 posições)"""
+    encoded = [string.encode('utf-8') for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(data) for data in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _generation(number):
+    return f"{GENERATION_PREFIX}{number:06d}"
+
+
+def _read_meta(path):
+    with open(os.path.join(path, META_FILE), 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+
+class DenseStore:
+    """Índice FAISS + vetores + textos em arrays; os Documents saem sob demanda"""
+
+    def __init__(self, index, vectors, text, text_offsets, ids, id_offsets, source_ids, deleted, sources,
+                 embeddings=None):
+        self.index = index
+        self.vectors = vectors  # float32 (n, dimensão)
+        self.text = text  # uint8: blob com o texto dos chunks
+        self.text_offsets = text_offsets  # int64 (n + 1)
+        self.ids = ids  # uint8: blob com os ids
+        self.id_offsets = id_offsets  # int64 (n + 1)
+        self.source_ids = source_ids  # int32: índice em sources
+        self.deleted = deleted  # bool: tombstones
+        self.sources = list(sources)
+        self.embeddings = embeddings  # Embeddings do LangChain (para consultas em texto)
+        self.n_deleted = int(np.count_nonzero(deleted))
+        self._rows = None  # id -> linha, montado só na atualização
+        self._search_params = None  # (params, objetos vivos) que filtram os tombstones no FAISS
+
+    @classmethod
+    def build(cls, index, vectors, texts, sources, ids, embeddings=None):
+        """Store novo: `sources` e `ids` com um item por chunk, na ordem dos vetores"""
+        source_index = {}
+        source_ids = np.array([source_index.setdefault(source, len(source_index)) for source in sources],
+                              dtype=np.int32)
+        text, text_offsets = encode_strings(texts)
+        id_blob, id_offsets = encode_strings(ids)
+        return cls(index, np.ascontiguousarray(vectors, dtype=np.float32), text, text_offsets, id_blob, id_offsets,
+                   source_ids, np.zeros(len(texts), dtype=bool), list(source_index), embeddings)
+
+    def __len__(self):
+        return len(self.text_offsets) - 1
+
+    @property
+    def n_live(self):
+        return len(self) - self.n_deleted
+
+    @property
+    def deleted_fraction(self):
+        return self.n_deleted / len(self) if len(self) else 0.0
+
+    @property
+    def needs_compaction(self):
+        return self.deleted_fraction > MAX_DELETED_FRACTION
+
+    @staticmethod
+    def _string(blob, offsets, row):
+        return blob[int(offsets[row]):int(offsets[row + 1])].tobytes().decode('utf-8')
+
+    def content(self, row):
+        return self._string(self.text, self.text_offsets, row)
+
+    def chunk_id(self, row):
+        return self._string(self.ids, self.id_offsets, row)
+
+    def source(self, row):
+        return self.sources[self.source_ids[row]]
+
+    def document(self, row):
+        """Document do LangChain de uma linha (criado só na hora)"""
+        from langchain_core.documents import Document
+
+        source = self.source(row)
+        return Document(page_content=self.content(row),
+                        metadata={"source": source, "filename": os.path.basename(source)})
+
+    def _filter_params(self):
+        """Parâmetros que excluem os tombstones na busca (None se o FAISS não suportar)"""
+        if self._search_params is None:
+            from ann_index import excluding_search_params
+
+            self._search_params = excluding_search_params(self.index, np.flatnonzero(self.deleted)) or False
+        return self._search_params or None
+
+    def search(self, query_vectors, k=4):
+        """Por consulta, [(linha, distância)] dos k vizinhos vivos"""
+        query_vectors = np.ascontiguousarray(np.atleast_2d(query_vectors), dtype=np.float32)
+        filtered = self._filter_params() if self.n_deleted else None
+        if filtered is not None:
+            fetch = min(k, self.index.ntotal)
+            if fetch <= 0:
+                return [[] for _ in query_vectors]
+            distances, rows = self.index.search(query_vectors, fetch, params=filtered[0])
+        else:
+            # Sem filtro no FAISS: busca a mais (com teto) e descarta os tombstones
+            fetch = min(k + min(self.n_deleted, k * (MAX_OVERFETCH - 1)), self.index.ntotal)
+            if fetch <= 0:
+                return [[] for _ in query_vectors]
+            distances, rows = self.index.search(query_vectors, fetch)
+
+        results = []
+        for row_distances, row_ids in zip(distances, rows):
+            live = [(int(row), float(distance)) for row, distance in zip(row_ids, row_distances)
+                    if row >= 0 and not self.deleted[row]]
+            results.append(live[:k])
+        return results
+
+    def similarity_search_with_score(self, query, k=4):
+        query_vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        return [(self.document(row), distance) for row, distance in self.search(query_vector, k)[0]]
+
+    def similarity_search(self, query, k=4):
+        """Mesma interface do FAISS do LangChain"""
+        return [document for document, _ in self.similarity_search_with_score(query, k)]
+
+    def mark_deleted(self, chunk_ids):
+        """Nova versão com os chunks marcados como removidos (ids desconhecidos são ignorados)"""
+        if self._rows is None:
+            self._rows = {self.chunk_id(row): row for row in range(len(self))}
+        rows = [self._rows[chunk_id] for chunk_id in chunk_ids if chunk_id in self._rows]
+        deleted = np.array(self.deleted, dtype=bool)
+        deleted[rows] = True
+        return DenseStore(self.index, self.vectors, self.text, self.text_offsets, self.ids, self.id_offsets,
+                          self.source_ids, deleted, self.sources, self.embeddings)
+
+    def extend(self, vectors, texts, sources, ids):
+        """
+        Nova versão com os chunks anexados. Os vetores são adicionados ao
+        próprio índice, então ele precisa ter sido carregado sem mmap.
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        addition = DenseStore.build(None, vectors, texts, sources, ids)
+        all_sources = self.sources + [source for source in addition.sources if source not in self.sources]
+        source_ids = np.array([all_sources.index(source) for source in addition.sources], dtype=np.int32)
+
+        self.index.add(vectors)
+        return DenseStore(
+            self.index,
+            np.concatenate([self.vectors, vectors]) if len(self) else vectors,
+            np.concatenate([self.text, addition.text]),
+            np.concatenate([self.text_offsets[:-1], addition.text_offsets + self.text_offsets[-1]]),
+            np.concatenate([self.ids, addition.ids]),
+            np.concatenate([self.id_offsets[:-1], addition.id_offsets + self.id_offsets[-1]]),
+            np.concatenate([self.source_ids, source_ids[addition.source_ids]]),
+            np.concatenate([self.deleted, addition.deleted]),
+            all_sources,
+            self.embeddings
+        )
+
+    def compact(self, spec):
+        """
+        (store sem os tombstones, spec ajustada): o índice é reconstruído a
+        partir dos vetores guardados, sem embedar de novo
+        """
+        from ann_index import build_index
+
+        live = np.flatnonzero(~np.asarray(self.deleted))
+        index, spec, _ = build_index(self.vectors[live], spec)
+        return DenseStore.build(index, self.vectors[live], [self.content(row) for row in live],
+                                [self.source(row) for row in live], [self.chunk_id(row) for row in live],
+                                self.embeddings), spec
+
+    @property
+    def nbytes(self):
+        """Bytes dos arrays (o índice FAISS à parte)"""
+        return sum(np.asarray(getattr(self, name)).nbytes for name in ARRAYS)
+
+    def save(self, path):
+        """
+        Grava uma geração nova em path/generation-N e só depois aponta o
+        dense_store.json para ela; mantém a geração anterior (leitores que
+        já a abriram) e apaga as mais antigas.
+        """
+        import faiss
+
+        os.makedirs(path, exist_ok=True)
+        current = _read_meta(path).get('generation') if DenseStore.exists(path) else None
+        numbers = [int(name[len(GENERATION_PREFIX):]) for name in os.listdir(path)
+                   if name.startswith(GENERATION_PREFIX) and name[len(GENERATION_PREFIX):].isdigit()]
+        generation = _generation(max(numbers, default=0) + 1)
+
+        tmp_dir = os.path.join(path, f".{generation}.tmp")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for name in ARRAYS:
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), np.asarray(getattr(self, name)))
+        faiss.write_index(self.index, os.path.join(tmp_dir, INDEX_FILE))
+        with open(os.path.join(tmp_dir, SOURCES_FILE), 'w', encoding='utf-8') as file:
+            json.dump(self.sources, file, ensure_ascii=False)
+        os.replace(tmp_dir, os.path.join(path, generation))
+
+        # Metadados por último: a troca de geração é um único os.replace
+        meta = {'version': FORMAT_VERSION, 'generation': generation, 'documents': len(self),
+                'dimension': int(self.index.d), 'deleted': self.n_deleted}
+        meta_path = os.path.join(path, META_FILE)
+        with open(meta_path + ".tmp", 'w', encoding='utf-8') as file:
+            json.dump(meta, file, indent=2)
+        os.replace(meta_path + ".tmp", meta_path)
+
+        for name in os.listdir(path):
+            if name.startswith(GENERATION_PREFIX) and name not in (generation, current):
+                shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+        for name in LEGACY_FILES:
+            if os.path.exists(os.path.join(path, name)):
+                os.remove(os.path.join(path, name))
+
+    @staticmethod
+    def exists(path):
+        return os.path.exists(os.path.join(path, META_FILE))
+
+    @classmethod
+    def load(cls, path, embeddings=None, mmap=True):
+        """
+        Abre a geração apontada pelo dense_store.json; com mmap=True os
+        arrays só são lidos quando usados (o índice FAISS é lido inteiro)
+        """
+        import faiss
+
+        meta = _read_meta(path)
+        if meta.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Formato {meta.get('version')} em {path}, esperado {FORMAT_VERSION}")
+        data_dir = os.path.join(path, meta['generation'])
+
+        index = faiss.read_index(os.path.join(data_dir, INDEX_FILE))
+        mmap_mode = "r" if mmap else None
+        arrays = {name: np.load(os.path.join(data_dir, f"{name}.npy"), mmap_mode=mmap_mode) for name in ARRAYS}
+        with open(os.path.join(data_dir, SOURCES_FILE), 'r', encoding='utf-8') as file:
+            sources = json.load(file)
+        if len(arrays['text_offsets']) - 1 != meta['documents'] or index.ntotal != meta['documents']:
+            raise ValueError(f"Geração {meta['generation']} em {path} não confere com {META_FILE}")
+        return cls(index, *(arrays[name] for name in ARRAYS), sources, embeddings)
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Armazenamento compacto dos documentos (chunks)
+
+Em vez de um dict por chunk com a string inteira, o texto fica num único
+blob UTF-8 e cada documento é só uma linha em arrays NumPy (offset,
+tamanho, fonte, tipo, ordem, removido). Os documentos são as folhas
+(parágrafos); a seção-mãe de cada folha fica numa tabela à parte que
+aponta para o mesmo blob, então o texto da seção é guardado uma única
+vez e as folhas são trechos dele.
+
+Os arrays podem ser gravados em .npy e abertos com mmap, ou apontar
+para memória compartilhada (shared_index).
+"""
+
+import json
+import os
+from array import array
+from collections.abc import Sequence
+
+import numpy as np
+
+TYPES = ('section', 'paragraph')
+ID_SUFFIXES = {'section': 'section', 'paragraph': 'para'}  # Mesmo formato de id de corpus_loader
+ARRAYS = (
+    'blob', 'offsets', 'lengths', 'source_ids', 'types', 'ordinals', 'deleted', 'parents', 'positions',
+    'section_offsets', 'section_lengths', 'section_source_ids', 'section_ordinals'
+)
+SOURCES_FILE = "sources.json"
+
+
+class DocumentView:
+    """Documento lido sob demanda do store; aceita doc['content'] e doc.get('deleted')"""
+
+    __slots__ = ('_store', '_row')
+
+    FIELDS = ('content', 'source', 'type', 'id', 'deleted', 'parent', 'position')
+
+    def __init__(self, store, row):
+        self._store = store
+        self._row = row
+
+    @property
+    def content(self):
+        return self._store.content(self._row)
+
+    @property
+    def source(self):
+        return self._store.source(self._row)
+
+    @property
+    def type(self):
+        return TYPES[self._store.types[self._row]]
+
+    @property
+    def id(self):
+        return self._store.doc_id(self._row)
+
+    @property
+    def deleted(self):
+        return self._store.is_deleted(self._row)
+
+    @property
+    def parent(self):
+        """Id da seção-mãe (None se a folha não tiver seção)"""
+        section = self._store.parent(self._row)
+        return self._store.section_id(section) if section >= 0 else None
+
+    @property
+    def position(self):
+        return int(self._store.positions[self._row])
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self):
+        doc = {'content': self.content, 'source': self.source, 'type': self.type, 'id': self.id}
+        if self.parent is not None:
+            doc['parent'] = self.parent
+            doc['position'] = self.position
+        if self.deleted:
+            doc['deleted'] = True
+        return doc
+
+
+class DocumentStore(Sequence):
+    def __init__(self, blob, offsets, lengths, source_ids, types, ordinals, deleted, parents, positions,
+                 section_offsets, section_lengths, section_source_ids, section_ordinals, sources):
+        self.blob = blob  # uint8: texto UTF-8 de todas as seções/documentos
+        self.offsets = offsets  # int64: início de cada documento no blob (bytes)
+        self.lengths = lengths  # int32: tamanho em bytes
+        self.source_ids = source_ids  # int32: índice em sources
+        self.types = types  # uint8: índice em TYPES
+        self.ordinals = ordinals  # int32: posição do chunk no arquivo (compõe o id)
+        self.deleted = deleted  # bool: tombstones
+        self.parents = parents  # int32: seção-mãe (linha da tabela de seções, -1 sem seção)
+        self.positions = positions  # int32: posição da folha dentro da seção
+        self.section_offsets = section_offsets  # int64: tabela de seções (mesmo blob)
+        self.section_lengths = section_lengths  # int32
+        self.section_source_ids = section_source_ids  # int32
+        self.section_ordinals = section_ordinals  # int32: compõe o id da seção
+        self.sources = list(sources)
+
+    @classmethod
+    def from_documents(cls, documents):
+        """Monta o store a partir de dicts {content, source, type, id}"""
+        builder = DocumentStoreBuilder()
+        for doc in documents:
+            builder.add(doc)
+        return builder.build()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [DocumentView(self, i) for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return DocumentView(self, row)
+
+    def _text(self, start, length):
+        start = int(start)
+        return self.blob[start:start + int(length)].tobytes().decode('utf-8')
+
+    def content(self, row):
+        return self._text(self.offsets[row], self.lengths[row])
+
+    def contents(self):
+        """Textos de todos os documentos, em ordem"""
+        for row in range(len(self)):
+            yield self.content(row)
+
+    def source(self, row):
+        return self.sources[self.source_ids[row]]
+
+    def doc_id(self, row):
+        doc_type = TYPES[self.types[row]]
+        return f"{self.source(row)}_{ID_SUFFIXES[doc_type]}_{self.ordinals[row]}"
+
+    def is_deleted(self, row):
+        return bool(self.deleted[row])
+
+    def parent(self, row):
+        """Linha da seção-mãe na tabela de seções (-1 se não houver)"""
+        return int(self.parents[row])
+
+    @property
+    def n_sections(self):
+        return len(self.section_offsets)
+
+    def section_content(self, section):
+        return self._text(self.section_offsets[section], self.section_lengths[section])
+
+    def section_id(self, section):
+        source = self.sources[self.section_source_ids[section]]
+        return f"{source}_section_{self.section_ordinals[section]}"
+
+    def parent_content(self, row):
+        """Texto da seção-mãe da folha (ou o da própria folha, se não tiver seção)"""
+        section = self.parent(row)
+        return self.section_content(section) if section >= 0 else self.content(row)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in ARRAYS)
+
+    def arrays(self):
+        """Arrays do store por nome (para gravar ou copiar para memória compartilhada)"""
+        return {name: getattr(self, name) for name in ARRAYS}
+
+    @classmethod
+    def from_arrays(cls, arrays, sources):
+        return cls(*(arrays[name] for name in ARRAYS), sources)
+
+    def mark_deleted(self, rows):
+        """Nova versão com as linhas marcadas como removidas (o texto é compartilhado)"""
+        deleted = np.array(self.deleted, dtype=bool)
+        deleted[list(rows)] = True
+        arrays = self.arrays()
+        arrays['deleted'] = deleted
+        return DocumentStore.from_arrays(arrays, self.sources)
+
+    def extend(self, documents):
+        """Nova versão com documentos anexados ao final"""
+        builder = DocumentStoreBuilder(self)
+        for doc in documents:
+            builder.add(doc)
+        return builder.build()
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        for name, values in self.arrays().items():
+            np.save(os.path.join(path, f"{name}.npy"), np.asarray(values))
+        with open(os.path.join(path, SOURCES_FILE), "w", encoding="utf-8") as file:
+            json.dump(self.sources, file, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        mmap_mode = "r" if mmap else None
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in ARRAYS
+        }
+        with open(os.path.join(path, SOURCES_FILE), "r", encoding="utf-8") as file:
+            sources = json.load(file)
+        return cls.from_arrays(arrays, sources)
+
+
+class DocumentStoreBuilder:
+    """Acumula documentos em buffers compactos; build() gera o DocumentStore"""
+
+    COLUMNS = (
+        ('offsets', 'q', np.int64), ('lengths', 'i', np.int32), ('source_ids', 'i', np.int32),
+        ('types', 'B', np.uint8), ('ordinals', 'i', np.int32), ('deleted', 'B', np.uint8),
+        ('parents', 'i', np.int32), ('positions', 'i', np.int32),
+        ('section_offsets', 'q', np.int64), ('section_lengths', 'i', np.int32),
+        ('section_source_ids', 'i', np.int32), ('section_ordinals', 'i', np.int32)
+    )
+
+    def __init__(self, base=None):
+        self._blob = bytearray()
+        self._columns = {name: array(code) for name, code, _ in self.COLUMNS}
+        self._sources = []
+        self._source_index = {}
+        self._sections = {}  # id da seção -> (linha na tabela de seções, offset no blob); o texto fica só no blob
+
+        if base is not None:
+            self._blob += np.asarray(base.blob).tobytes()
+            for name, _, dtype in self.COLUMNS:
+                self._columns[name].frombytes(np.asarray(getattr(base, name), dtype=dtype).tobytes())
+            for source in base.sources:
+                self._source_id(source)
+
+    def _source_id(self, source):
+        if source not in self._source_index:
+            self._source_index[source] = len(self._sources)
+            self._sources.append(source)
+        return self._source_index[source]
+
+    def _section(self, doc, source_id):
+        """Guarda a seção-mãe da folha uma única vez: retorna (linha, offset)"""
+        section_id = doc['parent']
+        if section_id not in self._sections:
+            encoded = doc['parent_content'].encode('utf-8')
+            columns = self._columns
+            section = len(columns['section_offsets'])
+            columns['section_offsets'].append(len(self._blob))
+            columns['section_lengths'].append(len(encoded))
+            columns['section_source_ids'].append(source_id)
+            columns['section_ordinals'].append(int(section_id.rsplit('_', 1)[1]))
+            self._sections[section_id] = (section, len(self._blob))
+            self._blob += encoded
+        return self._sections[section_id]
+
+    def add(self, doc):
+        content = doc['content']
+        doc_type = doc.get('type', 'paragraph')
+        source_id = self._source_id(doc['source'])
+        columns = self._columns
+
+        if doc.get('parent_content') is not None:
+            # Folha: aponta para o trecho dela dentro do texto da seção (que a
+            # folha ainda traz; o builder não guarda uma cópia dele)
+            section, section_offset = self._section(doc, source_id)
+            text = doc['parent_content']
+            start = doc.get('start')
+            if start is None:
+                start = text.find(content)
+            offset = section_offset + len(text[:start].encode('utf-8'))
+            columns['parents'].append(section)
+            columns['positions'].append(doc.get('position', 0))
+        else:
+            offset = len(self._blob)
+            self._blob += content.encode('utf-8')
+            columns['parents'].append(-1)
+            columns['positions'].append(0)
+
+        columns['offsets'].append(offset)
+        columns['lengths'].append(len(content.encode('utf-8')))
+        columns['source_ids'].append(source_id)
+        columns['types'].append(TYPES.index(doc_type))
+        columns['ordinals'].append(int(doc['id'].rsplit('_', 1)[1]))
+        columns['deleted'].append(1 if doc.get('deleted') else 0)
+
+    def build(self):
+        """DocumentStore com os buffers acumulados; o builder não aceita mais add()"""
+        arrays = {
+            name: np.frombuffer(self._columns[name], dtype=dtype).copy()
+            for name, _, dtype in self.COLUMNS
+        }
+        arrays['deleted'] = arrays['deleted'].astype(bool)
+        # Sem cópia: o array usa o próprio bytearray (que não pode mais crescer,
+        # então build() encerra o builder)
+        arrays['blob'] = np.frombuffer(self._blob, dtype=np.uint8)
+        return DocumentStore.from_arrays(arrays, self._sources)
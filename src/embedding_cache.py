@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Cache persistente de embeddings endereçado por conteúdo
+
+Cada modelo tem uma pasta com:
+- vectors.f32: vetores float32 um após o outro (lido com mmap)
+- keys.bin: hash (16 bytes) do texto de cada vetor, na mesma ordem
+- cache.json: nome do modelo e dimensão
+
+A chave é (modelo, hash do texto), então um chunk que não mudou nunca é
+embedado de novo, mesmo que troque de arquivo ou de posição. Os dois
+arquivos só recebem acréscimos; se a escrita for interrompida, a carga
+usa só as linhas completas nos dois.
+"""
+
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+
+EMBEDDING_CACHE_PATH = "data/embedding_cache"
+META_FILE = "cache.json"
+VECTORS_FILE = "vectors.f32"
+KEYS_FILE = "keys.bin"
+KEY_SIZE = 16
+
+
+def text_key(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=KEY_SIZE).digest()
+
+
+class EmbeddingCache:
+    """Vetores por hash do texto para um modelo; embed() só calcula os que faltam"""
+
+    def __init__(self, model_name, path=EMBEDDING_CACHE_PATH):
+        self.model_name = model_name
+        self.path = os.path.join(path, re.sub(r'[^\w.-]+', '_', model_name))
+        self.dimension = None
+        self.vectors = np.empty((0, 0), dtype=np.float32)
+        self._rows = {}  # hash do texto -> linha em vectors
+
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _load(self):
+        if not os.path.exists(self._file(META_FILE)):
+            return
+        with open(self._file(META_FILE), 'r', encoding='utf-8') as file:
+            meta = json.load(file)
+        if meta['model'] != self.model_name:
+            raise ValueError(f"Cache de {meta['model']} em {self.path}, esperado {self.model_name}")
+        self.dimension = meta['dimension']
+
+        with open(self._file(KEYS_FILE), 'rb') as file:
+            keys = file.read()
+        row_bytes = self.dimension * 4
+        n_rows = min(len(keys) // KEY_SIZE, os.path.getsize(self._file(VECTORS_FILE)) // row_bytes)
+
+        # Descarta restos de uma escrita interrompida para os próximos acréscimos ficarem alinhados
+        os.truncate(self._file(KEYS_FILE), n_rows * KEY_SIZE)
+        os.truncate(self._file(VECTORS_FILE), n_rows * row_bytes)
+
+        self._rows = {keys[row * KEY_SIZE:(row + 1) * KEY_SIZE]: row for row in range(n_rows)}
+        self._map(n_rows)
+
+    def _map(self, n_rows):
+        if n_rows:
+            self.vectors = np.memmap(self._file(VECTORS_FILE), dtype=np.float32, mode='r',
+                                     shape=(n_rows, self.dimension))
+
+    def __len__(self):
+        return len(self._rows)
+
+    def lookup(self, keys):
+        """Linhas do cache para cada chave (-1 se não estiver)"""
+        return np.array([self._rows.get(key, -1) for key in keys], dtype=np.int64)
+
+    def add(self, keys, vectors):
+        """Acrescenta vetores novos (chaves já presentes são ignoradas)"""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if self.dimension is None:
+            self.dimension = int(vectors.shape[1])
+            os.makedirs(self.path, exist_ok=True)
+            with open(self._file(META_FILE), 'w', encoding='utf-8') as file:
+                json.dump({'model': self.model_name, 'dimension': self.dimension}, file)
+            # Truncar: restos de um cache sem cache.json não são confiáveis
+            for name in (VECTORS_FILE, KEYS_FILE):
+                open(self._file(name), 'wb').close()
+
+        new_rows = {}
+        for i, key in enumerate(keys):
+            if key not in self._rows and key not in new_rows:
+                new_rows[key] = i
+        if not new_rows:
+            return
+
+        first_row = len(self._rows)
+        # Vetores antes das chaves: uma chave gravada sempre tem o vetor completo
+        with open(self._file(VECTORS_FILE), 'ab') as file:
+            file.write(vectors[list(new_rows.values())].tobytes())
+        with open(self._file(KEYS_FILE), 'ab') as file:
+            file.write(b"".join(new_rows))
+
+        for offset, key in enumerate(new_rows):
+            self._rows[key] = first_row + offset
+        self._map(len(self._rows))
+
+    def embed(self, texts, encode):
+        """
+        Vetores (float32) dos textos: os que estão no cache saem do mmap, os
+        outros são calculados com encode(lista de textos) e gravados.
+        """
+        keys = [text_key(text) for text in texts]
+        rows = self.lookup(keys)
+        missing = np.flatnonzero(rows < 0)
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        if len(missing):
+            # Textos repetidos no mesmo lote são calculados uma vez
+            unique = {}
+            for i in missing:
+                unique.setdefault(keys[i], texts[i])
+            computed = np.asarray(encode(list(unique.values())), dtype=np.float32)
+            self.add(list(unique), computed)
+            rows = self.lookup(keys)
+
+        if not len(texts):
+            return np.empty((0, self.dimension or 0), dtype=np.float32)
+        return np.asarray(self.vectors[rows])
+
+    def stats(self):
+        return {
+            'model': self.model_name,
+            'vectors': len(self),
+            'dimension': self.dimension,
+            'hits': self.hits,
+            'misses': self.misses,
+            'bytes': len(self) * (self.dimension or 0) * 4
+        }
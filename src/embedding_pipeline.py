@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Etapa de embeddings em lotes para o vector store
+
+Os textos são ordenados por tamanho (os lotes ficam com textos parecidos
+e o padding do tokenizador é mínimo) e codificados em lotes de
+batch_size. Cada bloco vira float32 direto num array contíguo, na ordem
+original, sem passar por listas de floats. Com workers > 1 os blocos são
+divididos entre processos (pool do sentence-transformers, só CPU).
+
+Uso da comparação de configurações (chunks/s):
+    python src/create_vectorstore.py --compare-embeddings "16x1,64x1,64x4,64x1:unsorted"
+"""
+
+import atexit
+import time
+
+import numpy as np
+
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_WORKERS = 1
+
+
+def parse_embedding_config(text):
+    """'64x4' -> {'batch_size': 64, 'workers': 4, 'sort_by_length': True} (':unsorted' desliga a ordenação)"""
+    sizes, _, flag = text.strip().partition(':')
+    batch_size, _, workers = sizes.partition('x')
+    if flag not in ('', 'unsorted'):
+        raise ValueError(f"Opção desconhecida: {flag} (use :unsorted)")
+    return {
+        'batch_size': int(batch_size),
+        'workers': int(workers or DEFAULT_WORKERS),
+        'sort_by_length': flag != 'unsorted'
+    }
+
+
+def iter_blocks(texts, block_size, sort_by_length=True):
+    """(posições originais, textos) em blocos de block_size, do maior texto para o menor"""
+    if sort_by_length:
+        # Maiores primeiro: se faltar memória, falta logo no início
+        order = np.argsort([-len(text) for text in texts], kind='stable')
+    else:
+        order = np.arange(len(texts))
+    for start in range(0, len(texts), block_size):
+        positions = order[start:start + block_size]
+        yield positions, [texts[i] for i in positions]
+
+
+class EmbeddingPipeline:
+    """
+    Codifica listas de textos em float32 (n, dimensão) com um modelo
+    sentence-transformers, em lotes ordenados por tamanho e, com
+    workers > 1, num pool de processos de CPU.
+    """
+
+    def __init__(self, model, batch_size=DEFAULT_BATCH_SIZE, workers=DEFAULT_WORKERS, sort_by_length=True):
+        if batch_size < 1 or workers < 1:
+            raise ValueError(f"batch_size e workers precisam ser >= 1: {batch_size}, {workers}")
+        self.model = model
+        self.batch_size = batch_size
+        self.workers = workers
+        self.sort_by_length = sort_by_length
+        self._pool = None
+
+        self.texts = 0
+        self.seconds = 0.0
+
+    def _encode_block(self, texts):
+        if self.workers > 1:
+            if self._pool is None:
+                self._pool = self.model.start_multi_process_pool(target_devices=['cpu'] * self.workers)
+                atexit.register(self.close)
+            return self.model.encode_multi_process(texts, self._pool, batch_size=self.batch_size,
+                                                   chunk_size=self.batch_size)
+        return self.model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True,
+                                 show_progress_bar=False)
+
+    def __call__(self, texts):
+        """Vetores float32 contíguos, na ordem dos textos"""
+        start = time.perf_counter()
+        vectors = None
+        # Um lote por processo em cada bloco
+        for positions, block in iter_blocks(texts, self.batch_size * self.workers, self.sort_by_length):
+            encoded = np.asarray(self._encode_block(block), dtype=np.float32)
+            if vectors is None:
+                vectors = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+            vectors[positions] = encoded
+
+        self.texts += len(texts)
+        self.seconds += time.perf_counter() - start
+        if vectors is None:
+            return np.empty((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+        return vectors
+
+    def close(self):
+        if self._pool is not None:
+            self.model.stop_multi_process_pool(self._pool)
+            self._pool = None
+
+    def describe(self):
+        order = "" if self.sort_by_length else ":unsorted"
+        return f"{self.batch_size}x{self.workers}{order}"
+
+    def stats(self):
+        return {
+            'config': self.describe(),
+            'texts': self.texts,
+            'seconds': round(self.seconds, 3),
+            'chunks_per_second': round(self.texts / self.seconds, 1) if self.seconds else 0.0
+        }
+
+
+def compare_configs(model, texts, configs):
+    """Mede chunks/s de cada configuração ("lote x processos") sobre os mesmos textos"""
+    print(f"\n⚖️ Comparando {len(configs)} configurações de embedding em {len(texts)} chunks")
+    report = []
+    for config in configs:
+        pipeline = EmbeddingPipeline(model, **parse_embedding_config(config))
+        try:
+            pipeline(texts)
+        finally:
+            pipeline.close()
+        stats = pipeline.stats()
+        print(f"📊 {stats['config']:>14}: {stats['chunks_per_second']:8.1f} chunks/s ({stats['seconds']:.2f}s)")
+        report.append(stats)
+    return report
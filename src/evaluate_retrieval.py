@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+Avaliação de qualidade e latência da busca com consultas de referência
+
+Roda o conjunto rotulado (data/eval/golden_queries.json) contra cada
+motor de busca do projeto e mostra, lado a lado, recall@k, MRR e
+nDCG@k com latência, tempo de setup e pico de memória. Os rótulos são
+títulos de seção (=== X ===): um chunk é relevante se cobre uma seção
+marcada para a consulta, então a avaliação não depende de como cada
+motor divide os textos. Os motores tfidf-* comparam as opções de
+compactação da matriz (tipo dos pesos e poda).
+
+Uso:
+    python src/evaluate_retrieval.py --k 3
+    python src/evaluate_retrieval.py --output eval.json --check eval_base.json
+    python src/evaluate_retrieval.py --engines tfidf,tfidf-f32,tfidf-int8,tfidf-top32,tfidf-min05
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import multiprocessing
+import os
+import re
+import sys
+import time
+
+sys.path.append(os.path.dirname(__file__))
+
+from benchmark_suite import latency_stats
+from corpus_loader import TEXTS_DIR
+from memory_usage import peak_rss_mb
+
+GOLDEN_FILE = "data/eval/golden_queries.json"
+QUALITY_METRICS = ('recall', 'mrr', 'ndcg')
+
+# Motor -> configuração do retriever
+RETRIEVERS = {
+    'tfidf': {'kind': 'robust', 'bot': {'engine': 'tfidf'}, 'method': 'search'},
+    'bm25': {'kind': 'robust', 'bot': {'engine': 'bm25'}, 'method': 'search'},
+    'parallel': {'kind': 'robust', 'bot': {'build_mode': 'parallel'}, 'method': 'search'},
+    'keyword': {'kind': 'robust', 'bot': {}, 'method': 'search_simple'},
+    'faiss': {'kind': 'faiss'},
+    # Backend ONNX Runtime do modelo de embeddings (onnx_embeddings)
+    'faiss-onnx': {'kind': 'faiss', 'backend': 'onnx'},
+    'faiss-onnx-int8': {'kind': 'faiss', 'backend': 'onnx-int8'},
+    'faiss-hashing': {'kind': 'faiss', 'backend': 'hashing'},
+    # Compactação da matriz TF-IDF (sparse_compaction): memória x latência x recall
+    'tfidf-f32': {'kind': 'robust', 'bot': {'compaction': {'dtype': 'float32'}}, 'method': 'search'},
+    'tfidf-int8': {'kind': 'robust', 'bot': {'compaction': {'dtype': 'int8'}}, 'method': 'search'},
+    'tfidf-top32': {'kind': 'robust', 'bot': {'compaction': {'dtype': 'float32', 'top_n': 32}},
+                    'method': 'search'},
+    'tfidf-min05': {'kind': 'robust', 'bot': {'compaction': {'dtype': 'float32', 'min_weight': 0.05}},
+                    'method': 'search'},
+    'tfidf-int8-top32': {'kind': 'robust', 'bot': {'compaction': {'dtype': 'int8', 'top_n': 32}},
+                         'method': 'search'}
+}
+
+
+class SectionLabeler:
+    """Descobre as seções (=== X ===) cobertas por um trecho de um arquivo"""
+
+    HEADER = re.compile(r'===\s*(.+?)\s*===')
+
+    def __init__(self):
+        self._files = {}
+
+    def _sections(self, source):
+        if source not in self._files:
+            with open(source, 'r', encoding='utf-8') as file:
+                text = file.read()
+            headers = [(match.start(), match.group(1)) for match in self.HEADER.finditer(text)]
+            self._files[source] = (text, headers)
+        return self._files[source]
+
+    def labels(self, source, content):
+        """Títulos das seções que o trecho cobre (vazio se não for achado no arquivo)"""
+        text, headers = self._sections(source)
+        start = text.find(content)
+        if start < 0:
+            return set()
+        end = start + len(content)
+
+        titles = set()
+        for i, (position, title) in enumerate(headers):
+            next_position = headers[i + 1][0] if i + 1 < len(headers) else len(text)
+            if position < end and next_position > start:
+                titles.add(title)
+        return titles
+
+
+def recall_at_k(ranked, relevant, k):
+    """Fração das seções relevantes cobertas pelos k primeiros resultados"""
+    found = set().union(*ranked[:k]) & relevant.keys() if ranked else set()
+    return len(found) / len(relevant)
+
+
+def reciprocal_rank(ranked, relevant):
+    for rank, labels in enumerate(ranked, 1):
+        if labels & relevant.keys():
+            return 1 / rank
+    return 0.0
+
+
+def ndcg_at_k(ranked, relevant, k):
+    """nDCG com notas graduadas; cada seção só pontua na primeira vez que aparece"""
+    seen = set()
+    dcg = 0.0
+    for rank, labels in enumerate(ranked[:k], 1):
+        new = (labels & relevant.keys()) - seen
+        seen |= new
+        gain = max((relevant[title] for title in new), default=0)
+        dcg += (2 ** gain - 1) / math.log2(rank + 1)
+
+    ideal = sorted(relevant.values(), reverse=True)[:k]
+    idcg = sum((2 ** gain - 1) / math.log2(rank + 1) for rank, gain in enumerate(ideal, 1))
+    return dcg / idcg if idcg else 0.0
+
+
+def robust_retriever(config, texts_dir, k):
+    """Bot robusto sem cache: retorna (função de busca, {documentos, bytes da matriz})"""
+    from robust_chatbot import RobustCulinariaRAGBot
+
+    bot = RobustCulinariaRAGBot(snapshot_dir=None, texts_dir=texts_dir, cache_size=0,
+                                coalesce=False, **config['bot'])
+    if not bot.setup():
+        raise RuntimeError("setup() falhou")
+
+    sources = {}
+    for doc in bot.documents:
+        sources.setdefault(doc['content'], doc['source'])
+    search = getattr(bot, config['method'])
+
+    def retrieve(query):
+        return [(sources[result['content']], result['content']) for result in search(query, k)[:k]]
+
+    matrix = bot.tfidf_matrix
+    matrix_bytes = matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+    if bot.index.row_scale is not None:
+        matrix_bytes += bot.index.row_scale.nbytes
+    return retrieve, {'documents': len(bot.documents), 'matrix_bytes': matrix_bytes, 'nnz': matrix.nnz}
+
+
+def faiss_retriever(config, texts_dir, k):
+    """FAISS montado como em create_vectorstore.py (sem gravar em data/vectorstore nem no cache de embeddings)"""
+    from langchain_community.vectorstores import FAISS
+
+    from corpus_loader import iter_text_files
+    from create_vectorstore import create_embeddings, load_documents, split_documents
+
+    chunks = split_documents(load_documents(list(iter_text_files(texts_dir))))
+    embeddings = create_embeddings(cache_dir=None, backend=config.get('backend', 'torch'))
+    vectorstore = FAISS.from_documents(documents=chunks, embedding=embeddings)
+
+    def retrieve(query):
+        return [
+            (document.metadata['source'], document.page_content)
+            for document in vectorstore.similarity_search(query, k=k)
+        ]
+
+    return retrieve, {'documents': len(chunks)}
+
+
+BUILDERS = {'robust': robust_retriever, 'faiss': faiss_retriever}
+
+
+def evaluate(name, golden, texts_dir, k):
+    """Constrói o motor e avalia todas as consultas de referência"""
+    config = RETRIEVERS[name]
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        retrieve, info = BUILDERS[config['kind']](config, texts_dir, k)
+    setup_time = time.perf_counter() - start
+
+    labeler = SectionLabeler()
+    per_query = []
+    latencies = []
+
+    for item in golden:
+        relevant = item['relevant']
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            hits = retrieve(item['query'])
+        latencies.append(time.perf_counter() - start)
+
+        ranked = [labeler.labels(source, content) for source, content in hits]
+        per_query.append({
+            'query': item['query'],
+            'recall': recall_at_k(ranked, relevant, k),
+            'mrr': reciprocal_rank(ranked, relevant),
+            'ndcg': ndcg_at_k(ranked, relevant, k),
+            'retrieved': [sorted(labels) for labels in ranked]
+        })
+
+    summary = {
+        metric: round(sum(q[metric] for q in per_query) / len(per_query), 4)
+        for metric in QUALITY_METRICS
+    }
+    summary.update({
+        'k': k,
+        **info,
+        'setup_seconds': round(setup_time, 4),
+        'latency': latency_stats(latencies),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'queries': per_query
+    })
+    return summary
+
+
+def evaluate_in_process(name, golden, texts_dir, k, queue):
+    try:
+        result = evaluate(name, golden, texts_dir, k)
+    except Exception as e:
+        result = {'error': f"{type(e).__name__}: {e}"}
+    queue.put(result)
+
+
+def run_isolated(name, golden, texts_dir, k):
+    """Avalia num processo novo, para a memória medida ser só do motor"""
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=evaluate_in_process, args=(name, golden, texts_dir, k, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def load_golden(path=GOLDEN_FILE):
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file)['queries']
+
+
+def print_report(report):
+    k = report['k']
+    print(f"\n{'motor':>16} | {'recall@' + str(k):>9} | {'MRR':>6} | {'nDCG@' + str(k):>7} | "
+          f"{'p50 ms':>7} | {'p95 ms':>7} | {'setup s':>7} | {'RSS MB':>7} | {'matriz KB':>9}")
+    for name, result in report['engines'].items():
+        if 'error' in result:
+            print(f"{name:>16} | ❌ {result['error']}")
+            continue
+        matrix_kb = f"{result['matrix_bytes'] / 1024:>9.1f}" if 'matrix_bytes' in result else f"{'-':>9}"
+        print(f"{name:>16} | {result['recall']:>9.3f} | {result['mrr']:>6.3f} | {result['ndcg']:>7.3f} | "
+              f"{result['latency']['p50_ms']:>7.2f} | {result['latency']['p95_ms']:>7.2f} | "
+              f"{result['setup_seconds']:>7.2f} | {result['peak_rss_mb']:>7.0f} | {matrix_kb}")
+
+
+def regressions(baseline, report, tolerance=0.005):
+    """Métricas de qualidade que caíram mais que a tolerância em relação à base"""
+    found = []
+    for name, result in report['engines'].items():
+        before = baseline['engines'].get(name)
+        if not before or 'error' in before or 'error' in result:
+            continue
+        for metric in QUALITY_METRICS:
+            if result[metric] < before[metric] - tolerance:
+                found.append((name, metric, before[metric], result[metric]))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Avaliação de recall@k, MRR e nDCG dos motores de busca")
+    parser.add_argument('--engines', default=",".join(RETRIEVERS),
+                        help=f"motores avaliados ({', '.join(RETRIEVERS)})")
+    parser.add_argument('--k', type=int, default=3, help="resultados por consulta")
+    parser.add_argument('--golden', default=GOLDEN_FILE, help="arquivo de consultas rotuladas")
+    parser.add_argument('--texts-dir', default=TEXTS_DIR, help="corpus avaliado")
+    parser.add_argument('--output', default=None, help="grava o relatório em JSON")
+    parser.add_argument('--check', metavar='BASELINE', default=None,
+                        help="falha se alguma métrica de qualidade cair em relação a este relatório")
+    parser.add_argument('--verbose', action='store_true', help="mostra as consultas sem acerto")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.engines.split(",") if name.strip()]
+    unknown = [name for name in names if name not in RETRIEVERS]
+    if unknown:
+        parser.error(f"motores desconhecidos: {', '.join(unknown)}")
+
+    golden = load_golden(args.golden)
+    print(f"🎯 {len(golden)} consultas de referência, k={args.k}")
+
+    report = {'k': args.k, 'golden': args.golden, 'engines': {}}
+    for name in names:
+        print(f"⏱️ Avaliando {name}...")
+        report['engines'][name] = run_isolated(name, golden, args.texts_dir, args.k)
+
+    print_report(report)
+
+    if args.verbose:
+        for name, result in report['engines'].items():
+            for query in result.get('queries', []):
+                if query['mrr'] == 0:
+                    print(f"😔 {name}: '{query['query']}' -> {query['retrieved']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"💾 Relatório em {args.output}")
+
+    if args.check:
+        with open(args.check, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+        found = regressions(baseline, report)
+        for name, metric, before, after in found:
+            print(f"⚠️ {name}: {metric} caiu de {before:.3f} para {after:.3f}")
+        if found:
+            sys.exit(1)
+        print("✅ Nenhuma perda de qualidade em relação à base")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Embeddings por feature hashing em NumPy (modo sem modelo)
+
+Cada texto é normalizado (minúsculas, pontuação ASCII vira espaço) e quebrado em
+n-gramas de bytes UTF-8 (3 a 5 por padrão, com espaços nas bordas, então
+começo e fim de palavra viram features). Cada n-grama recebe um hash
+FNV-1a de 64 bits seguido de uma mistura de bits: os bits altos escolhem a
+dimensão e o bit baixo o sinal. O vetor é a soma com sinal das features,
+normalizada em L2.
+
+Tudo é vetorizado sobre o lote inteiro (os hashes dos n-gramas de todos os
+textos saem de operações em arrays, sem laço por caractere) e o hash não
+depende do hash() do Python, que muda a cada processo: o mesmo texto gera
+o mesmo vetor em qualquer processo ou máquina, então um índice salvo pode
+ser consultado depois.
+"""
+
+import numpy as np
+
+DEFAULT_DIMENSION = 384
+DEFAULT_NGRAM_RANGE = (3, 5)
+DEFAULT_BATCH_SIZE = 1024
+
+_FNV_OFFSET = np.uint64(0xcbf29ce484222325)
+_FNV_PRIME = np.uint64(0x100000001b3)
+_MIX = (np.uint64(0xff51afd7ed558ccd), np.uint64(0xc4ceb9fe1a85ec53))
+_SPACE = ord(' ')
+# Bytes ASCII que não são letra nem dígito viram espaço (bytes >= 0x80, de letras acentuadas, ficam)
+_SEPARATORS = bytes(
+    byte if chr(byte).isalnum() or byte >= 0x80 else _SPACE for byte in range(256)
+)
+
+
+def normalize_batch(texts):
+    """
+    Bytes de ' texto ' em minúsculas, sem pontuação e com espaços repetidos
+    colapsados, de todos os textos em sequência, e o texto de cada byte.
+    Os espaços nas bordas marcam começo e fim de palavra.
+    """
+    encoded = [f" {text.lower()} ".encode('utf-8') for text in texts]
+    lengths = np.fromiter((len(data) for data in encoded), dtype=np.int64, count=len(encoded))
+    data = np.frombuffer(b"".join(encoded).translate(_SEPARATORS), dtype=np.uint8)
+    owners = np.repeat(np.arange(len(texts)), lengths)
+
+    # Espaço logo depois de outro espaço do mesmo texto é descartado
+    keep = np.ones(len(data), dtype=bool)
+    keep[1:] = ~((data[1:] == _SPACE) & (data[:-1] == _SPACE) & (owners[1:] == owners[:-1]))
+    return data[keep], owners[keep]
+
+
+def _mix(hashes):
+    """Finalizador do MurmurHash3 (64 bits): espalha os bits antes do módulo"""
+    hashes ^= hashes >> np.uint64(33)
+    hashes *= _MIX[0]
+    hashes ^= hashes >> np.uint64(33)
+    hashes *= _MIX[1]
+    hashes ^= hashes >> np.uint64(33)
+    return hashes
+
+
+class HashingEmbedder:
+    """Embedder determinístico sem treino: encode(textos) -> float32 (n, dimension)"""
+
+    def __init__(self, dimension=DEFAULT_DIMENSION, ngram_range=DEFAULT_NGRAM_RANGE):
+        low, high = ngram_range
+        if dimension < 1 or not 1 <= low <= high:
+            raise ValueError(f"Parâmetros inválidos: dimension={dimension}, ngram_range={ngram_range}")
+        self.dimension = dimension
+        self.ngram_range = (low, high)
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def _encode_batch(self, texts):
+        data, owners = normalize_batch(texts)  # owners: texto de cada byte
+        data = data.astype(np.uint64)
+
+        vectors = np.zeros(len(texts) * self.dimension, dtype=np.float64)
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            count = len(data) - n + 1
+            if count <= 0:
+                continue
+            # Hash de todas as posições com fatias contíguas; depois ficam só os
+            # n-gramas que não cruzam a fronteira entre dois textos
+            hashes = np.full(count, _FNV_OFFSET ^ np.uint64(n), dtype=np.uint64)
+            for offset in range(n):
+                hashes ^= data[offset:offset + count]
+                hashes *= _FNV_PRIME
+            starts = np.flatnonzero(owners[:count] == owners[n - 1:])
+            hashes = _mix(hashes[starts])
+
+            columns = (hashes >> np.uint64(1)) % np.uint64(self.dimension)
+            signs = np.where(hashes & np.uint64(1), 1.0, -1.0)
+            cells = owners[starts] * self.dimension + columns.astype(np.int64)
+            vectors += np.bincount(cells, weights=signs, minlength=len(vectors))
+
+        vectors = vectors.reshape(len(texts), self.dimension)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).astype(np.float32)
+
+    def encode(self, texts, batch_size=DEFAULT_BATCH_SIZE, convert_to_numpy=True, show_progress_bar=False):
+        """Vetores float32 normalizados (n, dimension), na ordem dos textos"""
+        if isinstance(texts, str):
+            return self.encode([texts], batch_size)[0]
+        if not len(texts):
+            return np.empty((0, self.dimension), dtype=np.float32)
+        return np.concatenate([self._encode_batch(list(texts[start:start + batch_size]))
+                               for start in range(0, len(texts), batch_size)])
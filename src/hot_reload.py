@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Hot reload da base de conhecimento do chatbot robusto
+
+Observa o diretório de textos do bot (polling de mtime/tamanho, sem
+dependências extras) e, quando algo muda ou quando trigger() é chamado,
+reconstrói o índice numa thread de fundo e o publica com
+RobustCulinariaRAGBot.swap_index().
+"""
+
+import os
+import threading
+
+from corpus_loader import iter_text_files
+
+
+def directory_state(path, extensions=(".txt",)):
+    """Assinatura barata do diretório: (arquivo, mtime, tamanho) de cada texto"""
+    state = []
+    for file_path in iter_text_files(path, extensions):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            continue
+        state.append((file_path, stat.st_mtime_ns, stat.st_size))
+    return tuple(state)
+
+
+class HotReloader:
+    def __init__(self, bot, watch_dir=None, interval=2.0, incremental=True):
+        self.bot = bot
+        self.watch_dir = watch_dir or bot.texts_dir
+        self.interval = interval  # Segundos entre verificações
+        self.incremental = incremental
+        self.reloads = 0
+        self.last_error = None
+        self._indexer = None  # IncrementalIndexer reaproveitado (assinaturas e hashes entre recargas)
+        self._state = directory_state(self.watch_dir)
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def trigger(self):
+        """Pede uma recarga explícita (executada na thread de fundo)"""
+        self._wakeup.set()
+
+    def _reload(self):
+        try:
+            indexer = None
+            if self.incremental:
+                if self._indexer is None:
+                    from incremental_index import IncrementalIndexer
+                    self._indexer = IncrementalIndexer(self.bot)
+                indexer = self._indexer
+            if self.bot.reload(incremental=self.incremental, indexer=indexer):
+                self.reloads += 1
+                self.last_error = None
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"❌ Erro no hot reload: {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            requested = self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            if self._stop.is_set():
+                break
+
+            state = directory_state(self.watch_dir)
+            if requested or state != self._state:
+                self._state = state
+                if requested:
+                    print("🔄 Recarga solicitada")
+                else:
+                    print(f"👀 Mudança detectada em {self.watch_dir}, recarregando...")
+                self._reload()
+
+    def start(self):
+        """Inicia o watcher em uma thread daemon"""
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="hot-reloader", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Interrompe o watcher"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
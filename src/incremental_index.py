@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Indexação incremental do chatbot robusto
+
+Compara o hash de cada arquivo de data/texts com o hash indexado e só
+re-divide e re-vetoriza os arquivos novos ou alterados: linhas antigas
+viram tombstones e as novas são anexadas à matriz TF-IDF com o
+vocabulário/IDF atuais. Uma compactação periódica refaz o fit completo
+para remover tombstones e atualizar vocabulário e IDF.
+
+O indexador guarda entre as chamadas as assinaturas MinHash (pelo id do
+chunk) e o mtime/tamanho de cada arquivo: quando o índice muda de versão
+por fora (compactação, recarga completa, snapshot), só os chunks que
+entraram ou saíram são assinados de novo, e scan() só relê o hash dos
+arquivos cujo mtime ou tamanho mudou.
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+from scipy import sparse
+
+from index_snapshot import file_hash
+
+
+class IncrementalIndexer:
+    def __init__(self, bot, max_tombstone_ratio=0.25, max_appended_ratio=0.25,
+                 refresh_interval=24 * 3600):
+        self.bot = bot
+        self.max_tombstone_ratio = max_tombstone_ratio
+        self.max_appended_ratio = max_appended_ratio
+        self.refresh_interval = refresh_interval  # Segundos até forçar novo fit
+        self._rows_by_file = None
+        self._seen_content = None  # NearDuplicateIndex pelo id do chunk (sobrevive às versões)
+        self._ids_by_file = {}  # Arquivo -> ids assinados em _seen_content
+        self._signed_hashes = {}  # Arquivo -> hash do conteúdo dessas assinaturas
+        self._file_stats = {}  # Arquivo -> ((mtime_ns, tamanho), hash)
+        self._lookup_version = None  # Versão do índice usada no lookup
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _build_lookup(self):
+        """
+        Mapeia arquivo -> linhas vivas e sincroniza as assinaturas MinHash
+        com o índice atual: só chunks novos (ou de arquivos cujo conteúdo
+        mudou) são assinados; os que sumiram saem do LSH.
+        """
+        index = self.bot.index
+        if self._seen_content is None:
+            self._seen_content = self.bot.new_dedup_index()
+        self._lookup_version = index.version
+
+        documents = index.documents
+        self._rows_by_file = {}
+        live = np.flatnonzero(~np.asarray(documents.deleted, dtype=bool))
+        for row in live.tolist():
+            self._rows_by_file.setdefault(documents.source(row), []).append(row)
+
+        for file_path in list(self._ids_by_file):
+            if self._signed_hashes.get(file_path) != index.file_hashes.get(file_path):
+                self._forget_file(file_path)
+
+        for file_path, rows in self._rows_by_file.items():
+            ids = {documents.doc_id(row): row for row in rows}
+            signed = self._ids_by_file.get(file_path, set())
+            for chunk_id in signed - ids.keys():
+                self._seen_content.remove(chunk_id)
+            for chunk_id in ids.keys() - signed:
+                signature = self._seen_content.signature(documents.content(ids[chunk_id]))
+                self._seen_content.insert(chunk_id, signature)
+            self._ids_by_file[file_path] = set(ids)
+            self._signed_hashes[file_path] = index.file_hashes.get(file_path)
+
+    def _forget_file(self, file_path):
+        """Tira do LSH as assinaturas de um arquivo"""
+        for chunk_id in self._ids_by_file.pop(file_path, ()):
+            self._seen_content.remove(chunk_id)
+        self._signed_hashes.pop(file_path, None)
+
+    def current_file_hashes(self):
+        """
+        Hash de cada arquivo do corpus; arquivos com o mesmo mtime e tamanho
+        da última verificação reaproveitam o hash, sem reler o conteúdo.
+        """
+        current = {}
+        stats = {}
+        for file_path in self.bot.text_files:
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            key = (stat.st_mtime_ns, stat.st_size)
+            cached = self._file_stats.get(file_path)
+            digest = cached[1] if cached and cached[0] == key else file_hash(file_path)
+            stats[file_path] = (key, digest)
+            current[file_path] = digest
+        self._file_stats = stats
+        return current
+
+    def scan(self):
+        """Retorna (adicionados, alterados, removidos, hashes atuais)"""
+        current = self.current_file_hashes()
+
+        indexed = self.bot.file_hashes
+        added = [f for f in current if f not in indexed]
+        changed = [f for f in current if f in indexed and current[f] != indexed[f]]
+        removed = [f for f in indexed if f not in current]
+        return added, changed, removed, current
+
+    def update(self):
+        """Aplica o delta dos arquivos em uma nova versão do índice e a publica"""
+        bot = self.bot
+        index = bot.index
+        if index is None:
+            return False
+
+        added, changed, removed, current = self.scan()
+        if not (added or changed or removed):
+            print("✅ Índice já está atualizado")
+            return True
+
+        print(f"🔄 Incremental: +{len(added)} ~{len(changed)} -{len(removed)} arquivos")
+
+        if self._lookup_version != index.version:
+            self._build_lookup()
+        self._lookup_version = None  # Se a atualização falhar no meio, a próxima ressincroniza
+
+        # Trabalha sobre cópias: o índice em uso continua intacto
+        documents = index.documents
+        tombstones = index.tombstones.copy()
+
+        # Tombstones para as linhas de arquivos alterados ou removidos
+        dead_rows = []
+        for file_path in changed + removed:
+            self._forget_file(file_path)
+            for row in self._rows_by_file.pop(file_path, []):
+                dead_rows.append(row)
+                tombstones[row] = True
+        if dead_rows:
+            documents = documents.mark_deleted(dead_rows)
+
+        # Re-divide somente os arquivos novos ou alterados
+        new_docs = []
+        for file_path in added + changed:
+            new_docs.extend(bot.chunk_file(file_path))
+        new_docs = bot.unique_documents(new_docs, self._seen_content)
+        for file_path in added + changed:
+            self._signed_hashes[file_path] = current[file_path]
+
+        tfidf_matrix = index.tfidf_matrix
+        row_scale = index.row_scale
+        if new_docs:
+            first_row = len(documents)
+            new_matrix = index.vectorizer.transform([doc['content'] for doc in new_docs])
+            new_matrix, new_scale = bot.compact(new_matrix)
+            tfidf_matrix = sparse.vstack([tfidf_matrix, new_matrix], format='csr')
+            if row_scale is not None:
+                row_scale = np.concatenate([row_scale, new_scale])
+
+            for offset, doc in enumerate(new_docs):
+                self._rows_by_file.setdefault(doc['source'], []).append(first_row + offset)
+                self._ids_by_file.setdefault(doc['source'], set()).add(doc['id'])
+
+            documents = documents.extend(new_docs)
+            tombstones = np.concatenate([tombstones, np.zeros(len(new_docs), dtype=bool)])
+
+        # Índice simples: remove linhas mortas e adiciona as novas
+        simple_index = {}
+        for keyword, indices in index.simple_index.items():
+            kept = [i for i in indices if not tombstones[i]]
+            for offset, doc in enumerate(new_docs):
+                if keyword in doc['content'].lower():
+                    kept.append(len(documents) - len(new_docs) + offset)
+            simple_index[keyword] = kept
+
+        # BM25: só os chunks novos são tokenizados; removidos ficam nos tombstones
+        bm25 = index.bm25
+        if bot.engine == 'bm25':
+            if bm25 is None:
+                bm25 = bot.create_bm25_index(documents)
+            elif new_docs:
+                bm25 = bm25.extend(doc['content'] for doc in new_docs)
+
+        new_index = index.replace(
+            documents=documents,
+            tfidf_matrix=tfidf_matrix,
+            row_scale=row_scale,
+            simple_index=simple_index,
+            bm25=bm25,
+            tombstones=tombstones,
+            file_hashes=current,
+            appended_rows=index.appended_rows + len(new_docs)
+        )
+        bot.swap_index(new_index)
+        self._lookup_version = new_index.version
+
+        print(f"✅ Incremental: {len(new_docs)} linhas novas, {int(tombstones.sum())} tombstones")
+        return True
+
+    def needs_compaction(self):
+        """Indica se já vale refazer o fit (tombstones, anexos ou idade do IDF)"""
+        bot = self.bot
+        total = len(bot.documents)
+        if total == 0:
+            return False
+
+        dead = int(bot.tombstones.sum())
+        live = max(total - dead, 1)
+
+        if dead / total > self.max_tombstone_ratio:
+            return True
+        if bot.appended_rows / live > self.max_appended_ratio:
+            return True
+        if bot.fitted_at and time.time() - bot.fitted_at > self.refresh_interval:
+            return True
+        return False
+
+    def compact(self):
+        """Refaz o fit completo: remove tombstones e atualiza vocabulário/IDF"""
+        print("🧹 Compactando índice (novo fit do TF-IDF)...")
+        return self.bot.create_vectorstore()
+
+    def maybe_compact(self):
+        """Compacta somente quando necessário"""
+        if self.needs_compaction():
+            return self.compact()
+        return False
+
+    def start(self, interval=60):
+        """Verifica o corpus periodicamente em uma thread de fundo"""
+        if self._thread and self._thread.is_alive():
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.bot.reload(incremental=True, indexer=self)
+                except Exception as e:
+                    print(f"❌ Erro na indexação incremental: {e}")
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=run, name="incremental-indexer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Interrompe a verificação periódica"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
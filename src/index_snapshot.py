@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Snapshot versionado do índice TF-IDF em disco
+
+Guarda documentos (store compacto de document_store), vocabulário/IDF e a matriz CSR (arrays brutos
+indptr/indices/data em .npy) para que o chatbot robusto possa iniciar
+com um simples mmap, sem reler os textos nem reajustar o TfidfVectorizer.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from corpus_loader import file_hash  # noqa: F401 (reexportado)
+from document_store import DocumentStore
+
+SNAPSHOT_VERSION = 4
+MANIFEST_FILE = "manifest.json"
+
+
+def corpus_hash(file_hashes, params=None):
+    """Calcula o hash do corpus a partir dos hashes por arquivo + parâmetros do índice"""
+    digest = hashlib.sha256()
+    digest.update(f"snapshot-v{SNAPSHOT_VERSION}".encode("utf-8"))
+
+    if params is not None:
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode("utf-8"))
+
+    for file_path in sorted(file_hashes):
+        digest.update(file_path.replace(os.sep, "/").encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(file_hashes[file_path].encode("utf-8"))
+        digest.update(b"\0")
+
+    return digest.hexdigest()
+
+
+def save_snapshot(path, corpus_key, documents, vocabulary, idf, tfidf_matrix, simple_index=None, bm25=None,
+                  state=None, row_scale=None):
+    """
+    Grava o snapshot de forma atômica (diretório temporário + rename).
+
+    state é um dicionário JSON livre guardado no manifesto (ex.: hashes por
+    arquivo da indexação incremental). row_scale é a escala por linha de
+    uma matriz compactada em int8.
+    """
+    from scipy import sparse
+
+    matrix = sparse.csr_matrix(tfidf_matrix)
+    index_dtype = np.int32 if matrix.nnz < np.iinfo(np.int32).max else np.int64
+
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".snapshot-", dir=parent)
+
+    try:
+        np.save(os.path.join(tmp_dir, "indptr.npy"), matrix.indptr.astype(index_dtype))
+        np.save(os.path.join(tmp_dir, "indices.npy"), matrix.indices.astype(index_dtype))
+        np.save(os.path.join(tmp_dir, "data.npy"), matrix.data)
+        np.save(os.path.join(tmp_dir, "idf.npy"), np.asarray(idf))
+        if row_scale is not None:
+            np.save(os.path.join(tmp_dir, "row_scale.npy"), np.asarray(row_scale))
+
+        documents.save(os.path.join(tmp_dir, "documents"))
+
+        # Vocabulário como lista ordenada pelo índice da coluna
+        terms = [None] * len(vocabulary)
+        for term, column in vocabulary.items():
+            terms[column] = term
+        with open(os.path.join(tmp_dir, "vocabulary.json"), "w", encoding="utf-8") as file:
+            json.dump(terms, file, ensure_ascii=False)
+
+        with open(os.path.join(tmp_dir, "simple_index.json"), "w", encoding="utf-8") as file:
+            json.dump(simple_index or {}, file, ensure_ascii=False)
+
+        if bm25 is not None:
+            bm25.save(os.path.join(tmp_dir, "bm25"))
+
+        manifest = {
+            "version": SNAPSHOT_VERSION,
+            "corpus_hash": corpus_key,
+            "created_at": time.time(),
+            "shape": list(matrix.shape),
+            "nnz": int(matrix.nnz),
+            "documents": len(documents),
+            "state": state or {},
+        }
+        with open(os.path.join(tmp_dir, MANIFEST_FILE), "w", encoding="utf-8") as file:
+            json.dump(manifest, file, indent=2)
+
+        if os.path.exists(path):
+            old_dir = f"{path}.old-{os.getpid()}"
+            os.replace(path, old_dir)
+            os.replace(tmp_dir, path)
+            shutil.rmtree(old_dir, ignore_errors=True)
+        else:
+            os.replace(tmp_dir, path)
+
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    return manifest
+
+
+def read_manifest(path):
+    """Lê o manifesto do snapshot (None se não existir ou for inválido)"""
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def load_snapshot(path, corpus_key=None, mmap=True):
+    """
+    Carrega o snapshot se a versão e o hash do corpus conferirem.
+
+    Retorna um dicionário com documents, vocabulary, idf, tfidf_matrix,
+    row_scale (None se a matriz não for int8), simple_index e bm25_path
+    (None se o snapshot não tiver BM25), ou None
+    quando o snapshot está ausente ou desatualizado.
+    """
+    manifest = read_manifest(path)
+    if manifest is None or manifest.get("version") != SNAPSHOT_VERSION:
+        return None
+    if corpus_key is not None and manifest.get("corpus_hash") != corpus_key:
+        return None
+
+    mmap_mode = "r" if mmap else None
+
+    indptr = np.load(os.path.join(path, "indptr.npy"), mmap_mode=mmap_mode)
+    indices = np.load(os.path.join(path, "indices.npy"), mmap_mode=mmap_mode)
+    data = np.load(os.path.join(path, "data.npy"), mmap_mode=mmap_mode)
+    idf = np.load(os.path.join(path, "idf.npy"))
+    row_scale_path = os.path.join(path, "row_scale.npy")
+    row_scale = np.load(row_scale_path) if os.path.exists(row_scale_path) else None
+
+    from scipy import sparse
+
+    tfidf_matrix = sparse.csr_matrix(
+        (data, indices, indptr), shape=tuple(manifest["shape"]), copy=False
+    )
+
+    documents = DocumentStore.load(os.path.join(path, "documents"), mmap=mmap)
+    with open(os.path.join(path, "vocabulary.json"), "r", encoding="utf-8") as file:
+        vocabulary = {term: column for column, term in enumerate(json.load(file))}
+    with open(os.path.join(path, "simple_index.json"), "r", encoding="utf-8") as file:
+        simple_index = json.load(file)
+
+    bm25_path = os.path.join(path, "bm25")
+
+    return {
+        "manifest": manifest,
+        "documents": documents,
+        "vocabulary": vocabulary,
+        "idf": idf,
+        "tfidf_matrix": tfidf_matrix,
+        "row_scale": row_scale,
+        "simple_index": simple_index,
+        "bm25_path": bm25_path if os.path.isdir(bm25_path) else None,
+    }
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Memória do processo (RSS atual e pico) em MB, em qualquer sistema
+
+O módulo resource só existe em POSIX; no Windows os valores vêm de
+GetProcessMemoryInfo (ctypes). Onde nenhum dos dois está disponível as
+funções retornam 0.0 em vez de falhar, para que os relatórios de build e
+de benchmark continuem rodando.
+"""
+
+import os
+import sys
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _windows_memory():
+    """(working set atual, pico) em bytes pelo GetProcessMemoryInfo, ou None"""
+    try:
+        import ctypes
+        from ctypes import wintypes
+    except ImportError:
+        return None
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [
+            ('cb', wintypes.DWORD),
+            ('PageFaultCount', wintypes.DWORD),
+            ('PeakWorkingSetSize', ctypes.c_size_t),
+            ('WorkingSetSize', ctypes.c_size_t),
+            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+            ('PagefileUsage', ctypes.c_size_t),
+            ('PeakPagefileUsage', ctypes.c_size_t)
+        ]
+
+    try:
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return None
+    except (AttributeError, OSError):
+        return None
+    return counters.WorkingSetSize, counters.PeakWorkingSetSize
+
+
+def peak_rss_mb():
+    """Pico de RSS deste processo em MB"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            return peak / 1e6  # bytes no macOS
+        return peak / 1e3  # KB no Linux
+
+    memory = _windows_memory() if sys.platform == 'win32' else None
+    return memory[1] / 1e6 if memory else 0.0
+
+
+def current_rss_mb():
+    """RSS atual deste processo em MB (Linux e Windows; no resto, o pico)"""
+    try:
+        with open('/proc/self/statm', 'r') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except (OSError, AttributeError, ValueError):
+        pass
+
+    memory = _windows_memory() if sys.platform == 'win32' else None
+    return memory[0] / 1e6 if memory else peak_rss_mb()
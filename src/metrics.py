@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Métricas da cascata de busca no formato de texto do Prometheus
+
+Histogramas de latência por estágio (com p50/p95/p99 de uma janela das
+últimas medições), contadores de qual ramo da cascata respondeu e
+gauges de tamanho do índice. BotMetrics liga tudo a um
+RobustCulinariaRAGBot; render() produz o texto servido em /metrics.
+"""
+
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUANTILES = (0.5, 0.95, 0.99)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_METRICS_HOST = "127.0.0.1"
+
+
+def _labels(label, value, **extra):
+    pairs = [(label, value)] if label else []
+    pairs += extra.items()
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{val}"' for key, val in pairs) + "}"
+
+
+def _number(value):
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def percentile(sorted_values, q):
+    """Percentil por posição mais próxima de uma lista já ordenada"""
+    if not sorted_values:
+        return 0.0
+    position = min(len(sorted_values) - 1, max(0, round(q * len(sorted_values)) - 1))
+    return sorted_values[position]
+
+
+class Counter:
+    def __init__(self, name, help, label=None):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.values = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def inc(self, label_value=None, amount=1):
+        with self._lock:
+            self.values[label_value] += amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for label_value, value in sorted(self.values.items(), key=lambda item: str(item[0])):
+            lines.append(f"{self.name}{_labels(self.label, label_value)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    """Histograma cumulativo + janela das últimas medições para percentis"""
+
+    def __init__(self, name, help, label=None, buckets=DEFAULT_BUCKETS, window=2048):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.buckets = tuple(buckets) + (float('inf'),)
+        self.window = window
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _get_series(self, label_value):
+        series = self._series.get(label_value)
+        if series is None:
+            series = self._series[label_value] = {
+                'counts': [0] * len(self.buckets),
+                'sum': 0.0,
+                'count': 0,
+                'recent': deque(maxlen=self.window)
+            }
+        return series
+
+    def observe(self, value, label_value=None):
+        with self._lock:
+            series = self._get_series(label_value)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+                    break
+            series['sum'] += value
+            series['count'] += 1
+            series['recent'].append(value)
+
+    @contextmanager
+    def time(self, label_value=None):
+        """Mede a duração do bloco em segundos"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, label_value)
+
+    def percentiles(self, label_value=None, quantiles=QUANTILES):
+        """Percentis da janela recente: {quantil: segundos}"""
+        with self._lock:
+            series = self._series.get(label_value)
+            recent = sorted(series['recent']) if series else []
+        return {q: percentile(recent, q) for q in quantiles}
+
+    def labels(self):
+        return list(self._series)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        quantile_lines = [
+            f"# HELP {self.name}_recent {self.help} (últimas {self.window} medições)",
+            f"# TYPE {self.name}_recent summary"
+        ]
+
+        with self._lock:
+            snapshot = {
+                label_value: (list(series['counts']), series['sum'], series['count'], sorted(series['recent']))
+                for label_value, series in self._series.items()
+            }
+
+        for label_value in sorted(snapshot, key=str):
+            counts, total, count, recent = snapshot[label_value]
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = _labels(self.label, label_value, le=_number(bound))
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label, label_value)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label, label_value)} {count}")
+
+            for q in QUANTILES:
+                labels = _labels(self.label, label_value, quantile=q)
+                quantile_lines.append(f"{self.name}_recent{labels} {_number(percentile(recent, q))}")
+            quantile_lines.append(f"{self.name}_recent_sum{_labels(self.label, label_value)} {_number(sum(recent))}")
+            quantile_lines.append(f"{self.name}_recent_count{_labels(self.label, label_value)} {len(recent)}")
+
+        return lines + quantile_lines
+
+
+class Gauge:
+    """Valor lido na hora da exportação: func() retorna um número ou {rótulo: número}"""
+
+    def __init__(self, name, help, func, label=None, kind='gauge'):
+        self.name = name
+        self.help = help
+        self.func = func
+        self.label = label
+        self.kind = kind  # 'counter' para totais mantidos por outro objeto
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        values = self.func()
+        if values is None:
+            return lines
+        if not isinstance(values, dict):
+            values = {None: values}
+        for label_value, value in values.items():
+            lines.append(f"{self.name}{_labels(self.label, label_value)} {_number(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Todas as métricas no formato de texto do Prometheus"""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Ramo da cascata de search() que produziu o primeiro resultado
+BRANCHES = {
+    'tfidf': 'tfidf',
+    'bm25': 'bm25',
+    'simple': 'keyword',
+    'substring': 'substring'
+}
+
+
+class BotMetrics(Registry):
+    """Métricas de um RobustCulinariaRAGBot"""
+
+    def __init__(self, bot):
+        super().__init__()
+        self.bot = bot
+
+        self.stages = self.register(Histogram(
+            "rag_stage_seconds", "Latência de cada estágio de ask()", label="stage"
+        ))
+        self.branches = self.register(Counter(
+            "rag_searches_total", "Buscas executadas por ramo da cascata que respondeu", label="branch"
+        ))
+
+        self.register(Gauge("rag_index_version", "Versão do índice ativo", lambda: self._index_value('version')))
+        self.register(Gauge("rag_index_documents", "Documentos no índice", lambda: self._index_value('documents')))
+        self.register(Gauge(
+            "rag_index_active_documents", "Documentos não removidos", lambda: self._index_value('active')
+        ))
+        self.register(Gauge(
+            "rag_index_vocabulary_terms", "Termos no vocabulário TF-IDF", lambda: self._index_value('vocabulary')
+        ))
+        self.register(Gauge(
+            "rag_index_matrix_nonzeros", "Elementos não nulos da matriz TF-IDF", lambda: self._index_value('nnz')
+        ))
+        self.register(Gauge(
+            "rag_index_matrix_bytes", "Bytes dos arrays da matriz TF-IDF", lambda: self._index_value('bytes')
+        ))
+
+        self.register(Gauge(
+            "rag_cache_requests_total", "Consultas ao cache de respostas",
+            lambda: self._stats(bot.cache, hit='hits', miss='misses'), label="result", kind='counter'
+        ))
+        self.register(Gauge(
+            "rag_cache_evictions_total", "Entradas descartadas por LRU",
+            lambda: self._stats(bot.cache, 'evictions'), kind='counter'
+        ))
+        self.register(Gauge(
+            "rag_coalesced_total", "Perguntas atendidas pelo cálculo em andamento de outra",
+            lambda: self._stats(bot.flights, 'coalesced'), kind='counter'
+        ))
+
+    @staticmethod
+    def _stats(source, key=None, **labelled):
+        """Lê contadores de stats() (cache, single-flight); None se desativado"""
+        if source is None:
+            return None
+        stats = source.stats()
+        if labelled:
+            return {label: stats[name] for label, name in labelled.items()}
+        return stats[key]
+
+    def _index_value(self, field):
+        index = self.bot.index
+        if index is None:
+            return None
+        if field == 'version':
+            return index.version
+        if field == 'documents':
+            return len(index.documents)
+        if field == 'active':
+            return len(index.documents) - int(index.tombstones.sum())
+        if field == 'vocabulary':
+            return len(index.vectorizer.vocabulary_)
+        matrix = index.tfidf_matrix
+        if field == 'nnz':
+            return matrix.nnz
+        total = matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+        if index.row_scale is not None:
+            total += index.row_scale.nbytes  # Escala por linha da matriz int8
+        return total
+
+    def count_branch(self, results):
+        """Conta qual ramo da cascata respondeu"""
+        branch = BRANCHES.get(results[0].get('method'), 'unknown') if results else 'none'
+        self.branches.inc(branch)
+
+
+def serve_metrics(registry, host=DEFAULT_METRICS_HOST, port=9108):
+    """
+    Serve registry.render() em http://host:port/metrics numa thread daemon.
+    Só localhost por padrão; host="0.0.0.0" libera o scrape externo.
+    """
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            payload = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, name="metrics", daemon=True)
+    thread.start()
+    return server
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Detecção de quase-duplicatas com MinHash + LSH por bandas
+
+Cada documento vira um conjunto de shingles (sequências de palavras) e
+uma assinatura MinHash; a assinatura é cortada em bandas e documentos
+que colidem em alguma banda são candidatos. Só os candidatos têm a
+similaridade de Jaccard estimada, então o custo por documento é
+constante e a passada pelo corpus é linear.
+
+Substitui o hash dos 100 primeiros caracteres: pega a mesma receita com
+outra primeira linha e não junta trechos diferentes com o mesmo começo.
+"""
+
+import re
+import zlib
+
+import numpy as np
+
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_NUM_PERM = 64
+DEFAULT_SHINGLE_SIZE = 3
+
+_PRIME = np.uint64(4294967311)  # Primo logo acima de 2**32
+_TOKEN = re.compile(r'\w+')
+
+
+def shingles(text, size=DEFAULT_SHINGLE_SIZE):
+    """Sequências de `size` palavras (minúsculas) do texto"""
+    tokens = _TOKEN.findall(text.lower())
+    if len(tokens) <= size:
+        return {" ".join(tokens) or text.strip()}
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def lsh_params(threshold, num_perm):
+    """(bandas, linhas por banda) com limiar de colisão (1/b)^(1/r) logo abaixo de threshold"""
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        collision = (1 / bands) ** (1 / rows)
+        # Limiar de colisão abaixo do pedido: perde menos duplicatas, a verificação filtra o resto
+        if collision <= threshold and (best is None or collision > best[0]):
+            best = (collision, bands, rows)
+    if best is None:
+        return num_perm, 1
+    return best[1], best[2]
+
+
+class NearDuplicateIndex:
+    """Índice LSH incremental: add() diz se o texto é quase-duplicata de um já visto"""
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM,
+                 shingle_size=DEFAULT_SHINGLE_SIZE, seed=1):
+        if not 0 < threshold <= 1:
+            raise ValueError(f"threshold deve estar em (0, 1]: {threshold}")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+
+        # Permutações (a * x + b) mod p, com x o crc32 do shingle
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 2 ** 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 2 ** 32, size=num_perm, dtype=np.uint64)
+
+        self._buckets = [{} for _ in range(self.bands)]  # banda -> {bytes da banda: [chaves]}
+        self._signatures = {}  # chave -> assinatura
+
+        self.checked = 0
+        self.removed = 0
+        self.removed_bytes = 0  # Texto (UTF-8) que deixou de ser indexado
+
+    def signature(self, text):
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode('utf-8')) for shingle in shingles(text, self.shingle_size)),
+            dtype=np.uint64
+        )
+        values = (np.outer(self._a, hashes) + self._b[:, None]) % _PRIME
+        return values.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def find(self, signature):
+        """Chave de um documento já indexado com similaridade >= threshold, ou None"""
+        checked = set()
+        for band, key in self._band_keys(signature):
+            for candidate in self._buckets[band].get(key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                similarity = np.count_nonzero(self._signatures[candidate] == signature) / self.num_perm
+                if similarity >= self.threshold:
+                    return candidate
+        return None
+
+    def insert(self, key, signature):
+        self._signatures[key] = signature
+        for band, band_key in self._band_keys(signature):
+            self._buckets[band].setdefault(band_key, []).append(key)
+
+    def add(self, key, text):
+        """Indexa o texto sob `key`; se for quase-duplicata, não indexa e retorna a chave original"""
+        self.checked += 1
+        signature = self.signature(text)
+        original = self.find(signature)
+        if original is not None:
+            self.removed += 1
+            self.removed_bytes += len(text.encode('utf-8'))
+            return original
+        self.insert(key, signature)
+        return None
+
+    def remove(self, key):
+        """Tira um documento do índice (ex.: linha marcada como removida)"""
+        signature = self._signatures.pop(key, None)
+        if signature is None:
+            return
+        for band, band_key in self._band_keys(signature):
+            bucket = self._buckets[band].get(band_key)
+            if bucket is None:
+                continue
+            bucket.remove(key)
+            if not bucket:
+                del self._buckets[band][band_key]
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def stats(self):
+        return {
+            'documents': len(self._signatures),
+            'checked': self.checked,
+            'removed': self.removed,
+            'removed_bytes': self.removed_bytes,
+            'threshold': self.threshold,
+            'bands': self.bands,
+            'rows': self.rows
+        }
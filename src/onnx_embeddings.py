@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Backend ONNX Runtime (opcionalmente int8) para o modelo sentence-transformers
+
+O transformer do modelo é exportado uma vez para ONNX (data/onnx/<modelo>),
+com o tokenizador e a configuração do pooling ao lado. A versão int8 usa
+quantização dinâmica dos pesos. Na execução só entram onnxruntime e o
+tokenizador: o pooling (média/CLS/máximo) e a normalização são feitos em
+NumPy, então o PyTorch só é preciso para exportar.
+
+OnnxEncoder expõe encode() e get_sentence_embedding_dimension() como o
+SentenceTransformer, e pode ser usado no lugar dele no EmbeddingPipeline.
+validate_backend() compara com o PyTorch: concordância de cosseno, recall@k
+dos vizinhos, latência por consulta e memória.
+
+Uso:
+    python src/create_vectorstore.py --embedding-backend onnx-int8 --onnx-threads 4
+    python src/create_vectorstore.py --compare-backends onnx,onnx-int8
+"""
+
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+from memory_usage import current_rss_mb
+
+ONNX_PATH = "data/onnx"
+BACKENDS = ('torch', 'onnx', 'onnx-int8')
+CONFIG_FILE = "onnx_config.json"
+MODEL_FILES = {'onnx': "model.onnx", 'onnx-int8': "model.int8.onnx"}
+OPSET_VERSION = 14
+
+
+def model_dir(model_name, path=ONNX_PATH):
+    return os.path.join(path, re.sub(r'[^\w.-]+', '_', model_name))
+
+
+def export_onnx(model_name, path=ONNX_PATH):
+    """Exporta o transformer do modelo para ONNX (só na primeira vez); retorna a pasta"""
+    output_dir = model_dir(model_name, path)
+    if os.path.exists(os.path.join(output_dir, CONFIG_FILE)):
+        return output_dir
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    print(f"📦 Exportando {model_name} para ONNX em {output_dir}...")
+    model = SentenceTransformer(model_name, device='cpu')
+    transformer = model[0].auto_model.eval()
+    os.makedirs(output_dir, exist_ok=True)
+    model.tokenizer.save_pretrained(output_dir)
+
+    sample = model.tokenizer(["exemplo de texto"], return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in sample]
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names + ['last_hidden_state']}
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer, tuple(sample[name] for name in input_names),
+            os.path.join(output_dir, MODEL_FILES['onnx']),
+            input_names=input_names, output_names=['last_hidden_state'],
+            dynamic_axes=dynamic_axes, opset_version=OPSET_VERSION
+        )
+
+    pooling = model[1].get_pooling_mode_str()
+    if pooling not in ('mean', 'cls', 'max'):
+        raise ValueError(f"Pooling sem suporte no backend ONNX: {pooling}")
+
+    config = {
+        'model': model_name,
+        'pooling': pooling,
+        'normalize': any(type(module).__name__ == 'Normalize' for module in model),
+        'max_seq_length': model.max_seq_length,
+        'dimension': model.get_sentence_embedding_dimension(),
+        'input_names': input_names
+    }
+    # Config por último: a pasta só vale como exportada se ele existir
+    with open(os.path.join(output_dir, CONFIG_FILE), 'w', encoding='utf-8') as file:
+        json.dump(config, file, indent=2)
+    print(f"✅ ONNX exportado ({os.path.getsize(os.path.join(output_dir, MODEL_FILES['onnx'])) / 1e6:.0f} MB)")
+    return output_dir
+
+
+def quantize_onnx(output_dir):
+    """Quantização dinâmica int8 dos pesos (só na primeira vez); retorna o caminho do modelo"""
+    quantized = os.path.join(output_dir, MODEL_FILES['onnx-int8'])
+    if not os.path.exists(quantized):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        print("📦 Quantizando o modelo ONNX para int8...")
+        tmp_path = quantized + ".tmp"
+        quantize_dynamic(os.path.join(output_dir, MODEL_FILES['onnx']), tmp_path, weight_type=QuantType.QInt8)
+        os.replace(tmp_path, quantized)
+        print(f"✅ Modelo int8: {os.path.getsize(quantized) / 1e6:.0f} MB")
+    return quantized
+
+
+def pool(hidden, mask, mode):
+    """Pooling do sentence-transformers em NumPy: (lote, tokens, dim) -> (lote, dim)"""
+    if mode == 'cls':
+        return hidden[:, 0]
+    mask = mask[..., None].astype(hidden.dtype)
+    if mode == 'max':
+        return np.where(mask > 0, hidden, -1e9).max(axis=1)
+    return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+
+class OnnxEncoder:
+    """Encoder ONNX Runtime com a interface de encode() do SentenceTransformer"""
+
+    def __init__(self, model_name, quantize=True, threads=None, path=ONNX_PATH):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        output_dir = export_onnx(model_name, path)
+        with open(os.path.join(output_dir, CONFIG_FILE), 'r', encoding='utf-8') as file:
+            self.config = json.load(file)
+        self.backend = 'onnx-int8' if quantize else 'onnx'
+        self.model_path = quantize_onnx(output_dir) if quantize else os.path.join(output_dir, MODEL_FILES['onnx'])
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads or 0  # 0: o ONNX Runtime escolhe (núcleos físicos)
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(self.model_path, options, providers=['CPUExecutionProvider'])
+        self.tokenizer = AutoTokenizer.from_pretrained(output_dir)
+        self.threads = threads
+
+    def get_sentence_embedding_dimension(self):
+        return self.config['dimension']
+
+    def _encode_batch(self, texts):
+        tokens = self.tokenizer(texts, padding=True, truncation=True,
+                                max_length=self.config['max_seq_length'], return_tensors='np')
+        inputs = {name: tokens[name].astype(np.int64) for name in self.config['input_names']}
+        hidden = self.session.run(['last_hidden_state'], inputs)[0]
+        vectors = pool(hidden, tokens['attention_mask'], self.config['pooling'])
+        if self.config['normalize']:
+            vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors.astype(np.float32, copy=False)
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, show_progress_bar=False):
+        """Vetores float32 (n, dimensão), como SentenceTransformer.encode"""
+        if isinstance(texts, str):
+            return self.encode([texts], batch_size)[0]
+        if not texts:
+            return np.empty((0, self.config['dimension']), dtype=np.float32)
+        return np.concatenate([self._encode_batch(list(texts[start:start + batch_size]))
+                               for start in range(0, len(texts), batch_size)])
+
+
+def load_encoder(model_name, backend, threads=None):
+    """(encoder, MB de RSS acrescentados pela carga)"""
+    rss = current_rss_mb()
+    if backend == 'torch':
+        from sentence_transformers import SentenceTransformer
+        encoder = SentenceTransformer(model_name, device='cpu')
+    else:
+        encoder = OnnxEncoder(model_name, quantize=backend == 'onnx-int8', threads=threads)
+    return encoder, current_rss_mb() - rss
+
+
+def normalized(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return vectors / np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+
+def validate_backend(reference, candidate, documents, queries, k=10, batch_size=32):
+    """
+    Compara dois encoders nos mesmos textos: cosseno entre os vetores de
+    cada documento, recall@k dos vizinhos (consultas x documentos, cosseno)
+    do candidato contra os da referência, latência de uma consulta e
+    vazão em lote.
+    """
+    def timed(encoder):
+        start = time.perf_counter()
+        vectors = normalized(encoder.encode(documents, batch_size=batch_size))
+        batch_seconds = time.perf_counter() - start
+
+        latencies = []
+        query_vectors = []
+        for query in queries:
+            start = time.perf_counter()
+            query_vectors.append(encoder.encode([query], batch_size=1)[0])
+            latencies.append((time.perf_counter() - start) * 1000)
+        return vectors, normalized(query_vectors), batch_seconds, latencies
+
+    ref_docs, ref_queries, ref_seconds, ref_latencies = timed(reference)
+    cand_docs, cand_queries, cand_seconds, cand_latencies = timed(candidate)
+
+    agreement = np.sum(ref_docs * cand_docs, axis=1)
+    k = min(k, len(documents))
+    ref_top = np.argsort(-(ref_queries @ ref_docs.T), axis=1)[:, :k]
+    cand_top = np.argsort(-(cand_queries @ cand_docs.T), axis=1)[:, :k]
+    recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(ref_top, cand_top)])
+
+    return {
+        'documents': len(documents),
+        'queries': len(queries),
+        'cosine_mean': round(float(agreement.mean()), 5),
+        'cosine_min': round(float(agreement.min()), 5),
+        f'recall@{k}': round(float(recall), 4),
+        'query_p50_ms': round(float(np.percentile(cand_latencies, 50)), 3),
+        'reference_query_p50_ms': round(float(np.percentile(ref_latencies, 50)), 3),
+        'chunks_per_second': round(len(documents) / cand_seconds, 1),
+        'reference_chunks_per_second': round(len(documents) / ref_seconds, 1)
+    }
+
+
+def compare_backends(model_name, documents, queries, backends=('onnx', 'onnx-int8'), k=10, threads=None):
+    """Valida cada backend ONNX contra o PyTorch e imprime qualidade, latência e memória"""
+    print(f"\n⚖️ Validando backends contra torch: {len(documents)} chunks, {len(queries)} consultas")
+    reference, reference_mb = load_encoder(model_name, 'torch')
+    print(f"📊 {'torch':>10}: +{reference_mb:.0f} MB de RSS ao carregar")
+
+    report = []
+    for backend in backends:
+        candidate, candidate_mb = load_encoder(model_name, backend, threads)
+        stats = validate_backend(reference, candidate, documents, queries, k)
+        stats.update({
+            'backend': backend,
+            'threads': threads or 0,
+            'load_rss_mb': round(candidate_mb, 1),
+            'reference_load_rss_mb': round(reference_mb, 1),
+            'model_mb': round(os.path.getsize(candidate.model_path) / 1e6, 1)
+        })
+        recall_key = next(key for key in stats if key.startswith('recall@'))
+        print(f"📊 {backend:>10}: cosseno médio {stats['cosine_mean']:.4f} (mín {stats['cosine_min']:.4f}) | "
+              f"{recall_key} {stats[recall_key]:.3f} | consulta p50 {stats['query_p50_ms']:.1f} ms "
+              f"(torch {stats['reference_query_p50_ms']:.1f}) | {stats['chunks_per_second']:.0f} chunks/s "
+              f"(torch {stats['reference_chunks_per_second']:.0f}) | modelo {stats['model_mb']:.0f} MB | "
+              f"+{stats['load_rss_mb']:.0f} MB de RSS")
+        report.append(stats)
+    return report
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Construção paralela do índice TF-IDF
+
+Cada processo do pool tokeniza e aplica hashing num shard de chunks
+(HashingVectorizer não tem vocabulário, então os workers não compartilham
+estado). O processo principal soma as frequências de documento dos
+shards, calcula o IDF uma única vez e empilha as matrizes.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+# Parâmetros do hashing (equivalentes aos do TfidfVectorizer do bot)
+HASHING_PARAMS = {
+    'n_features': 2 ** 20,
+    'lowercase': True,
+    'ngram_range': (1, 3),
+    'token_pattern': r'[a-záàâãéêíóôõúçA-Z]+',
+    'alternate_sign': False,
+    'norm': None
+}
+
+
+class HashingTfidfVectorizer:
+    """
+    Transformador TF-IDF sobre HashingVectorizer com IDF já calculado.
+
+    Expõe transform(), vocabulary_ e idf_ como o TfidfVectorizer usado
+    pelo bot; vocabulary_ fica vazio porque o hashing não guarda termos.
+    """
+
+    def __init__(self, idf, params=None):
+        self.params = dict(params or HASHING_PARAMS)
+        self.hasher = HashingVectorizer(**self.params)
+        self.idf_ = np.asarray(idf)
+        self.vocabulary_ = {}
+
+    def transform(self, texts):
+        return weight_counts(self.hasher.transform(texts), self.idf_)
+
+
+def weight_counts(counts, idf):
+    """Aplica tf sublinear, IDF e normalização L2 a uma matriz de contagens"""
+    matrix = sparse.csr_matrix(counts, dtype=np.float64, copy=True)
+    np.log(matrix.data, out=matrix.data)
+    matrix.data += 1.0  # sublinear_tf: 1 + log(tf)
+    matrix = matrix @ sparse.diags(idf)
+    return normalize(matrix, norm='l2', copy=False).tocsr()
+
+
+def hash_shard(texts, params=None):
+    """Worker: contagens por hashing + frequência de documento do shard"""
+    hasher = HashingVectorizer(**(params or HASHING_PARAMS))
+    counts = hasher.transform(texts).tocsr()
+    counts.sum_duplicates()
+    df = np.bincount(counts.indices, minlength=counts.shape[1])
+    return counts, df
+
+
+def split_shards(texts, n_shards):
+    """Divide a lista em n_shards fatias contíguas (ordem preservada)"""
+    size = max(1, -(-len(texts) // n_shards))
+    return [texts[i:i + size] for i in range(0, len(texts), size)]
+
+
+def parallel_fit_transform(texts, workers=None, shards_per_worker=4, params=None):
+    """
+    Ajusta o TF-IDF por hashing em paralelo.
+
+    Retorna (vectorizer, tfidf_matrix) com as linhas na mesma ordem de texts.
+    """
+    texts = list(texts)
+    params = dict(params or HASHING_PARAMS)
+    workers = workers or os.cpu_count() or 1
+
+    shards = split_shards(texts, workers * shards_per_worker)
+
+    if workers == 1:
+        results = [hash_shard(shard, params) for shard in shards]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(hash_shard, shards, [params] * len(shards)))
+
+    # Junta as frequências de documento e calcula o IDF uma única vez
+    n_docs = len(texts)
+    df = np.zeros(params['n_features'], dtype=np.int64)
+    for _, shard_df in results:
+        df += shard_df
+    idf = np.log((1 + n_docs) / (1 + df)) + 1  # smooth_idf, como no sklearn
+
+    counts = sparse.vstack([shard_counts for shard_counts, _ in results], format='csr')
+    vectorizer = HashingTfidfVectorizer(idf, params)
+    return vectorizer, weight_counts(counts, idf)
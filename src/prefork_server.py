@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Servidor HTTP pre-fork do chatbot robusto com índice compartilhado
+
+O processo principal monta o índice uma única vez, publica-o em memória
+compartilhada (shared_index) e abre o socket; cada worker se conecta ao
+bloco somente leitura e atende requisições no mesmo socket. Mais workers
+aumentam a vazão sem duplicar a memória do índice.
+
+Uso:
+    python src/prefork_server.py --workers 4 --port 8000
+    curl "http://localhost:8000/ask?q=como+fazer+brigadeiro"
+    curl "http://localhost:8000/metrics"  # métricas do worker que atendeu
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.append(os.path.dirname(__file__))
+
+from metrics import CONTENT_TYPE
+from robust_chatbot import ENGINES, RobustCulinariaRAGBot
+from shared_index import SharedIndex
+
+class ChatbotHandler(BaseHTTPRequestHandler):
+    bot = None
+    
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        
+        if url.path == '/ask' and params.get('q'):
+            body = {'answer': self.bot.ask(params['q'][0]), 'worker': os.getpid()}
+            status = 200
+        elif url.path == '/metrics':
+            payload = self.bot.metrics.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+        elif url.path == '/health':
+            index = self.bot.index
+            body = {'status': 'ok', 'version': index.version, 'documents': len(index.documents)}
+            status = 200
+        else:
+            body = {'error': "use /ask?q=..."}
+            status = 404
+        
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def log_message(self, format, *args):
+        pass  # Sem log por requisição
+
+def worker_main(segment_name, listen_socket, engine):
+    """Worker: conecta ao índice compartilhado e atende no socket herdado"""
+    shared = SharedIndex.attach(segment_name)
+    
+    bot = RobustCulinariaRAGBot(snapshot_dir=None, engine=engine)
+    bot.index = shared.knowledge_index(engine)
+    ChatbotHandler.bot = bot
+    
+    server = HTTPServer(listen_socket.getsockname(), ChatbotHandler, bind_and_activate=False)
+    server.socket.close()
+    server.socket = listen_socket
+    
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor pre-fork com índice compartilhado")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--host', default="0.0.0.0")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--engine', choices=ENGINES, default='tfidf')
+    args = parser.parse_args()
+    
+    bot = RobustCulinariaRAGBot(engine=args.engine)
+    if not bot.setup():
+        print("❌ Falha no setup")
+        return
+    
+    shared = SharedIndex.create(bot.index)
+    size_mb = shared.segment.size / 1e6
+    print(f"🧠 Índice em memória compartilhada: {shared.name} ({size_mb:.1f} MB)")
+    
+    # Descarta a cópia privada: daqui em diante só o bloco compartilhado
+    bot.index = None
+    
+    listen_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listen_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listen_socket.bind((args.host, args.port))
+    listen_socket.listen(128)
+    
+    context = multiprocessing.get_context('fork')
+    workers = [
+        context.Process(target=worker_main, args=(shared.name, listen_socket, args.engine), daemon=True)
+        for _ in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+    
+    print(f"🚀 {args.workers} workers em http://{args.host}:{args.port}/ask?q=...")
+    
+    # SIGTERM também passa pelo finally (remove o bloco compartilhado)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    
+    try:
+        signal.pause()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print("\n🍴 Encerrando...")
+        for worker in workers:
+            worker.terminate()
+            worker.join()
+        listen_socket.close()
+        shared.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Cache de resultados de consultas
+
+LRU limitado com TTL opcional na frente de ask()/search(). As entradas
+pertencem a uma versão do índice: quando o bot troca de KnowledgeIndex
+o cache é esvaziado, então nunca responde com documentos de outra versão.
+"""
+
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+DEFAULT_CACHE_SIZE = 1024
+
+
+def normalize_query(query):
+    """
+    Forma canônica da pergunta: acentos compostos (NFC), minúsculas e
+    espaços colapsados. Os acentos não são removidos porque o vocabulário
+    do TF-IDF diferencia 'dendê' de 'dende'.
+    """
+    query = unicodedata.normalize('NFC', query)
+    return re.sub(r'\s+', ' ', query).strip().lower()
+
+
+class QueryCache:
+    def __init__(self, max_size=DEFAULT_CACHE_SIZE, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl  # Segundos de validade (None: sem expiração)
+        self.version = None  # Versão do índice das entradas atuais
+        self._entries = OrderedDict()  # chave -> (instante, valor)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self, version):
+        if version != self.version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self.version = version
+
+    def get(self, key, version):
+        """Valor em cache para a chave na versão do índice, ou None"""
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, version, value):
+        """Guarda o valor; descarta o menos usado recentemente se lotar"""
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Contadores do cache"""
+        total = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'version': self.version
+        }
@@ -3,26 +3,224 @@
 Chatbot RAG Super Robusta - Garantido para funcionar
 """
 
+import argparse
+import itertools
+import logging
 import os
 import re
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import threading
+import time
 import numpy as np
 
+from bm25_engine import BM25Index
+from corpus_loader import DEFAULT_BUFFER_SIZE, TEXTS_DIR, iter_file_chunks, iter_text_files
+from document_store import DocumentStore
+from index_snapshot import corpus_hash, file_hash, load_snapshot, save_snapshot
+from query_cache import DEFAULT_CACHE_SIZE, QueryCache, normalize_query
+from metrics import DEFAULT_METRICS_HOST, BotMetrics, serve_metrics
+from near_duplicates import DEFAULT_THRESHOLD as DEFAULT_DEDUP_THRESHOLD
+from near_duplicates import NearDuplicateIndex
+from single_flight import SingleFlight
+from sparse_compaction import DEFAULT_COMPACTION, MATRIX_DTYPES, compact_matrix, matrix_nbytes, similarities
+
+SNAPSHOT_DIR = "data/index"
+
+# Parâmetros do TF-IDF (também fazem parte da chave do snapshot)
+TFIDF_PARAMS = {
+    'max_features': 2000,
+    'lowercase': True,
+    'stop_words': None,  # SEM stop words
+    'ngram_range': (1, 3),  # Unigrams, bigrams E trigrams
+    'max_df': 0.95,  # Muito permissivo
+    'min_df': 1,     # Inclui tudo
+    'token_pattern': r'[a-záàâãéêíóôõúçA-Z]+',  # Aceita tudo
+    'sublinear_tf': True,
+    'norm': 'l2'
+}
+
+# Caracteres de cada trecho na resposta (a seção-mãe, com expand_context, mostra mais)
+ANSWER_CHARS = 400
+SECTION_ANSWER_CHARS = 1200
+
+# Motores disponíveis para a busca principal de search()
+ENGINES = ('tfidf', 'bm25')
+
+# Modos de construção: fit do TfidfVectorizer ou hashing paralelo
+BUILD_MODES = ('fit', 'parallel')
+
+_index_versions = itertools.count(1)
+
+# Mensagens do caminho das perguntas (busca/resposta) vão para o log
+logger = logging.getLogger(__name__)
+
+class KnowledgeIndex:
+    """
+    Índice imutável de uma versão da base de conhecimento.
+    
+    Documentos, vectorizer, matriz TF-IDF, BM25 e índice simples andam
+    juntos: o bot troca a referência inteira de uma vez, então uma busca
+    nunca vê documentos de uma versão com a matriz de outra.
+    """
+    
+    def __init__(self, documents, vectorizer, tfidf_matrix, simple_index, bm25=None,
+                 tombstones=None, file_hashes=None, appended_rows=0, fitted_at=None, row_scale=None,
+                 memory_mapped=False):
+        self.documents = documents
+        self.vectorizer = vectorizer
+        self.tfidf_matrix = tfidf_matrix
+        self.row_scale = row_scale  # Escala por linha da matriz int8 (None nos outros tipos)
+        self.memory_mapped = memory_mapped  # Matriz somente leitura (mmap do snapshot ou memória compartilhada)
+        self.simple_index = simple_index  # Índice simples para fallback
+        self.bm25 = bm25
+        
+        # Estado da indexação incremental
+        if tombstones is None:
+            tombstones = np.zeros(len(documents), dtype=bool)
+        self.tombstones = tombstones  # Linhas removidas da matriz
+        self.file_hashes = file_hashes or {}  # Arquivo -> hash do conteúdo indexado
+        self.appended_rows = appended_rows  # Linhas adicionadas desde o último fit
+        self.fitted_at = fitted_at
+        
+        self.searcher = None  # ShardedSearcher desta versão (modo particionado)
+        self.version = next(_index_versions)
+    
+    def replace(self, **changes):
+        """Cria uma nova versão do índice com os campos alterados"""
+        fields = {
+            'documents': self.documents,
+            'vectorizer': self.vectorizer,
+            'tfidf_matrix': self.tfidf_matrix,
+            'simple_index': self.simple_index,
+            'bm25': self.bm25,
+            'tombstones': self.tombstones,
+            'file_hashes': self.file_hashes,
+            'appended_rows': self.appended_rows,
+            'fitted_at': self.fitted_at,
+            'row_scale': self.row_scale,
+            'memory_mapped': self.memory_mapped
+        }
+        fields.update(changes)
+        return KnowledgeIndex(**fields)
+    
+    @property
+    def compacted(self):
+        """Matriz em float32/int8 (busca por produto escalar em vez de cosine_similarity)"""
+        return self.row_scale is not None or self.tfidf_matrix.dtype != np.float64
+    
+    @property
+    def dot_product(self):
+        """
+        Busca por produto escalar: matriz compactada, do snapshot ou da memória
+        compartilhada (linhas já normalizadas; cosine_similarity copiaria a
+        matriz somente leitura a cada consulta)
+        """
+        return self.compacted or self.memory_mapped
+
 class RobustCulinariaRAGBot:
-    def __init__(self):
-        self.documents = []
-        self.vectorizer = None
-        self.tfidf_matrix = None
-        self.simple_index = {}  # Índice simples para fallback
-        self.vectorstore_loaded = False
-        
-    def create_simple_index(self):
+    def __init__(self, snapshot_dir=SNAPSHOT_DIR, engine='tfidf', text_files=None,
+                 texts_dir=TEXTS_DIR, buffer_size=DEFAULT_BUFFER_SIZE,
+                 build_mode='fit', workers=None, shards=0, cache_size=DEFAULT_CACHE_SIZE,
+                 cache_ttl=None, coalesce=True, dedup_threshold=DEFAULT_DEDUP_THRESHOLD,
+                 expand_context=False, compaction=None):
+        if engine not in ENGINES:
+            raise ValueError(f"Motor desconhecido: {engine} (use {', '.join(ENGINES)})")
+        if build_mode not in BUILD_MODES:
+            raise ValueError(f"Modo de construção desconhecido: {build_mode} (use {', '.join(BUILD_MODES)})")
+        
+        self.index = None  # KnowledgeIndex atual (trocado atomicamente)
+        self.snapshot_dir = snapshot_dir  # None desativa o snapshot
+        self.engine = engine
+        self.text_files = text_files  # None: todos os .txt de texts_dir
+        self.texts_dir = texts_dir
+        self.buffer_size = buffer_size  # Limite de memória da leitura em streaming
+        self.build_mode = build_mode
+        self.workers = workers  # Processos do modo paralelo (None: todos os núcleos)
+        self.shards = shards  # >1: busca TF-IDF particionada em processos
+        self.cache = QueryCache(cache_size, cache_ttl) if cache_size else None  # 0 desativa
+        self.flights = SingleFlight() if coalesce else None  # Junta perguntas iguais simultâneas
+        self.metrics = BotMetrics(self)  # Latências, ramos da cascata e tamanho do índice
+        self.dedup_threshold = dedup_threshold  # Similaridade (Jaccard) a partir da qual é duplicata
+        self.dedup_stats = None  # Resultado da última remoção de quase-duplicatas
+        self.expand_context = expand_context  # Respostas com a seção inteira de cada trecho
+        self.compaction = {**DEFAULT_COMPACTION, **(compaction or {})}  # Tipo e poda da matriz TF-IDF
+        if self.compaction['dtype'] not in MATRIX_DTYPES:
+            raise ValueError(f"Tipo de matriz desconhecido: {self.compaction['dtype']} (use {', '.join(MATRIX_DTYPES)})")
+        self._rebuild_lock = threading.Lock()  # Serializa reconstruções, não buscas
+    
+    @property
+    def text_files(self):
+        """Arquivos do corpus (relidos do diretório a cada acesso)"""
+        if self._text_files is not None:
+            return list(self._text_files)
+        return list(iter_text_files(self.texts_dir))
+    
+    @text_files.setter
+    def text_files(self, text_files):
+        self._text_files = list(text_files) if text_files else None
+    
+    # Atalhos de leitura para o índice atual
+    @property
+    def vectorstore_loaded(self):
+        return self.index is not None
+    
+    @property
+    def documents(self):
+        return self.index.documents if self.index else []
+    
+    @property
+    def vectorizer(self):
+        return self.index.vectorizer if self.index else None
+    
+    @property
+    def tfidf_matrix(self):
+        return self.index.tfidf_matrix if self.index else None
+    
+    @property
+    def simple_index(self):
+        return self.index.simple_index if self.index else {}
+    
+    @property
+    def bm25(self):
+        return self.index.bm25 if self.index else None
+    
+    @property
+    def tombstones(self):
+        return self.index.tombstones if self.index else np.zeros(0, dtype=bool)
+    
+    @property
+    def file_hashes(self):
+        return self.index.file_hashes if self.index else {}
+    
+    @property
+    def appended_rows(self):
+        return self.index.appended_rows if self.index else 0
+    
+    @property
+    def fitted_at(self):
+        return self.index.fitted_at if self.index else None
+    
+    def swap_index(self, index, grace_period=30):
+        """Publica um novo índice (atribuição atômica de referência)"""
+        if self.shards > 1 and index.searcher is None:
+            from sharded_search import ShardedSearcher
+            index.searcher = ShardedSearcher.start_local(
+                index.tfidf_matrix, index.tombstones, self.shards, index.row_scale
+            )
+        
+        previous = self.index
+        self.index = index
+        print(f"🔁 Índice v{index.version} ativo: {len(index.documents)} documentos")
+        
+        # Workers da versão antiga ficam vivos para as perguntas em andamento
+        if previous is not None and previous.searcher is not None:
+            timer = threading.Timer(grace_period, previous.searcher.close)
+            timer.daemon = True
+            timer.start()
+    
+    def create_simple_index(self, documents):
         """Cria índice simples para fallback"""
         print("📇 Criando índice simples...")
         
-        self.simple_index = {}
-        
         # Palavras-chave importantes e suas seções
         keywords = {
             'brigadeiro': [],
@@ -38,13 +236,14 @@ class RobustCulinariaRAGBot:
             'farofa': []
         }
         
-        for i, doc in enumerate(self.documents):
-            content_lower = doc['content'].lower()
+        for i in range(len(documents)):
+            if documents.is_deleted(i):
+                continue
+            content_lower = documents.content(i).lower()
             for keyword in keywords:
                 if keyword in content_lower:
                     keywords[keyword].append(i)
         
-        self.simple_index = keywords
         
         # Debug do índice
         for keyword, indices in keywords.items():
@@ -52,203 +251,521 @@ class RobustCulinariaRAGBot:
                 print(f"✅ '{keyword}': {len(indices)} documentos")
             else:
                 print(f"❌ '{keyword}': nenhum documento")
+        
+        return keywords
     
-    def load_documents(self):
-        """Carrega documentos de forma muito robusta"""
-        print("📚 Carregando documentos...")
+    def iter_file_documents(self, file_path):
+        """Gera os documentos de um arquivo em streaming (parágrafos de cada seção ===, com a seção-mãe)"""
+        print(f"📄 Processando {file_path}...")
         
-        text_files = [
-            "data/texts/receitas_brasileiras.txt",
-            "data/texts/ingredientes_brasileiros.txt", 
-            "data/texts/tecnicas_culinarias.txt"
-        ]
+        try:
+            yield from iter_file_chunks(
+                file_path,
+                buffer_size=self.buffer_size,
+                max_chunk_chars=self.buffer_size
+            )
+        except Exception as e:
+            print(f"❌ Erro em {file_path}: {e}")
+    
+    def chunk_file(self, file_path):
+        """Divide um arquivo em documentos"""
+        return list(self.iter_file_documents(file_path))
+    
+    def new_dedup_index(self):
+        """Índice MinHash/LSH vazio com o limiar configurado"""
+        return NearDuplicateIndex(self.dedup_threshold)
+    
+    def iter_unique_documents(self, documents, dedup=None):
+        """
+        Remove quase-duplicatas à medida que os documentos chegam.
         
-        documents = []
-        
-        for file_path in text_files:
-            if os.path.exists(file_path):
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as file:
-                        content = file.read()
-                    
-                    print(f"📄 Processando {file_path}...")
-                    
-                    # Método 1: Por seções ===
-                    sections = content.split('===')
-                    for i, section in enumerate(sections):
-                        section = section.strip()
-                        if len(section) > 100:
-                            documents.append({
-                                'content': section,
-                                'source': file_path,
-                                'type': 'section',
-                                'id': f"{file_path}_section_{i}"
-                            })
-                    
-                    # Método 2: Por parágrafos grandes
-                    paragraphs = content.split('\n\n')
-                    for i, para in enumerate(paragraphs):
-                        para = para.strip()
-                        if len(para) > 100:
-                            documents.append({
-                                'content': para,
-                                'source': file_path,
-                                'type': 'paragraph',
-                                'id': f"{file_path}_para_{i}"
-                            })
-                    
-                except Exception as e:
-                    print(f"❌ Erro em {file_path}: {e}")
-        
-        # Remove duplicatas
-        unique_docs = []
-        seen_content = set()
+        dedup é um NearDuplicateIndex (já com os chunks indexados, na
+        indexação incremental); os documentos mantidos entram nele pelo id
+        do chunk, que não muda quando as linhas são renumeradas.
+        """
+        dedup = self.new_dedup_index() if dedup is None else dedup
         
         for doc in documents:
-            content_hash = hash(doc['content'][:100])  # Hash dos primeiros 100 chars
-            if content_hash not in seen_content:
-                unique_docs.append(doc)
-                seen_content.add(content_hash)
-        
-        print(f"✅ {len(unique_docs)} documentos únicos carregados")
-        return unique_docs
+            if dedup.add(doc['id'], doc['content']) is None:
+                yield doc
     
-    def create_vectorstore(self):
-        """Cria vectorstore com máxima robustez"""
-        print("🗃️ Criando vectorstore robusto...")
+    def unique_documents(self, documents, dedup=None):
+        """Remove quase-duplicatas (MinHash/LSH)"""
+        return list(self.iter_unique_documents(documents, dedup))
+    
+    def load_documents(self):
+        """Carrega documentos de forma muito robusta"""
+        print("📚 Carregando documentos...")
         
-        self.documents = self.load_documents()
+        hashes = {}
+        
+        def stream():
+            for file_path in self.text_files:
+                if os.path.exists(file_path):
+                    hashes[file_path] = file_hash(file_path)
+                    yield from self.iter_file_documents(file_path)
+        
+        # Remove quase-duplicatas à medida que os chunks chegam e guarda o texto no store compacto
+        dedup = self.new_dedup_index()
+        documents = DocumentStore.from_documents(self.iter_unique_documents(stream(), dedup))
+        self.dedup_stats = dedup.stats()
+        
+        removed = self.dedup_stats['removed']
+        if removed:
+            print(f"🧹 {removed} quase-duplicatas removidas "
+                  f"({removed / self.dedup_stats['checked']:.1%} dos chunks, "
+                  f"{self.dedup_stats['removed_bytes'] / 1024:.1f} KB de texto)")
+        print(f"✅ {len(documents)} documentos únicos carregados")
+        return documents, hashes
+    
+    def build_index(self):
+        """Constrói um KnowledgeIndex novo sem tocar no índice em uso"""
+        documents, hashes = self.load_documents()
         
-        if not self.documents:
+        if not documents:
             print("❌ Nenhum documento!")
-            return False
+            return None
         
         # Cria índice simples primeiro
-        self.create_simple_index()
+        simple_index = self.create_simple_index(documents)
         
-        # Prepara textos
-        texts = [doc['content'] for doc in self.documents]
+        # Textos entram no vectorizer direto do store
+        texts = documents.contents()
         
         try:
-            # TF-IDF mais permissivo
-            self.vectorizer = TfidfVectorizer(
-                max_features=2000,
-                lowercase=True,
-                stop_words=None,  # SEM stop words
-                ngram_range=(1, 3),  # Unigrams, bigrams E trigrams
-                max_df=0.95,  # Muito permissivo
-                min_df=1,     # Inclui tudo
-                token_pattern=r'[a-záàâãéêíóôõúçA-Z]+',  # Aceita tudo
-                sublinear_tf=True,
-                norm='l2'
-            )
-            
-            self.tfidf_matrix = self.vectorizer.fit_transform(texts)
+            if self.build_mode == 'parallel':
+                # Hashing em shards num pool de processos, IDF aplicado uma vez
+                from parallel_build import parallel_fit_transform
+                
+                vectorizer, tfidf_matrix = parallel_fit_transform(texts, self.workers)
+                print(f"✅ TF-IDF (hashing paralelo): {tfidf_matrix.shape}")
+            else:
+                # TF-IDF mais permissivo
+                from sklearn.feature_extraction.text import TfidfVectorizer
+                
+                vectorizer = TfidfVectorizer(**TFIDF_PARAMS)
+                
+                tfidf_matrix = vectorizer.fit_transform(texts)
+                
+                print(f"✅ TF-IDF: {tfidf_matrix.shape}")
+                print(f"📖 Vocabulário: {len(vectorizer.vocabulary_)}")
+                
+                # Testa palavras importantes
+                test_words = ['brigadeiro', 'feijoada', 'dendê', 'açaí']
+                for word in test_words:
+                    if word in vectorizer.vocabulary_:
+                        print(f"✅ '{word}' no vocabulário")
+                    else:
+                        print(f"❌ '{word}' FALTANDO")
             
-            print(f"✅ TF-IDF: {self.tfidf_matrix.shape}")
-            print(f"📖 Vocabulário: {len(self.vectorizer.vocabulary_)}")
+            self.report_dedup_saving(tfidf_matrix)
+            tfidf_matrix, row_scale = self.compact(tfidf_matrix)
             
-            # Testa palavras importantes
-            test_words = ['brigadeiro', 'feijoada', 'dendê', 'açaí']
-            for word in test_words:
-                if word in self.vectorizer.vocabulary_:
-                    print(f"✅ '{word}' no vocabulário")
-                else:
-                    print(f"❌ '{word}' FALTANDO")
+            bm25 = self.create_bm25_index(documents) if self.engine == 'bm25' else None
             
-            self.vectorstore_loaded = True
-            return True
+            return KnowledgeIndex(
+                documents,
+                vectorizer,
+                tfidf_matrix,
+                simple_index,
+                bm25,
+                file_hashes=hashes,
+                fitted_at=time.time(),
+                row_scale=row_scale
+            )
             
         except Exception as e:
             print(f"❌ Erro TF-IDF: {e}")
+            return None
+    
+    def report_dedup_saving(self, tfidf_matrix):
+        """Estima quanto a remoção de quase-duplicatas poupou na matriz TF-IDF"""
+        stats = self.dedup_stats
+        if not stats or not stats['removed'] or not tfidf_matrix.shape[0]:
+            return
+        
+        matrix_bytes = tfidf_matrix.data.nbytes + tfidf_matrix.indices.nbytes
+        saved = matrix_bytes / tfidf_matrix.shape[0] * stats['removed']
+        stats['saved_matrix_bytes'] = int(saved)
+        print(f"📉 Índice ~{saved / 1024:.1f} KB menor "
+              f"({stats['removed']} linhas a menos na matriz, {saved / (matrix_bytes + saved):.1%})")
+    
+    def compact(self, tfidf_matrix):
+        """Aplica a compactação configurada: retorna (matriz, escala por linha)"""
+        if self.compaction == DEFAULT_COMPACTION:
+            return tfidf_matrix, None
+        
+        before = matrix_nbytes(tfidf_matrix)
+        tfidf_matrix, row_scale = compact_matrix(tfidf_matrix, **self.compaction)
+        after = matrix_nbytes(tfidf_matrix, row_scale)
+        print(f"🗜️ Matriz compactada ({self.compaction['dtype']}): "
+              f"{before / 1024:.1f} KB -> {after / 1024:.1f} KB, {tfidf_matrix.nnz} valores")
+        return tfidf_matrix, row_scale
+    
+    def create_vectorstore(self):
+        """Cria vectorstore com máxima robustez"""
+        print("🗃️ Criando vectorstore robusto...")
+        
+        index = self.build_index()
+        if index is None:
+            return False
+        
+        self.swap_index(index)
+        return True
+    
+    def create_bm25_index(self, documents):
+        """Cria o índice invertido BM25 sobre os documentos"""
+        bm25 = BM25Index(token_pattern=TFIDF_PARAMS['token_pattern'])
+        bm25.fit(documents.contents())
+        print(f"✅ BM25: {len(bm25.vocabulary)} termos, {len(bm25.doc_ids)} postings")
+        return bm25
+    
+    def current_file_hashes(self):
+        """Hash atual de cada arquivo do corpus presente em disco"""
+        return {
+            file_path: file_hash(file_path)
+            for file_path in self.text_files
+            if os.path.exists(file_path)
+        }
+    
+    def index_params(self):
+        """Parâmetros que definem o índice (fazem parte da chave do snapshot)"""
+        if self.build_mode == 'parallel':
+            from parallel_build import HASHING_PARAMS
+            return {'build_mode': 'parallel', **HASHING_PARAMS, 'dedup_threshold': self.dedup_threshold,
+                    'compaction': self.compaction}
+        return {**TFIDF_PARAMS, 'dedup_threshold': self.dedup_threshold, 'compaction': self.compaction}
+    
+    def corpus_key(self, file_hashes=None):
+        """Hash de conteúdo do corpus usado como chave do snapshot"""
+        if file_hashes is None:
+            file_hashes = self.current_file_hashes()
+        return corpus_hash(file_hashes, self.index_params())
+    
+    def save_snapshot(self):
+        """Grava o índice atual em disco para inícios rápidos"""
+        index = self.index
+        if not self.snapshot_dir or index is None:
+            return False
+        
+        try:
+            manifest = save_snapshot(
+                self.snapshot_dir,
+                self.corpus_key(index.file_hashes),
+                index.documents,
+                index.vectorizer.vocabulary_,
+                index.vectorizer.idf_,
+                index.tfidf_matrix,
+                index.simple_index,
+                index.bm25,
+                row_scale=index.row_scale,
+                state={
+                    'files': index.file_hashes,
+                    'appended_rows': index.appended_rows,
+                    'fitted_at': index.fitted_at
+                }
+            )
+            print(f"💾 Snapshot salvo em {self.snapshot_dir} ({manifest['nnz']} valores)")
+            return True
+        except Exception as e:
+            print(f"⚠️ Não foi possível salvar snapshot: {e}")
             return False
     
-    def search_tfidf(self, query, k=3):
+    def load_snapshot(self, match_corpus=True):
+        """Carrega o índice do snapshot se o corpus não mudou"""
+        if not self.snapshot_dir:
+            return False
+        
+        try:
+            corpus_key = self.corpus_key() if match_corpus else None
+            snapshot = load_snapshot(self.snapshot_dir, corpus_key)
+        except Exception as e:
+            print(f"⚠️ Snapshot inválido: {e}")
+            return False
+        
+        if snapshot is None:
+            print("📦 Snapshot ausente ou desatualizado")
+            return False
+        
+        documents = snapshot['documents']
+        
+        # Reconstrói o vectorizer sem reajustar
+        if self.build_mode == 'parallel':
+            from parallel_build import HashingTfidfVectorizer
+            vectorizer = HashingTfidfVectorizer(snapshot['idf'])
+        else:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            
+            vectorizer = TfidfVectorizer(**TFIDF_PARAMS)
+            vectorizer.vocabulary_ = snapshot['vocabulary']
+            vectorizer.idf_ = snapshot['idf']
+        
+        bm25 = None
+        if self.engine == 'bm25':
+            if snapshot['bm25_path']:
+                bm25 = BM25Index.load(snapshot['bm25_path'])
+            else:
+                bm25 = self.create_bm25_index(documents)
+        
+        state = snapshot['manifest'].get('state', {})
+        index = KnowledgeIndex(
+            documents,
+            vectorizer,
+            snapshot['tfidf_matrix'],
+            snapshot['simple_index'],
+            bm25,
+            tombstones=np.array(documents.deleted, dtype=bool),
+            file_hashes=state.get('files', {}),
+            appended_rows=state.get('appended_rows', 0),
+            fitted_at=state.get('fitted_at'),
+            row_scale=snapshot['row_scale'],
+            memory_mapped=True
+        )
+        
+        print(f"⚡ Snapshot carregado: {index.tfidf_matrix.shape}")
+        self.swap_index(index)
+        return True
+    
+    def make_result(self, index, idx, similarity, method, content=None, **extra):
+        """Resultado de busca: folha (linha e seção-mãe) + score do método"""
+        idx = int(idx)
+        return {
+            'content': index.documents.content(idx) if content is None else content,
+            'similarity': similarity,
+            'method': method,
+            'row': idx,
+            'parent': index.documents.parent(idx),
+            **extra
+        }
+    
+    def search_tfidf(self, query, k=3, index=None):
         """Busca usando TF-IDF"""
+        index = index or self.index
         try:
-            query_vector = self.vectorizer.transform([query.lower()])
-            similarities = cosine_similarity(query_vector, self.tfidf_matrix).flatten()
+            query_vector = index.vectorizer.transform([query.lower()])
             
-            top_indices = similarities.argsort()[-k:][::-1]
+            if index.searcher is not None:
+                return self.sharded_results(index, index.searcher.search(query_vector, k))
+            
+            if index.dot_product:
+                scores = similarities(query_vector, index.tfidf_matrix, index.row_scale)[0]
+            else:
+                from sklearn.metrics.pairwise import cosine_similarity
+                
+                scores = cosine_similarity(query_vector, index.tfidf_matrix).flatten()
+            if index.tombstones.any():
+                scores[index.tombstones] = 0
+            
+            top_indices = scores.argsort()[-k:][::-1]
             
             results = []
             for idx in top_indices:
-                if similarities[idx] > 0.01:  # Threshold muito baixo
-                    results.append({
-                        'content': self.documents[idx]['content'],
-                        'similarity': similarities[idx],
-                        'method': 'tfidf'
-                    })
+                if scores[idx] > 0.01:  # Threshold muito baixo
+                    results.append(self.make_result(index, idx, scores[idx], 'tfidf'))
+            
+            return results
+            
+        except Exception as e:
+            logger.error("❌ Erro busca TF-IDF: %s", e)
+            return []
+    
+    def sharded_results(self, index, hits):
+        """Converte (linha, score) do scatter-gather em resultados TF-IDF"""
+        return [
+            self.make_result(index, idx, sim, 'tfidf')
+            for idx, sim in hits
+            if sim > 0.01  # Mesmo threshold de search_tfidf
+        ]
+    
+    def search_bm25(self, query, k=3, index=None):
+        """Busca usando o índice invertido BM25"""
+        index = index or self.index
+        try:
+            results = []
+            exclude = index.tombstones if index.tombstones.any() else None
+            for idx, score in index.bm25.search(query, k, exclude=exclude):
+                results.append(self.make_result(index, idx, score, 'bm25'))
             
             return results
             
         except Exception as e:
-            print(f"❌ Erro busca TF-IDF: {e}")
+            logger.error("❌ Erro busca BM25: %s", e)
             return []
     
-    def search_simple(self, query, k=3):
+    def search_simple(self, query, k=3, index=None):
         """Busca usando índice simples"""
+        index = index or self.index
+        if index is None:
+            return []
+        
         query_lower = query.lower()
         results = []
         
         # Busca por palavras-chave
-        for keyword, doc_indices in self.simple_index.items():
+        for keyword, doc_indices in index.simple_index.items():
             if keyword in query_lower and doc_indices:
                 for idx in doc_indices[:k]:
-                    if idx < len(self.documents):
-                        results.append({
-                            'content': self.documents[idx]['content'],
-                            'similarity': 0.8,  # Simulada
-                            'method': 'simple',
-                            'keyword': keyword
-                        })
+                    if idx < len(index.documents):
+                        results.append(self.make_result(index, idx, 0.8, 'simple', keyword=keyword))  # Simulada
         
         # Se não encontrou nada, busca por substring
         if not results:
-            for i, doc in enumerate(self.documents):
-                if any(word in doc['content'].lower() for word in query_lower.split()):
-                    results.append({
-                        'content': doc['content'],
-                        'similarity': 0.5,
-                        'method': 'substring'
-                    })
+            documents = index.documents
+            for i in range(len(documents)):
+                if documents.is_deleted(i):
+                    continue
+                content = documents.content(i)
+                if any(word in content.lower() for word in query_lower.split()):
+                    results.append(self.make_result(index, i, 0.5, 'substring', content=content))
                     if len(results) >= k:
                         break
         
         return results
     
-    def search(self, query, k=3):
-        """Busca híbrida: TF-IDF + Simple"""
-        print(f"🔍 Buscando: '{query}'")
+    def search(self, query, k=3, index=None):
+        """Busca híbrida com cache de resultados por versão do índice"""
+        # Uma única referência ao índice durante toda a busca
+        index = index or self.index
+        
+        if self.cache is None or index is None:
+            return self.cascade_search(query, k, index)
+        
+        query = normalize_query(query)
+        key = ('search', query, k)
+        results = self.cache.get(key, index.version)
+        if results is None:
+            results = self.cascade_search(query, k, index)
+            self.cache.put(key, index.version, results)
+        else:
+            logger.debug("⚡ Cache: '%s'", query)
         
+        return list(results)
+    
+    def cascade_search(self, query, k=3, index=None):
+        """Busca híbrida: TF-IDF (ou BM25) + Simple"""
+        logger.debug("🔍 Buscando: '%s'", query)
+        
+        index = index or self.index
+        stages = self.metrics.stages
         results = []
         
-        # Método 1: TF-IDF
-        if self.vectorstore_loaded:
-            tfidf_results = self.search_tfidf(query, k)
-            results.extend(tfidf_results)
-            print(f"📊 TF-IDF: {len(tfidf_results)} resultados")
+        # Método 1: TF-IDF ou BM25, conforme o motor escolhido
+        if index is not None:
+            if self.engine == 'bm25':
+                with stages.time('search_bm25'):
+                    bm25_results = self.search_bm25(query, k, index)
+                results.extend(bm25_results)
+                logger.debug("📊 BM25: %d resultados", len(bm25_results))
+            else:
+                with stages.time('search_tfidf'):
+                    tfidf_results = self.search_tfidf(query, k, index)
+                results.extend(tfidf_results)
+                logger.debug("📊 TF-IDF: %d resultados", len(tfidf_results))
         
         # Método 2: Índice simples (fallback)
         if len(results) == 0:
-            simple_results = self.search_simple(query, k)
+            with stages.time('search_simple'):
+                simple_results = self.search_simple(query, k, index)
             results.extend(simple_results)
-            print(f"📇 Simples: {len(simple_results)} resultados")
+            logger.debug("📇 Simples: %d resultados", len(simple_results))
         
-        # Remove duplicatas
+        with stages.time('dedup'):
+            results = self.unique_results(results, k)
+        
+        self.metrics.count_branch(results)
+        return results
+    
+    def unique_results(self, results, k=3):
+        """Remove duplicatas (mesma linha do índice) e limita a k resultados"""
         unique_results = []
-        seen_content = set()
+        seen_rows = set()
         
         for result in results:
-            content_start = result['content'][:50]
-            if content_start not in seen_content:
+            if result['row'] not in seen_rows:
                 unique_results.append(result)
-                seen_content.add(content_start)
+                seen_rows.add(result['row'])
         
         return unique_results[:k]
     
-    def generate_answer(self, query, results):
-        """Gera resposta"""
+    def search_tfidf_many(self, queries, k=3, batch_size=256, index=None):
+        """Busca TF-IDF em lote: um produto esparso por lote e top-k com argpartition"""
+        index = index or self.index
+        all_results = []
+        n_docs = index.tfidf_matrix.shape[0]
+        k_eff = min(k, n_docs)
+        
+        for start in range(0, len(queries), batch_size):
+            batch = [query.lower() for query in queries[start:start + batch_size]]
+            
+            try:
+                # Linhas já normalizadas (L2): o produto escalar é o cosseno
+                query_matrix = index.vectorizer.transform(batch)
+                
+                if index.searcher is not None:
+                    for hits in index.searcher.search_many(query_matrix, k):
+                        all_results.append(self.sharded_results(index, hits))
+                    continue
+                
+                scores = similarities(query_matrix, index.tfidf_matrix, index.row_scale)
+                if index.tombstones.any():
+                    scores[:, index.tombstones] = 0
+            except Exception as e:
+                logger.error("❌ Erro busca TF-IDF em lote: %s", e)
+                all_results.extend([] for _ in batch)
+                continue
+            
+            if k_eff <= 0:
+                all_results.extend([] for _ in batch)
+                continue
+            
+            # Top-k por linha sem ordenar o vetor inteiro
+            top = np.argpartition(-scores, k_eff - 1, axis=1)[:, :k_eff]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind='stable')
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+            
+            for row_indices, row_scores in zip(top, top_scores):
+                results = []
+                for idx, sim in zip(row_indices, row_scores):
+                    if sim > 0.01:  # Mesmo threshold de search_tfidf
+                        results.append(self.make_result(index, idx, sim, 'tfidf'))
+                all_results.append(results)
+        
+        return all_results
+    
+    def search_many(self, queries, k=3, index=None):
+        """Busca várias perguntas de uma vez, preservando a ordem de entrada"""
+        queries = list(queries)
+        if not queries:
+            return []
+        
+        logger.debug("🔍 Buscando %d perguntas em lote", len(queries))
+        
+        index = index or self.index
+        if index is None:
+            primary = [[] for _ in queries]
+        elif self.engine == 'bm25':
+            primary = [self.search_bm25(query, k, index) for query in queries]
+        else:
+            primary = self.search_tfidf_many(queries, k, index=index)
+        
+        all_results = []
+        fallbacks = 0
+        
+        for query, results in zip(queries, primary):
+            # Mesmo fallback de search() para quem ficou sem resultados
+            if not results:
+                results = self.search_simple(query, k, index)
+                fallbacks += 1
+            all_results.append(self.unique_results(results, k))
+            self.metrics.count_branch(all_results[-1])
+        
+        logger.debug("📇 Simples (fallback): %d perguntas", fallbacks)
+        return all_results
+    
+    def generate_answer(self, query, results, index=None):
+        """Gera resposta (com expand_context, mostra a seção-mãe de cada trecho)"""
         if not results:
             return "😔 Não encontrei informações específicas sobre isso. Tente perguntas como: 'brigadeiro', 'feijoada', 'dendê', 'açaí', 'moqueca'."
         
@@ -264,8 +781,19 @@ class RobustCulinariaRAGBot:
         
         response = f"{intro}\n\n"
         
+        index = index or self.index
+        expand = self.expand_context and index is not None
+        shown_parents = set()
+        
         for i, result in enumerate(results[:2]):
-            content = result['content'][:400]  # Primeiros 400 chars
+            parent = result.get('parent', -1)
+            if expand and parent >= 0:
+                if parent in shown_parents:
+                    continue  # Seção já mostrada por outro trecho
+                shown_parents.add(parent)
+                content = index.documents.section_content(parent)[:SECTION_ANSWER_CHARS]
+            else:
+                content = result['content'][:ANSWER_CHARS]
             method = result.get('method', 'unknown')
             
             response += f"📄 {content}\n\n"
@@ -276,27 +804,124 @@ class RobustCulinariaRAGBot:
             elif method == 'tfidf':
                 sim = result.get('similarity', 0)
                 response += f"💡 Similaridade: {sim:.2%}\n"
+            elif method == 'bm25':
+                score = result.get('similarity', 0)
+                response += f"💡 Score BM25: {score:.2f}\n"
         
         return response
     
     def ask(self, question):
         """Processa pergunta"""
-        print(f"\n🤔 Pergunta: '{question}'")
+        logger.info("🤔 Pergunta: '%s'", question)
         
+        with self.metrics.stages.time('ask'):
+            # Fixa o índice desta pergunta: um reload concorrente não a afeta
+            index = self.index
+            
+            if index is None or (self.cache is None and self.flights is None):
+                return self.answer(question, index)
+            
+            question = normalize_query(question)
+            key = ('ask', question)
+            
+            if self.cache is not None:
+                answer = self.cache.get(key, index.version)
+                if answer is not None:
+                    logger.debug("⚡ Cache: '%s'", question)
+                    return answer
+            
+            # Perguntas iguais em andamento na mesma versão do índice compartilham o cálculo
+            if self.flights is not None:
+                answer = self.flights.do((key, index.version), self.answer, question, index)
+            else:
+                answer = self.answer(question, index)
+            
+            if self.cache is not None:
+                self.cache.put(key, index.version, answer)
+            
+            return answer
+    
+    def answer(self, question, index=None):
+        """Busca e gera a resposta de uma pergunta (sem cache)"""
         # Busca
-        results = self.search(question, k=3)
+        results = self.cascade_search(question, k=3, index=index)
         
         # Resposta
-        answer = self.generate_answer(question, results)
+        with self.metrics.stages.time('generate_answer'):
+            return self.generate_answer(question, results, index)
+    
+    def ask_many(self, questions):
+        """Processa várias perguntas em lote (respostas na ordem de entrada)"""
+        with self.metrics.stages.time('ask_many'):
+            return self.answer_many(list(questions), self.index)
+    
+    def answer_many(self, questions, index):
+        """Respostas de ask_many() num índice fixo (só as ausentes do cache são buscadas)"""
+        if self.cache is None or index is None:
+            all_results = self.search_many(questions, k=3, index=index)
+            return [
+                self.generate_answer(question, results, index)
+                for question, results in zip(questions, all_results)
+            ]
+        
+        questions = [normalize_query(question) for question in questions]
+        answers = [self.cache.get(('ask', question), index.version) for question in questions]
+        missing = [i for i, answer in enumerate(answers) if answer is None]
+        
+        all_results = self.search_many([questions[i] for i in missing], k=3, index=index)
+        for i, results in zip(missing, all_results):
+            answers[i] = self.generate_answer(questions[i], results, index)
+            self.cache.put(('ask', questions[i]), index.version, answers[i])
+        
+        return answers
+    
+    def reload(self, incremental=False, indexer=None):
+        """
+        Reconstrói a base fora do caminho das perguntas e troca o índice
+        atomicamente: perguntas em andamento terminam no índice antigo.
+        """
+        with self._rebuild_lock:
+            before = self.index
+            
+            if incremental and before is not None:
+                if indexer is None:
+                    from incremental_index import IncrementalIndexer
+                    indexer = IncrementalIndexer(self)
+                
+                ok = indexer.update()
+                if ok:
+                    indexer.maybe_compact()
+            else:
+                print("🔄 Recarregando base de conhecimento...")
+                index = self.build_index()
+                ok = index is not None
+                if ok:
+                    self.swap_index(index)
+            
+            changed = self.index is not before
         
-        return answer
+        if ok and changed:
+            self.save_snapshot()
+        return ok
     
-    def setup(self):
+    def setup(self, incremental=False):
         """Setup completo"""
         print("🚀 Configurando Chatbot Super Robusto")
         print("=" * 45)
         
-        return self.create_vectorstore()
+        if self.load_snapshot():
+            return True
+        
+        # Modo incremental: parte do snapshot antigo e aplica só o delta
+        if incremental and self.load_snapshot(match_corpus=False):
+            if self.reload(incremental=True):
+                return True
+        
+        if not self.create_vectorstore():
+            return False
+        
+        self.save_snapshot()
+        return True
     
     def chat_loop(self):
         """Chat interativo"""
@@ -327,11 +952,57 @@ class RobustCulinariaRAGBot:
                 print(f"❌ Erro: {e}")
 
 def main():
-    bot = RobustCulinariaRAGBot()
+    parser = argparse.ArgumentParser(description="Chatbot RAG de Culinária Brasileira")
+    parser.add_argument('--engine', choices=ENGINES, default='tfidf',
+                        help="motor da busca principal")
+    parser.add_argument('--incremental', action='store_true',
+                        help="reaproveita o snapshot e reindexa só os arquivos alterados")
+    parser.add_argument('--parallel', type=int, metavar='WORKERS', default=0,
+                        help="constrói o índice por hashing em WORKERS processos")
+    parser.add_argument('--shards', type=int, default=0,
+                        help="particiona a busca TF-IDF em SHARDS processos")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE,
+                        help="perguntas guardadas no cache de respostas (0 desativa)")
+    parser.add_argument('--cache-ttl', type=float, default=None,
+                        help="validade das entradas do cache em segundos")
+    parser.add_argument('--log-level', default='WARNING',
+                        choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help="nível do log da busca (DEBUG mostra cada etapa)")
+    parser.add_argument('--metrics-port', type=int, default=0,
+                        help="serve as métricas Prometheus em http://HOST:PORT/metrics")
+    parser.add_argument('--metrics-host', default=DEFAULT_METRICS_HOST,
+                        help="interface das métricas (0.0.0.0 permite scrape de outras máquinas)")
+    parser.add_argument('--expand-context', action='store_true',
+                        help="responde com a seção inteira de cada trecho encontrado")
+    parser.add_argument('--matrix-dtype', choices=MATRIX_DTYPES, default=DEFAULT_COMPACTION['dtype'],
+                        help="tipo dos pesos da matriz TF-IDF (int8 usa escala por linha)")
+    parser.add_argument('--prune-min-weight', type=float, default=0.0,
+                        help="descarta pesos da matriz abaixo deste valor")
+    parser.add_argument('--prune-top-n', type=int, default=0,
+                        help="mantém só os N maiores pesos de cada linha (0 mantém todos)")
+    parser.add_argument('--dedup-threshold', type=float, default=DEFAULT_DEDUP_THRESHOLD,
+                        help="similaridade (0-1] a partir da qual um chunk é quase-duplicata")
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=args.log_level, format="%(message)s")
     
-    if bot.setup():
+    options = {'cache_size': args.cache_size, 'cache_ttl': args.cache_ttl,
+               'dedup_threshold': args.dedup_threshold, 'expand_context': args.expand_context,
+               'compaction': {'dtype': args.matrix_dtype, 'min_weight': args.prune_min_weight,
+                              'top_n': args.prune_top_n}}
+    if args.parallel:
+        bot = RobustCulinariaRAGBot(engine=args.engine, build_mode='parallel',
+                                    workers=args.parallel, shards=args.shards, **options)
+    else:
+        bot = RobustCulinariaRAGBot(engine=args.engine, shards=args.shards, **options)
+    
+    if bot.setup(incremental=args.incremental):
         print("✅ Setup concluído!")
         
+        if args.metrics_port:
+            serve_metrics(bot.metrics, host=args.metrics_host, port=args.metrics_port)
+            print(f"📈 Métricas em http://{args.metrics_host}:{args.metrics_port}/metrics")
+        
         # Testes obrigatórios
         test_queries = ['brigadeiro', 'feijoada', 'dendê']
         for query in test_queries:
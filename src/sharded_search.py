@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Busca TF-IDF particionada (scatter-gather)
+
+A matriz TF-IDF é dividida em N shards de linhas contíguas, cada um
+servido por um processo worker. O coordenador envia o vetor da consulta
+para todos os shards, recebe o top-k local de cada um e faz o merge no
+top-k global. Workers locais usam multiprocessing.Pipe; o mesmo
+protocolo roda sobre multiprocessing.connection (TCP) para shards em
+outras máquinas (ver serve_shard e o modo "serve" deste script).
+
+multiprocessing.connection faz unpickle do que recebe: quem alcança a
+porta de um shard e conhece a chave executa código no host. Por isso a
+chave não tem padrão (--authkey ou a variável SHARD_AUTHKEY) e o shard
+ouve só em 127.0.0.1, a menos que --host diga outra coisa.
+"""
+
+import argparse
+import heapq
+import os
+import sys
+import threading
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Client, Listener
+from operator import itemgetter
+
+import numpy as np
+
+AUTHKEY_ENV = "SHARD_AUTHKEY"
+DEFAULT_HOST = "127.0.0.1"
+
+
+def shard_top_k(matrix, queries, k, offset=0, tombstones=None, row_scale=None):
+    """Top-k local de um shard para cada linha de queries: lista de [(linha global, score)]"""
+    if matrix.dtype != np.float64:
+        queries = queries.astype(np.float32)  # Matriz compactada: não promove o shard para float64
+    scores = (matrix @ queries.T).toarray()  # linhas do shard x consultas
+    if row_scale is not None:
+        scores *= row_scale[:, None]
+    if tombstones is not None and tombstones.any():
+        scores[tombstones] = 0
+
+    k = min(k, scores.shape[0])
+    results = []
+    for column in scores.T:
+        if k <= 0:
+            results.append([])
+            continue
+        top = np.argpartition(-column, k - 1)[:k]
+        results.append([(offset + int(i), float(column[i])) for i in top])
+    return results
+
+
+def shard_worker_loop(conn, matrix, offset=0, tombstones=None, row_scale=None):
+    """Atende pedidos (queries, k) até receber None ou a conexão fechar"""
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+
+        queries, k = message
+        try:
+            conn.send(shard_top_k(matrix, queries, k, offset, tombstones, row_scale))
+        except Exception as e:
+            conn.send(e)
+    conn.close()
+
+
+def resolve_authkey(authkey=None):
+    """Chave dos shards remotos: argumento ou SHARD_AUTHKEY (sem valor padrão)"""
+    authkey = authkey or os.environ.get(AUTHKEY_ENV)
+    if not authkey:
+        raise ValueError(f"Chave dos shards ausente: use --authkey ou a variável {AUTHKEY_ENV}")
+    return authkey.encode('utf-8') if isinstance(authkey, str) else authkey
+
+
+def split_rows(n_rows, n_shards):
+    """Faixas [início, fim) de linhas contíguas para cada shard"""
+    bounds = np.linspace(0, n_rows, n_shards + 1).astype(int)
+    return [(int(bounds[i]), int(bounds[i + 1])) for i in range(n_shards)]
+
+
+class ShardedSearcher:
+    def __init__(self, connections, processes=None):
+        self.connections = connections
+        self.processes = processes or []
+        self._lock = threading.Lock()  # Um scatter-gather por vez nas conexões
+
+    @classmethod
+    def start_local(cls, tfidf_matrix, tombstones=None, n_shards=2, row_scale=None):
+        """Particiona a matriz e inicia um processo worker por shard"""
+        connections = []
+        processes = []
+
+        for start, end in split_rows(tfidf_matrix.shape[0], n_shards):
+            shard = tfidf_matrix[start:end]
+            shard_tombstones = tombstones[start:end] if tombstones is not None else None
+            shard_scale = row_scale[start:end] if row_scale is not None else None
+
+            parent_conn, child_conn = Pipe()
+            process = Process(
+                target=shard_worker_loop,
+                args=(child_conn, shard, start, shard_tombstones, shard_scale),
+                name=f"shard-{start}-{end}",
+                daemon=True
+            )
+            process.start()
+            child_conn.close()
+
+            connections.append(parent_conn)
+            processes.append(process)
+
+        return cls(connections, processes)
+
+    @classmethod
+    def connect(cls, addresses, authkey=None):
+        """Conecta a shards remotos iniciados com serve_shard() (mesma chave deles)"""
+        authkey = resolve_authkey(authkey)
+        return cls([Client(address, authkey=authkey) for address in addresses])
+
+    def search_many(self, query_matrix, k=3):
+        """Envia as consultas a todos os shards e junta os top-k locais"""
+        with self._lock:
+            for conn in self.connections:
+                conn.send((query_matrix, k))
+            partials = [conn.recv() for conn in self.connections]
+
+        for partial in partials:
+            if isinstance(partial, Exception):
+                raise partial
+
+        return [
+            heapq.nlargest(k, (hit for partial in partials for hit in partial[q]), key=itemgetter(1))
+            for q in range(query_matrix.shape[0])
+        ]
+
+    def search(self, query_vector, k=3):
+        """Top-k global de uma consulta: lista de (linha, score)"""
+        return self.search_many(query_vector, k)[0]
+
+    def close(self):
+        """Encerra os workers locais e fecha as conexões"""
+        with self._lock:
+            for conn in self.connections:
+                try:
+                    conn.send(None)
+                    conn.close()
+                except (OSError, EOFError):
+                    pass
+        for process in self.processes:
+            process.join(timeout=5)
+        self.connections = []
+        self.processes = []
+
+
+def serve_shard(address, matrix, offset=0, tombstones=None, authkey=None, row_scale=None):
+    """Serve um shard via TCP para um coordenador em outra máquina"""
+    with Listener(address, authkey=resolve_authkey(authkey)) as listener:
+        print(f"🧩 Shard (linhas {offset}+{matrix.shape[0]}) ouvindo em {address}")
+        while True:
+            conn = listener.accept()
+            shard_worker_loop(conn, matrix, offset, tombstones, row_scale)
+
+
+def main():
+    sys.path.append(os.path.dirname(__file__))
+    from index_snapshot import load_snapshot
+
+    parser = argparse.ArgumentParser(description="Serve um shard do índice TF-IDF")
+    parser.add_argument('command', choices=['serve'])
+    parser.add_argument('--snapshot', default="data/index", help="diretório do snapshot")
+    parser.add_argument('--shard', type=int, required=True, help="número deste shard")
+    parser.add_argument('--shards', type=int, required=True, help="total de shards")
+    parser.add_argument('--host', default=DEFAULT_HOST,
+                        help="interface de escuta (0.0.0.0 expõe o shard na rede)")
+    parser.add_argument('--port', type=int, default=6001)
+    parser.add_argument('--authkey', default=None,
+                        help=f"chave compartilhada com o coordenador (padrão: variável {AUTHKEY_ENV})")
+    args = parser.parse_args()
+
+    try:
+        authkey = resolve_authkey(args.authkey)
+    except ValueError as e:
+        parser.error(str(e))
+
+    snapshot = load_snapshot(args.snapshot)
+    if snapshot is None:
+        print("❌ Snapshot não encontrado")
+        return
+
+    documents = snapshot['documents']
+    tombstones = np.array(documents.deleted, dtype=bool)
+    row_scale = snapshot['row_scale']
+    start, end = split_rows(len(documents), args.shards)[args.shard]
+
+    serve_shard(
+        (args.host, args.port),
+        snapshot['tfidf_matrix'][start:end],
+        start,
+        tombstones[start:end],
+        authkey=authkey,
+        row_scale=row_scale[start:end] if row_scale is not None else None
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Índice em memória compartilhada para servir com vários processos
+
+Um processo carregador copia para um único bloco de
+multiprocessing.shared_memory os arrays CSR da matriz TF-IDF, o IDF, a
+tabela de vocabulário, o texto dos documentos e (se houver) as posting
+lists do BM25. Os workers se conectam pelo nome do bloco e montam um
+KnowledgeIndex somente leitura cujos arrays apontam para essa memória,
+então adicionar workers não multiplica a memória do índice.
+"""
+
+import bisect
+import json
+import mmap
+import struct
+from collections.abc import Mapping, Sequence
+from multiprocessing import shared_memory
+
+import numpy as np
+from scipy import sparse
+
+from document_store import ARRAYS as DOCUMENT_ARRAYS
+from document_store import DocumentStore
+
+HEADER_SIZE = struct.calcsize("<Q")
+ALIGNMENT = 64
+
+
+def _attach_segment(name):
+    """Conecta a um bloco existente sem registrá-lo para remoção neste processo"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: o resource_tracker removeria o bloco ao sair. Se o
+        # tracker foi herdado do carregador (fork), o registro é o mesmo dele
+        # e não deve ser desfeito aqui.
+        from multiprocessing import resource_tracker
+
+        inherited = resource_tracker._resource_tracker._fd is not None
+        segment = shared_memory.SharedMemory(name=name)
+        if not inherited:
+            resource_tracker.unregister(segment._name, "shared_memory")
+        return segment
+
+
+def _text_table(strings):
+    """Codifica strings como um blob UTF-8 + offsets int64"""
+    encoded = [value.encode("utf-8") for value in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+class SharedStrings(Sequence):
+    """Sequência de strings decodificadas sob demanda de um blob compartilhado"""
+
+    def __init__(self, blob, offsets):
+        self._blob = blob
+        self._offsets = offsets
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        start, end = self._offsets[i], self._offsets[i + 1]
+        return self._blob[start:end].tobytes().decode("utf-8")
+
+
+class SharedVocabulary(Mapping):
+    """Dicionário termo -> coluna sobre termos ordenados (busca binária)"""
+
+    def __init__(self, terms, columns):
+        self._terms = terms  # SharedStrings em ordem alfabética
+        self._columns = columns
+
+    def __getitem__(self, term):
+        i = bisect.bisect_left(self._terms, term)
+        if i < len(self._terms) and self._terms[i] == term:
+            return int(self._columns[i])
+        raise KeyError(term)
+
+    def __contains__(self, term):
+        try:
+            self[term]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        return iter(self._terms)
+
+    def __len__(self):
+        return len(self._terms)
+
+
+def _vocabulary_arrays(vocabulary):
+    terms = sorted(vocabulary)
+    blob, offsets = _text_table(terms)
+    columns = np.fromiter((vocabulary[term] for term in terms), dtype=np.int64, count=len(terms))
+    return blob, offsets, columns
+
+
+class SharedIndex:
+    def __init__(self, segment, header, owner=False):
+        self.segment = segment
+        self.header = header
+        self.owner = owner  # Só o carregador remove o bloco
+
+        # Os arrays usam um mapeamento próprio do bloco: ele vive enquanto
+        # houver arrays apontando para ele, e close() não falha com views abertas
+        fd = getattr(segment, '_fd', -1)
+        self._buffer = mmap.mmap(fd, segment.size) if fd >= 0 else segment.buf
+
+    @property
+    def name(self):
+        return self.segment.name
+
+    @classmethod
+    def create(cls, index, name=None):
+        """Copia um KnowledgeIndex para um bloco novo de memória compartilhada"""
+        matrix = sparse.csr_matrix(index.tfidf_matrix)
+        documents = index.documents
+
+        arrays = {
+            'indptr': np.asarray(matrix.indptr),
+            'indices': np.asarray(matrix.indices),
+            'data': np.asarray(matrix.data),
+            'idf': np.asarray(index.vectorizer.idf_),
+            'tombstones': np.asarray(index.tombstones, dtype=bool),
+        }
+        if index.row_scale is not None:
+            arrays['row_scale'] = np.asarray(index.row_scale)
+
+        # O store de documentos já é blob + arrays: vai para o bloco como está
+        for key, array in documents.arrays().items():
+            arrays[f'doc_{key}'] = np.asarray(array)
+        (arrays['vocab_text'], arrays['vocab_offsets'],
+         arrays['vocab_columns']) = _vocabulary_arrays(index.vectorizer.vocabulary_)
+
+        bm25 = None
+        if index.bm25 is not None:
+            arrays['bm25_term_offsets'] = np.asarray(index.bm25.term_offsets)
+            arrays['bm25_doc_ids'] = np.asarray(index.bm25.doc_ids)
+            arrays['bm25_tfs'] = np.asarray(index.bm25.tfs)
+            arrays['bm25_doc_lengths'] = np.asarray(index.bm25.doc_lengths)
+            (arrays['bm25_vocab_text'], arrays['bm25_vocab_offsets'],
+             arrays['bm25_vocab_columns']) = _vocabulary_arrays(index.bm25.vocabulary)
+            bm25 = {
+                'k1': index.bm25.k1,
+                'b': index.bm25.b,
+                'token_pattern': index.bm25.token_pattern,
+                'n_docs': index.bm25.n_docs,
+                'avgdl': index.bm25.avgdl
+            }
+
+        # Layout: [tamanho do cabeçalho][cabeçalho JSON][arrays alinhados]
+        layout = {}
+        position = 0
+        for key, array in arrays.items():
+            position = -(-position // ALIGNMENT) * ALIGNMENT
+            layout[key] = {
+                'offset': position,
+                'dtype': array.dtype.str,
+                'shape': list(array.shape)
+            }
+            position += array.nbytes
+
+        header = {
+            'layout': layout,
+            'shape': list(matrix.shape),
+            'sources': documents.sources,
+            'simple_index': index.simple_index,
+            'file_hashes': index.file_hashes,
+            'appended_rows': index.appended_rows,
+            'fitted_at': index.fitted_at,
+            'hashing': getattr(index.vectorizer, 'params', None),
+            'bm25': bm25
+        }
+        header_bytes = json.dumps(header, ensure_ascii=False, default=str).encode("utf-8")
+        data_start = -(-(HEADER_SIZE + len(header_bytes)) // ALIGNMENT) * ALIGNMENT
+        header['data_start'] = data_start
+
+        segment = shared_memory.SharedMemory(name=name, create=True, size=max(data_start + position, 1))
+        struct.pack_into("<Q", segment.buf, 0, len(header_bytes))
+        segment.buf[HEADER_SIZE:HEADER_SIZE + len(header_bytes)] = header_bytes
+
+        for key, array in arrays.items():
+            start = data_start + layout[key]['offset']
+            segment.buf[start:start + array.nbytes] = np.ascontiguousarray(array).tobytes()
+
+        return cls(segment, header, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Conecta (somente leitura) a um bloco criado por create()"""
+        segment = _attach_segment(name)
+        (header_size,) = struct.unpack_from("<Q", segment.buf, 0)
+        header = json.loads(bytes(segment.buf[HEADER_SIZE:HEADER_SIZE + header_size]).decode("utf-8"))
+        header['data_start'] = -(-(HEADER_SIZE + header_size) // ALIGNMENT) * ALIGNMENT
+        return cls(segment, header)
+
+    def array(self, key):
+        """View NumPy somente leitura de um array do bloco"""
+        spec = self.header['layout'][key]
+        dtype = np.dtype(spec['dtype'])
+        count = int(np.prod(spec['shape'])) if spec['shape'] else 1
+        array = np.frombuffer(
+            self._buffer,
+            dtype=dtype,
+            count=count,
+            offset=self.header['data_start'] + spec['offset']
+        ).reshape(spec['shape'])
+        array.flags.writeable = False
+        return array
+
+    def strings(self, prefix):
+        return SharedStrings(self.array(f"{prefix}_text"), self.array(f"{prefix}_offsets"))
+
+    def knowledge_index(self, engine='tfidf'):
+        """Monta um KnowledgeIndex cujos arrays apontam para a memória compartilhada"""
+        from bm25_engine import BM25Index
+        from robust_chatbot import TFIDF_PARAMS, KnowledgeIndex
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        header = self.header
+        tfidf_matrix = sparse.csr_matrix(
+            (self.array('data'), self.array('indices'), self.array('indptr')),
+            shape=tuple(header['shape']),
+            copy=False
+        )
+
+        if header.get('hashing'):
+            from parallel_build import HashingTfidfVectorizer
+            vectorizer = HashingTfidfVectorizer(self.array('idf'), header['hashing'])
+        else:
+            vectorizer = TfidfVectorizer(**TFIDF_PARAMS)
+            vectorizer.vocabulary_ = SharedVocabulary(self.strings('vocab'), self.array('vocab_columns'))
+            vectorizer.idf_ = self.array('idf')
+
+        bm25 = None
+        if engine == 'bm25' and header.get('bm25'):
+            meta = header['bm25']
+            bm25 = BM25Index(k1=meta['k1'], b=meta['b'], token_pattern=meta['token_pattern'])
+            bm25.n_docs = meta['n_docs']
+            bm25.avgdl = meta['avgdl']
+            bm25.vocabulary = SharedVocabulary(self.strings('bm25_vocab'), self.array('bm25_vocab_columns'))
+            bm25.term_offsets = self.array('bm25_term_offsets')
+            bm25.doc_ids = self.array('bm25_doc_ids')
+            bm25.tfs = self.array('bm25_tfs')
+            bm25.doc_lengths = self.array('bm25_doc_lengths')
+
+        documents = DocumentStore.from_arrays(
+            {key: self.array(f'doc_{key}') for key in DOCUMENT_ARRAYS},
+            header['sources']
+        )
+
+        return KnowledgeIndex(
+            documents,
+            vectorizer,
+            tfidf_matrix,
+            header['simple_index'],
+            bm25,
+            tombstones=self.array('tombstones'),
+            file_hashes=header['file_hashes'],
+            appended_rows=header['appended_rows'],
+            fitted_at=header['fitted_at'],
+            row_scale=self.array('row_scale') if 'row_scale' in header['layout'] else None,
+            memory_mapped=True  # Linhas já normalizadas: busca por produto escalar, sem copiar o bloco
+        )
+
+    def close(self):
+        """Desconecta; o carregador também remove o bloco"""
+        self.segment.close()
+        if self.owner:
+            self.segment.unlink()
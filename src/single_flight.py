@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Coalescência de consultas idênticas em andamento (single-flight)
+
+Quando várias threads pedem a mesma chave ao mesmo tempo, só a primeira
+executa o cálculo; as demais esperam e recebem o mesmo resultado (ou a
+mesma exceção). Não guarda nada depois que o cálculo termina: é
+independente do cache de respostas.
+"""
+
+import threading
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}  # chave -> _Call em andamento
+        self._lock = threading.Lock()
+
+        self.calls = 0  # Pedidos recebidos
+        self.executions = 0  # Cálculos de fato executados
+        self.coalesced = 0  # Pedidos atendidos pelo cálculo de outro
+
+    def do(self, key, func, *args):
+        """Executa func(*args) uma vez por chave entre chamadas simultâneas"""
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        """Contadores da coalescência"""
+        return {
+            'calls': self.calls,
+            'executions': self.executions,
+            'coalesced': self.coalesced,
+            'in_flight': len(self._calls)
+        }
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Compactação da matriz TF-IDF
+
+O fit_transform devolve CSR em float64 e, com n-gramas até 3, boa parte
+dos não nulos são trigramas de peso baixo. Aqui a matriz pode:
+- guardar os pesos em float32, ou em int8 com uma escala por linha
+- usar índices int32
+- descartar, por linha, pesos abaixo de um mínimo ou fora dos N maiores
+  (a linha é renormalizada, então o produto escalar continua sendo o
+  cosseno)
+
+Os valores de cada opção (memória, latência e recall) saem do
+evaluate_retrieval.py, que tem um motor para cada configuração.
+"""
+
+import numpy as np
+
+MATRIX_DTYPES = ('float64', 'float32', 'int8')
+
+# Sem compactação: a matriz fica como o fit_transform gerou
+DEFAULT_COMPACTION = {'dtype': 'float64', 'min_weight': 0.0, 'top_n': 0}
+
+INT8_MAX = 127
+
+
+def prune_rows(matrix, min_weight=0.0, top_n=0):
+    """
+    Remove, por linha, pesos abaixo de min_weight ou fora dos top_n maiores
+    e renormaliza as linhas (L2). O maior peso de cada linha nunca é
+    removido, para nenhuma linha ficar vazia.
+    """
+    from scipy import sparse
+
+    matrix = sparse.csr_matrix(matrix)
+    data = matrix.data.astype(np.float64)
+    lengths = np.diff(matrix.indptr)
+    rows = np.repeat(np.arange(matrix.shape[0]), lengths)
+
+    # Posição de cada peso dentro da linha, do maior para o menor
+    order = np.lexsort((-np.abs(data), rows))
+    rank = np.empty(len(data), dtype=np.int64)
+    rank[order] = np.arange(len(data)) - np.repeat(matrix.indptr[:-1], lengths)
+
+    keep = (np.abs(data) >= min_weight) | (rank == 0)
+    if top_n:
+        keep &= rank < top_n
+
+    rows = rows[keep]
+    data = data[keep]
+    norms = np.sqrt(np.bincount(rows, weights=data ** 2, minlength=matrix.shape[0]))
+    norms[norms == 0] = 1.0
+    data /= norms[rows]
+
+    indptr = np.zeros(matrix.shape[0] + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=matrix.shape[0]), out=indptr[1:])
+    return sparse.csr_matrix((data, matrix.indices[keep], indptr), shape=matrix.shape)
+
+
+def quantize_rows(matrix):
+    """Pesos em int8 com escala por linha: peso ≈ int8 * escala[linha]"""
+    from scipy import sparse
+
+    lengths = np.diff(matrix.indptr)
+    maxima = np.zeros(matrix.shape[0], dtype=np.float64)
+    nonempty = lengths > 0
+    maxima[nonempty] = np.maximum.reduceat(np.abs(matrix.data), matrix.indptr[:-1][nonempty])
+
+    row_scale = np.where(maxima > 0, maxima / INT8_MAX, 1.0)
+    data = np.rint(matrix.data / np.repeat(row_scale, lengths)).astype(np.int8)
+    quantized = sparse.csr_matrix((data, matrix.indices, matrix.indptr), shape=matrix.shape)
+    return quantized, row_scale.astype(np.float32)
+
+
+def compact_matrix(matrix, dtype='float32', min_weight=0.0, top_n=0):
+    """
+    Aplica poda e troca de tipo. Retorna (matriz, escala por linha), com
+    escala None a não ser em int8.
+    """
+    from scipy import sparse
+
+    if dtype not in MATRIX_DTYPES:
+        raise ValueError(f"Tipo desconhecido: {dtype} (use {', '.join(MATRIX_DTYPES)})")
+
+    matrix = sparse.csr_matrix(matrix)
+    if min_weight or top_n:
+        matrix = prune_rows(matrix, min_weight, top_n)
+
+    row_scale = None
+    if dtype == 'int8':
+        matrix, row_scale = quantize_rows(matrix)
+    else:
+        matrix = matrix.astype(dtype)
+
+    if matrix.nnz < np.iinfo(np.int32).max:
+        matrix.indices = matrix.indices.astype(np.int32)
+        matrix.indptr = matrix.indptr.astype(np.int32)
+    return matrix, row_scale
+
+
+def similarities(queries, matrix, row_scale=None):
+    """
+    Cosseno consultas x linhas (linhas e consultas normalizadas em L2):
+    produto escalar, com a escala por linha das matrizes int8.
+    """
+    if matrix.dtype != np.float64:
+        queries = queries.astype(np.float32)  # Não promove a matriz inteira para float64
+    # Matriz CSR à esquerda: matrix.T viraria CSC e seria convertida a cada chamada
+    scores = (matrix @ queries.T).T.toarray()
+    if row_scale is not None:
+        scores *= row_scale
+    return scores
+
+
+def matrix_nbytes(matrix, row_scale=None):
+    """Bytes dos arrays da matriz (e da escala por linha)"""
+    total = matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+    return total + (row_scale.nbytes if row_scale is not None else 0)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Perfil de inicialização: tempo de importação por pacote
+
+Cada alvo é importado num interpretador novo com `python -X importtime`
+(como um container frio) e o tempo próprio de cada módulo é somado por
+pacote de primeiro nível. O que um `python -c pass` já importa fica de
+fora, então o total é o custo de importar o alvo.
+
+Com --budget-ms o script sai com código 1 se algum alvo passar do
+orçamento, para segurar a latência de partida no CI.
+
+Uso:
+    python src/startup_profile.py
+    python src/startup_profile.py --targets robust_chatbot --budget-ms 400
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+# Alvo -> comando importado. O web_app é um script do Streamlit (importar
+# roda a página), então o alvo mede só os imports dele.
+TARGETS = {
+    'robust_chatbot': "import robust_chatbot",
+    'create_vectorstore': "import create_vectorstore",
+    'web_app': "import streamlit, robust_chatbot, hot_reload, metrics"
+}
+
+# Pacotes que só devem ser importados no caminho que precisa deles
+HEAVY_PACKAGES = ('sklearn', 'scipy', 'langchain', 'langchain_community', 'langchain_core',
+                  'langchain_huggingface', 'sentence_transformers', 'torch', 'transformers', 'faiss')
+
+_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$')
+
+
+def import_times(statement, src_dir=None):
+    """{módulo: tempo próprio em µs} de um interpretador novo rodando `statement`"""
+    src_dir = src_dir or os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, (src_dir, env.get('PYTHONPATH'))))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()
+        raise RuntimeError(f"{statement}: {error[-1] if error else result.returncode}")
+
+    times = {}
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            times[match.group(4)] = int(match.group(1))
+    return times
+
+
+def profile(statement, repeat=3):
+    """
+    Tempo próprio por pacote (ms) do melhor de `repeat` interpretadores,
+    sem os módulos da inicialização do Python
+    """
+    baseline = set(import_times("pass"))
+    best = None
+    for _ in range(repeat):
+        times = {module: us for module, us in import_times(statement).items() if module not in baseline}
+        if best is None or sum(times.values()) < sum(best.values()):
+            best = times
+
+    packages = defaultdict(float)
+    for module, us in best.items():
+        packages[module.split('.')[0]] += us / 1000
+    return dict(packages), {module: us / 1000 for module, us in best.items()}
+
+
+def report(name, packages, modules, top=10):
+    total = sum(packages.values())
+    heavy = sorted(package for package in packages if package in HEAVY_PACKAGES)
+    print(f"\n🚀 {name}: {total:.0f} ms de importação ({len(modules)} módulos)")
+    for package, ms in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"   {package:<28} {ms:8.1f} ms {ms / total:6.1%}" if total else f"   {package}")
+    if heavy:
+        print(f"   ⚠️ pesados carregados: {', '.join(heavy)}")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de importação por pacote de cada ponto de entrada")
+    parser.add_argument('--targets', default=",".join(TARGETS),
+                        help=f"alvos separados por vírgula ({', '.join(TARGETS)}) ou módulos quaisquer")
+    parser.add_argument('--repeat', type=int, default=3, help="interpretadores por alvo (vale o mais rápido)")
+    parser.add_argument('--top', type=int, default=10, help="pacotes listados por alvo")
+    parser.add_argument('--budget-ms', type=float, default=None,
+                        help="falha (código 1) se algum alvo importar em mais tempo que isso")
+    args = parser.parse_args()
+
+    over_budget = []
+    for name in filter(None, (target.strip() for target in args.targets.split(','))):
+        statement = TARGETS.get(name, f"import {name}")
+        try:
+            packages, modules = profile(statement, args.repeat)
+        except RuntimeError as e:
+            print(f"\n❌ {name}: {e}")
+            over_budget.append(name)
+            continue
+        total = report(name, packages, modules, args.top)
+        if args.budget_ms is not None and total > args.budget_ms:
+            over_budget.append(name)
+
+    if args.budget_ms is not None:
+        if over_budget:
+            print(f"\n❌ Acima do orçamento de {args.budget_ms:.0f} ms: {', '.join(over_budget)}")
+            sys.exit(1)
+        print(f"\n✅ Todos os alvos dentro do orçamento de {args.budget_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
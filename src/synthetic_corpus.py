@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Gerador de corpus sintético de culinária brasileira para benchmarks
+
+Produz receitas, ingredientes e técnicas no mesmo formato dos textos de
+data/texts (=== TÍTULO ===, INGREDIENTES:, MODO DE PREPARO:), de forma
+determinística a partir de uma semente.
+"""
+
+import argparse
+import os
+import random
+
+PRATOS = [
+    "feijoada", "moqueca", "vatapá", "acarajé", "coxinha", "brigadeiro", "pão de queijo",
+    "tapioca", "farofa", "baião de dois", "galinhada", "escondidinho", "bobó de camarão",
+    "tacacá", "pamonha", "cuscuz", "canjica", "quindim", "arroz carreteiro", "tutu de feijão",
+    "caruru", "sarapatel", "pato no tucupi", "maniçoba", "pastel", "empadão", "cocada",
+    "romeu e julieta", "picadinho", "virado à paulista"
+]
+
+VARIANTES = [
+    "tradicional", "baiana", "mineira", "capixaba", "paraense", "gaúcha", "nordestina",
+    "da vovó", "de festa", "caseira", "rápida", "vegetariana", "de panela de barro",
+    "do sertão", "litorânea", "junina"
+]
+
+INGREDIENTES = [
+    "feijão preto", "arroz", "farinha de mandioca", "azeite de dendê", "leite de coco",
+    "camarão seco", "carne seca", "linguiça calabresa", "bacon", "cebola", "alho", "tomate",
+    "pimentão", "coentro", "cebolinha", "leite condensado", "chocolate em pó", "manteiga",
+    "polvilho", "queijo minas", "ovos", "milho verde", "açúcar", "sal", "pimenta",
+    "mandioca", "abóbora", "quiabo", "peixe", "frango", "costela", "urucum", "castanha de caju",
+    "amendoim", "goiabada", "coco ralado", "jambu", "tucupi", "pequi", "açaí"
+]
+
+UNIDADES = ["g de", "kg de", "xícara de", "colher de sopa de", "colheres de chá de", "lata de", "dentes de", "folhas de"]
+
+VERBOS = [
+    "Refogue", "Cozinhe", "Misture", "Adicione", "Tempere", "Deixe descansar", "Asse",
+    "Frite", "Escorra", "Sirva", "Leve ao fogo", "Bata no liquidificador", "Mexa sempre"
+]
+
+COMPLEMENTOS = [
+    "em fogo baixo", "até dourar", "por 20 minutos", "na panela de pressão", "até engrossar",
+    "com cuidado", "até ficar macio", "em uma panela grande", "mexendo sempre",
+    "em forno preaquecido", "até levantar fervura", "com o caldo reservado"
+]
+
+REGIOES = ["Norte", "Nordeste", "Centro-Oeste", "Sudeste", "Sul"]
+
+TECNICAS = [
+    "refogado", "cozimento no vapor", "marinada", "fritura por imersão", "banho-maria",
+    "defumação", "braseado", "assado na brasa", "moqueca na folha de bananeira", "farofa na manteiga"
+]
+
+
+def recipe(rng, n):
+    """Uma seção de receita no formato dos textos originais"""
+    prato = rng.choice(PRATOS)
+    titulo = f"{prato} {rng.choice(VARIANTES)} {n}".upper()
+    regiao = rng.choice(REGIOES)
+
+    linhas = [
+        f"=== {titulo} ===",
+        "",
+        f"Prato típico da região {regiao}, o {prato} é preparado com "
+        f"{rng.choice(INGREDIENTES)} e {rng.choice(INGREDIENTES)}, "
+        f"uma receita muito apreciada em festas e almoços de família.",
+        "",
+        "INGREDIENTES:"
+    ]
+    for ingrediente in rng.sample(INGREDIENTES, rng.randint(4, 9)):
+        linhas.append(f"- {rng.randint(1, 500)} {rng.choice(UNIDADES)} {ingrediente}")
+
+    linhas += ["", "MODO DE PREPARO:"]
+    for passo in range(1, rng.randint(4, 8) + 1):
+        linhas.append(
+            f"{passo}. {rng.choice(VERBOS)} {rng.choice(INGREDIENTES)} {rng.choice(COMPLEMENTOS)}"
+        )
+    return "\n".join(linhas)
+
+
+def ingredient(rng, n):
+    """Uma seção de ingrediente"""
+    nome = rng.choice(INGREDIENTES)
+    linhas = [
+        f"=== {nome.upper()} {n} ===",
+        "",
+        f"O {nome} é um ingrediente essencial da culinária do {rng.choice(REGIOES)}, "
+        f"usado em pratos como {rng.choice(PRATOS)} e {rng.choice(PRATOS)}.",
+        "",
+        "CARACTERÍSTICAS:",
+        f"- Sabor marcante e textura {rng.choice(['macia', 'crocante', 'cremosa', 'firme'])}",
+        f"- Combina com {rng.choice(INGREDIENTES)} e {rng.choice(INGREDIENTES)}",
+        f"- Deve ser armazenado {rng.choice(['em local seco', 'na geladeira', 'congelado'])}"
+    ]
+    return "\n".join(linhas)
+
+
+def technique(rng, n):
+    """Uma seção de técnica culinária"""
+    nome = rng.choice(TECNICAS)
+    linhas = [
+        f"=== {nome.upper()} {n} ===",
+        "",
+        f"Técnica muito usada no preparo de {rng.choice(PRATOS)} e {rng.choice(PRATOS)}.",
+        "",
+        "COMO FAZER:"
+    ]
+    for passo in range(1, rng.randint(3, 6) + 1):
+        linhas.append(
+            f"{passo}. {rng.choice(VERBOS)} {rng.choice(INGREDIENTES)} {rng.choice(COMPLEMENTOS)}"
+        )
+    return "\n".join(linhas)
+
+
+GENERATORS = (recipe, ingredient, technique)
+
+
+def iter_sections(n_sections, seed=42):
+    """Gera n_sections seções (receita/ingrediente/técnica) de forma determinística"""
+    rng = random.Random(seed)
+    for n in range(n_sections):
+        yield GENERATORS[n % len(GENERATORS)](rng, n)
+
+
+def generate_texts(n_sections, seed=42):
+    """Lista de textos de seção, pronta para vetorização direta"""
+    return list(iter_sections(n_sections, seed))
+
+
+def write_corpus(output_dir, n_sections, sections_per_file=1000, seed=42):
+    """Grava o corpus em arquivos .txt no formato de data/texts"""
+    os.makedirs(output_dir, exist_ok=True)
+    files = []
+    file = None
+
+    for n, section in enumerate(iter_sections(n_sections, seed)):
+        if n % sections_per_file == 0:
+            if file:
+                file.close()
+            path = os.path.join(output_dir, f"sintetico_{n // sections_per_file:05d}.txt")
+            file = open(path, 'w', encoding='utf-8')
+            files.append(path)
+            file.write("CULINÁRIA BRASILEIRA - CORPUS SINTÉTICO\n\n")
+        file.write(section)
+        file.write("\n\n")
+
+    if file:
+        file.close()
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera corpus sintético de culinária")
+    parser.add_argument('output_dir', help="diretório de saída")
+    parser.add_argument('--sections', type=int, default=1000, help="número de seções")
+    parser.add_argument('--per-file', type=int, default=1000, help="seções por arquivo")
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    files = write_corpus(args.output_dir, args.sections, args.per_file, args.seed)
+    print(f"✅ {args.sections} seções gravadas em {len(files)} arquivos em {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,8 @@ sys.path.append(os.path.dirname(__file__))
 # Importa o chatbot robusto
 try:
     from robust_chatbot import RobustCulinariaRAGBot
+    from hot_reload import HotReloader
+    from metrics import serve_metrics
     CHATBOT_AVAILABLE = True
 except ImportError as e:
     st.error(f"❌ Erro ao importar chatbot: {e}")
@@ -213,6 +215,18 @@ def init_chatbot():
         st.error(f"Erro ao inicializar chatbot: {e}")
         return None
 
+@st.cache_resource
+def init_reloader(_bot):
+    """Inicia o hot reload de data/texts (uma vez por processo)"""
+    return HotReloader(_bot).start()
+
+@st.cache_resource
+def init_metrics_server(_bot):
+    """Serve /metrics (Prometheus) na porta METRICS_PORT, se definida (interface em METRICS_HOST)"""
+    port = int(os.environ.get("METRICS_PORT", 0))
+    host = os.environ.get("METRICS_HOST", DEFAULT_METRICS_HOST)
+    return serve_metrics(_bot.metrics, host=host, port=port) if port else None
+
 def display_example_buttons():
     """Exibe botões de exemplo na sidebar"""
     st.markdown("### 💡 Perguntas de Exemplo")
@@ -257,21 +271,45 @@ def display_system_info():
     with st.expander("📊 Estatísticas do Sistema", expanded=False):
         if 'chatbot' in st.session_state and st.session_state.chatbot:
             bot = st.session_state.chatbot
+            index = bot.index  # Uma única versão do índice para todas as métricas
             
             col1, col2 = st.columns(2)
             
             with col1:
-                docs_count = len(bot.documents) if bot.documents else 0
+                docs_count = len(index.documents) if index else 0
                 st.metric("📚 Documentos", docs_count)
                 
-                vocab_count = len(bot.vectorizer.vocabulary_) if bot.vectorizer else 0
+                vocab_count = len(index.vectorizer.vocabulary_) if index else 0
                 st.metric("📖 Palavras no Vocabulário", vocab_count)
             
             with col2:
-                keywords_count = len(bot.simple_index) if bot.simple_index else 0
+                keywords_count = len(index.simple_index) if index else 0
                 st.metric("🔍 Palavras-chave", keywords_count)
                 
                 st.metric("⚡ Método", "TF-IDF + Fallback")
+            
+            st.metric("🔁 Versão do Índice", index.version if index else 0)
+            
+            if bot.cache is not None:
+                cache_stats = bot.cache.stats()
+                st.metric(
+                    "🗂️ Cache de Respostas",
+                    f"{cache_stats['hit_rate']:.0%} acertos",
+                    f"{cache_stats['hits']} hits / {cache_stats['misses']} misses",
+                    delta_color="off"
+                )
+            
+            p95 = bot.metrics.stages.percentiles('ask')[0.95]
+            st.metric("⏱️ Latência p95 (ask)", f"{p95 * 1000:.1f} ms")
+            
+            if bot.flights is not None:
+                flight_stats = bot.flights.stats()
+                st.metric("🧵 Perguntas Coalescidas", flight_stats['coalesced'],
+                          f"{flight_stats['executions']} buscas executadas", delta_color="off")
+            
+            if st.button("🔄 Recarregar Base", use_container_width=True):
+                init_reloader(bot).trigger()
+                st.info("⏳ Recarga em segundo plano; novas perguntas usarão o índice novo")
         else:
             st.warning("⚠️ Chatbot não inicializado")
 
@@ -317,6 +355,10 @@ def main():
             st.rerun()
         return
     
+    # Hot reload de data/texts em segundo plano
+    init_reloader(st.session_state.chatbot)
+    init_metrics_server(st.session_state.chatbot)
+    
     # Status de sucesso
     st.markdown("""
     <div class="success-box">